@@ -1,11 +1,12 @@
 from django.contrib import admin
-from .models import GameServer, ServerPlayer, ServerStatusLog
+from .models import (GameServer, PlayerPresence, ServerPlayer,
+                     ServerStatusLog, ServerStatusRollup)
 
 
 @admin.register(GameServer)
 class GameServerAdmin(admin.ModelAdmin):
     list_display = ['name', 'ip_address', 'port', 'current_players', 'max_players', 
-                   'is_online', 'is_active', 'last_query']
+                   'is_online', 'is_active', 'last_query', 'next_poll_at', 'consecutive_failures']
     list_filter = ['is_active', 'is_online']
     ordering = ['display_order', 'name']
 
@@ -22,3 +23,19 @@ class ServerStatusLogAdmin(admin.ModelAdmin):
     list_display = ['server', 'timestamp', 'player_count', 'staff_count', 'is_online']
     list_filter = ['server', 'is_online']
     ordering = ['-timestamp']
+
+
+@admin.register(ServerStatusRollup)
+class ServerStatusRollupAdmin(admin.ModelAdmin):
+    list_display = ['server', 'resolution', 'bucket_start', 'sample_count', 'online_count',
+                   'max_players', 'max_staff']
+    list_filter = ['server', 'resolution']
+    ordering = ['-bucket_start']
+
+
+@admin.register(PlayerPresence)
+class PlayerPresenceAdmin(admin.ModelAdmin):
+    list_display = ['name', 'server', 'first_seen', 'last_seen', 'is_current', 'is_staff']
+    list_filter = ['server', 'is_current', 'is_staff']
+    search_fields = ['name', 'normalized_name', 'steam_id']
+    ordering = ['-last_seen']
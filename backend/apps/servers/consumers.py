@@ -36,7 +36,11 @@ class ServerStatusConsumer(AsyncWebsocketConsumer):
             data = json.loads(text_data)
             action = data.get('action')
             
-            if action == 'refresh':
+            if action == 'resync':
+                # Client missed a sequence number; send the full snapshot
+                await self.send_initial_data(message_type='resync')
+            
+            elif action == 'refresh':
                 # Trigger server refresh
                 result = await self.refresh_servers()
                 await self.send(text_data=json.dumps({
@@ -51,59 +55,45 @@ class ServerStatusConsumer(AsyncWebsocketConsumer):
             }))
 
     async def status_update(self, event):
-        """Handle server status update broadcast."""
+        """Handle full server status broadcast."""
         await self.send(text_data=json.dumps({
             'type': 'status_update',
+            'seq': event.get('seq'),
             'data': event['data']
         }))
 
-    async def send_initial_data(self):
-        """Send initial server status data."""
-        data = await self._get_server_status()
+    async def status_delta(self, event):
+        """Handle server status delta broadcast.
+
+        Clients apply the changes only if ``base_seq`` matches the last
+        sequence number they saw, otherwise they send a ``resync`` action.
+        """
+        await self.send(text_data=json.dumps({
+            'type': 'status_delta',
+            'seq': event['seq'],
+            'base_seq': event['base_seq'],
+            'changes': event['changes']
+        }))
+
+    async def send_initial_data(self, message_type='initial_data'):
+        """Send the full server status snapshot with its sequence number."""
+        snapshot = await self._get_server_status()
         await self.send(text_data=json.dumps({
-            'type': 'initial_data',
-            'data': data
+            'type': message_type,
+            'seq': snapshot['version'],
+            'data': snapshot['servers']
         }))
 
     @database_sync_to_async
     def _get_server_status(self):
-        from .models import GameServer, ServerPlayer
-        
-        servers = GameServer.objects.filter(is_active=True)
+        from .snapshot import get_status_snapshot
         
-        result = []
-        for server in servers:
-            staff_count = ServerPlayer.objects.filter(
-                server=server, is_staff=True
-            ).count()
-            
-            players = ServerPlayer.objects.filter(server=server)
-            
-            result.append({
-                'id': server.id,
-                'name': server.name,
-                'server_name': server.server_name,
-                'map_name': server.map_name,
-                'current_players': server.current_players,
-                'max_players': server.max_players,
-                'is_online': server.is_online,
-                'staff_online': staff_count,
-                'players': [
-                    {
-                        'name': p.name,
-                        'score': p.score,
-                        'duration': p.duration_formatted,
-                        'is_staff': p.is_staff,
-                        'staff_rank': p.staff_rank,
-                    }
-                    for p in players
-                ]
-            })
-        
-        return result
+        # One cache read; only rebuilds from the database on a cache miss
+        return get_status_snapshot()
 
-    @database_sync_to_async
-    def refresh_servers(self):
-        from .services import ServerQueryService
-        service = ServerQueryService()
-        return service.query_all_servers()
+    async def refresh_servers(self):
+        from .refresh import RefreshCoordinator
+        
+        # Joins an in-progress sweep (or reuses a fresh one) instead of
+        # starting another full UDP sweep
+        return await RefreshCoordinator().refresh_async()
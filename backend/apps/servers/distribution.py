@@ -0,0 +1,125 @@
+"""
+Staff distribution across game servers.
+
+Which roster members are on which server, and who is offline, for any
+number of active servers. The poller already matched every player against
+the roster and stored the Steam ID on staff ServerPlayer rows, so the
+distribution is one query over the active roster with the online player
+(if any) looked up by ``steam_id``; no name matching is repeated here.
+
+The result only changes when the poller publishes a new status snapshot,
+so it is cached against the snapshot version and rebuilt once per tick.
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery
+
+from .models import ServerPlayer
+from .snapshot import get_status_snapshot
+
+logger = logging.getLogger(__name__)
+
+DISTRIBUTION_CACHE_KEY = 'servers:staff_distribution'
+
+# Matches the snapshot safety net; a new tick replaces it sooner
+DISTRIBUTION_TIMEOUT = 300
+
+
+def _format_duration(seconds):
+    hours = seconds // 3600
+    minutes = (seconds % 3600) // 60
+    if hours > 0:
+        return f"{hours}h {minutes}m"
+    return f"{minutes}m"
+
+
+def build_staff_distribution(servers):
+    """
+    Build the distribution for the given servers in a single query.
+
+    Args:
+        servers: Snapshot server dicts (id and name), in display order
+
+    Returns:
+        {'servers': [{'server_id', 'server_name', 'staff': [...]}, ...],
+         'offline': [...]}
+    """
+    from apps.staff.models import StaffRoster
+
+    server_ids = [server['id'] for server in servers]
+    # Django cannot join on a non-FK column, so the join on steam_id is
+    # expressed as correlated subqueries; it is still one statement.
+    online = ServerPlayer.objects.filter(
+        steam_id=OuterRef('staff_id'),
+        is_staff=True,
+        server_id__in=server_ids,
+    ).order_by('-duration')
+
+    roster = (
+        StaffRoster.objects.filter(is_active=True)
+        .annotate(
+            online_server_id=Subquery(online.values('server_id')[:1]),
+            online_name=Subquery(online.values('name')[:1]),
+            online_duration=Subquery(online.values('duration')[:1]),
+        )
+        .values(
+            'staff_id', 'staff__name', 'rank', 'rank_priority',
+            'online_server_id', 'online_name', 'online_duration',
+        )
+        .order_by('rank_priority', 'staff__name')
+    )
+
+    buckets = {
+        server['id']: {'server_id': server['id'], 'server_name': server['name'], 'staff': []}
+        for server in servers
+    }
+    offline = []
+
+    for row in roster:
+        entry = {
+            'steam_id': row['staff_id'],
+            'name': row['staff__name'],
+            'rank': row['rank'],
+            'role_color': settings.STAFF_ROLE_COLORS.get(row['rank'], '#808080'),
+            'role_priority': row['rank_priority'],
+        }
+        bucket = buckets.get(row['online_server_id'])
+        if bucket is None:
+            offline.append({**entry, 'server': None})
+            continue
+        bucket['staff'].append({
+            **entry,
+            # In-game name, which may differ from the roster name
+            'name': row['online_name'] or row['staff__name'],
+            'duration': _format_duration(row['online_duration'] or 0),
+            'server': bucket['server_name'],
+        })
+
+    return {
+        'servers': list(buckets.values()),
+        'offline': offline,
+    }
+
+
+def get_staff_distribution():
+    """
+    Return the distribution for the current snapshot, building it at most
+    once per poll tick.
+    """
+    snapshot = get_status_snapshot()
+    version = snapshot['version']
+
+    cached = cache.get(DISTRIBUTION_CACHE_KEY)
+    if cached is not None and cached['version'] == version:
+        return cached['distribution']
+
+    distribution = build_staff_distribution(snapshot['servers'])
+    cache.set(
+        DISTRIBUTION_CACHE_KEY,
+        {'version': version, 'distribution': distribution},
+        timeout=DISTRIBUTION_TIMEOUT,
+    )
+    logger.debug(f"Rebuilt staff distribution for snapshot {version}")
+    return distribution
@@ -0,0 +1,239 @@
+"""
+Local fake A2S server for benchmarking the polling pipeline.
+
+FakeA2SCluster binds one UDP socket per simulated game server on localhost
+and answers A2S_INFO and A2S_PLAYER requests from a single background
+thread. Each server runs a scenario:
+
+* ``ok``: valid info; player lists above one datagram are split with bit 15
+  of the message id set, the way GMod sends them,
+* ``bz2``: player list sent as a bz2-compressed split response,
+* ``corrupt_bz2``: compressed split response with a damaged bz2 stream,
+* ``players_timeout``: info answers, player requests are ignored,
+* ``timeout``: nothing answers.
+
+Responses can also be replayed from a recording made with record_server()
+(raw datagrams, hex-encoded), so real-world packets, including malformed
+ones, can be fed through the pipeline repeatedly.
+"""
+import bz2
+import logging
+import selectors
+import socket
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIMPLE = b'\xFF\xFF\xFF\xFF'
+HEADER_SPLIT = b'\xFE\xFF\xFF\xFF'
+
+# Payload bytes per split fragment (Source servers use 1248-byte datagrams)
+FRAGMENT_SIZE = 1236
+
+SCENARIOS = ['ok', 'bz2', 'corrupt_bz2', 'players_timeout', 'timeout']
+
+
+def build_info_packet(server_name, map_name, player_count, max_players):
+    """Source A2S_INFO response datagram."""
+    body = (
+        b'\x49\x11'
+        + server_name.encode() + b'\x00'
+        + map_name.encode() + b'\x00'
+        + b'garrysmod\x00'
+        + b"Garry's Mod\x00"
+        + struct.pack('<H', 4000)
+        + bytes([min(player_count, 255), min(max_players, 255), 0])
+        + b'dl\x00\x01'
+        + b'2023.06.28\x00'
+        + b'\x00'
+    )
+    return HEADER_SIMPLE + body
+
+
+def build_player_body(players):
+    """A2S_PLAYER response body for [(name, score, duration)], without header."""
+    players = players[:255]
+    body = bytearray([0x44, len(players)])
+    for name, score, duration in players:
+        body += b'\x00' + name.encode() + b'\x00' + struct.pack('<lf', score, duration)
+    return bytes(body)
+
+
+def split_packets(payload, message_id):
+    """Split a payload into Source split-packet datagrams."""
+    chunks = [payload[i:i + FRAGMENT_SIZE] for i in range(0, len(payload), FRAGMENT_SIZE)] or [b'']
+    return [
+        HEADER_SPLIT + struct.pack('<LBBH', message_id, len(chunks), number, 1248) + chunk
+        for number, chunk in enumerate(chunks)
+    ]
+
+
+def build_player_packets(players, mode='ok', message_id=1):
+    """Datagrams answering an A2S_PLAYER request in the given mode."""
+    response = HEADER_SIMPLE + build_player_body(players)
+
+    if mode == 'ok':
+        if len(response) <= FRAGMENT_SIZE:
+            return [response]
+        # GMod sets bit 15 on uncompressed split responses
+        return split_packets(response, 0x8000 | message_id)
+
+    compressed = bz2.compress(response)
+    if mode == 'corrupt_bz2':
+        middle = len(compressed) // 2
+        compressed = compressed[:middle] + bytes(b ^ 0x5A for b in compressed[middle:middle + 64]) + compressed[middle + 64:]
+    payload = struct.pack('<Ll', len(response), 0) + compressed
+    return split_packets(payload, 0x80000000 | message_id)
+
+
+class FakeServer:
+    """State of one simulated game server."""
+
+    def __init__(self, sock, name, scenario='ok', max_players=128, map_name='rp_downtown_v4c_v2'):
+        self.sock = sock
+        self.name = name
+        self.scenario = scenario
+        self.max_players = max_players
+        self.map_name = map_name
+        self.players = []
+        self.challenge = struct.pack('<l', hash(name) & 0x7FFFFFFF)
+        self.message_id = 0
+        # Recorded datagrams to replay instead of generated ones
+        self.recorded_info = None
+        self.recorded_players = None
+        self.requests = 0
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    def info_packets(self):
+        if self.recorded_info is not None:
+            return self.recorded_info
+        return [build_info_packet(self.name, self.map_name, len(self.players), self.max_players)]
+
+    def player_packets(self):
+        if self.recorded_players is not None:
+            return self.recorded_players
+        self.message_id = (self.message_id + 1) % 0x7FFF
+        mode = self.scenario if self.scenario in ('bz2', 'corrupt_bz2') else 'ok'
+        return build_player_packets(self.players, mode, self.message_id)
+
+    def handle(self, data, addr):
+        self.requests += 1
+        if self.scenario == 'timeout' or not data.startswith(HEADER_SIMPLE) or len(data) < 5:
+            return
+
+        kind = data[4]
+        if kind == 0x54:  # A2S_INFO
+            packets = self.info_packets()
+        elif kind == 0x55:  # A2S_PLAYER
+            if self.scenario == 'players_timeout':
+                return
+            if data[5:9] != self.challenge:
+                packets = [HEADER_SIMPLE + b'\x41' + self.challenge]
+            else:
+                packets = self.player_packets()
+        else:
+            return
+
+        for packet in packets:
+            self.sock.sendto(packet, addr)
+
+
+class FakeA2SCluster:
+    """A set of fake servers answered by one background thread."""
+
+    def __init__(self):
+        self.servers = []
+        self.selector = selectors.DefaultSelector()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def add_server(self, name, scenario='ok', **kwargs):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sock.setblocking(False)
+        server = FakeServer(sock, name, scenario, **kwargs)
+        self.selector.register(sock, selectors.EVENT_READ, server)
+        self.servers.append(server)
+        return server
+
+    def start(self):
+        self._thread = threading.Thread(target=self._serve, name='fake-a2s', daemon=True)
+        self._thread.start()
+        return self
+
+    def _serve(self):
+        while not self._stop.is_set():
+            for key, _ in self.selector.select(timeout=0.1):
+                server = key.data
+                while True:
+                    try:
+                        data, addr = server.sock.recvfrom(4096)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except OSError:
+                        break
+                    try:
+                        server.handle(data, addr)
+                    except Exception as e:
+                        logger.error(f"Fake A2S server {server.name} failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        for server in self.servers:
+            self.selector.unregister(server.sock)
+            server.sock.close()
+        self.selector.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _exchange(sock, request, timeout):
+    """Send one request and collect the datagrams of its response."""
+    sock.settimeout(timeout)
+    sock.send(request)
+    first = sock.recv(65535)
+    packets = [first]
+    if first.startswith(HEADER_SPLIT) and len(first) >= 12:
+        total = first[8]
+        while len(packets) < total:
+            packets.append(sock.recv(65535))
+    return packets
+
+
+def record_server(address, timeout=5):
+    """
+    Capture the raw A2S_INFO and A2S_PLAYER responses of a live server.
+
+    Returns {'info': [hex datagram, ...], 'players': [...]}; challenge
+    exchanges are followed but not recorded.
+    """
+    family = socket.AF_INET6 if ':' in address[0] else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        sock.connect(address)
+
+        info_request = HEADER_SIMPLE + b'TSource Engine Query\x00'
+        info = _exchange(sock, info_request, timeout)
+        if info[0][4:5] == b'\x41':
+            info = _exchange(sock, info_request + info[0][5:9], timeout)
+
+        players = _exchange(sock, HEADER_SIMPLE + b'U' + b'\xFF' * 4, timeout)
+        if players[0][4:5] == b'\x41':
+            players = _exchange(sock, HEADER_SIMPLE + b'U' + players[0][5:9], timeout)
+
+        return {
+            'info': [packet.hex() for packet in info],
+            'players': [packet.hex() for packet in players],
+        }
+    finally:
+        sock.close()
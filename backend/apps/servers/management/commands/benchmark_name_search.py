@@ -0,0 +1,148 @@
+"""
+Management command to benchmark fuzzy name search against the old scans.
+
+Generates a synthetic set of player names (10,000 by default) and times:
+
+* in-memory staff matching: the old find_matching_staff() loop versus the
+  StaffMatcher trigram fallback (TrigramIndex),
+* database lookups (PostgreSQL only): the old Python pass over every name
+  with normalize_name() and an ``icontains`` scan versus the pg_trgm search
+  backed by the GIN index.
+
+Database rows are written inside a transaction that is rolled back.
+"""
+import random
+import string
+import time
+
+from apps.servers.models import GameServer, PlayerPresence
+from apps.servers.name_search import TrigramIndex, search_players
+from apps.servers.services import find_matching_staff, normalize_name
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+DECORATIONS = [
+    '{}', 'xX_{}_Xx', '{}123', '[TAG] {}', '{}_TTV', 'The{}', '{}{}', '{}.exe',
+]
+
+
+def _random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10))).capitalize()
+
+
+def _make_names(count, rng):
+    """Return (decorated player name, base word) pairs."""
+    pairs = []
+    for _ in range(count):
+        word = _random_word(rng)
+        pairs.append((rng.choice(DECORATIONS).format(word, word)[:100], word))
+    return pairs
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark trigram name search against the previous scan-based matching'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--names', type=int, default=10000, help='Number of synthetic names')
+        parser.add_argument('--queries', type=int, default=200, help='Number of lookups to time')
+        parser.add_argument('--threshold', type=float, default=0.5, help='Similarity threshold')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        pairs = _make_names(options['names'], rng)
+        names = [name for name, _ in pairs]
+        # Queries are the undecorated base words, i.e. the "renamed" case
+        queries = [word for _, word in rng.sample(pairs, min(options['queries'], len(pairs)))]
+        threshold = options['threshold']
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(names)} names, {len(queries)} queries, threshold {threshold}'
+        ))
+
+        self._bench_in_memory(names, queries, threshold)
+
+        if connection.vendor != 'postgresql':
+            self.stdout.write(self.style.WARNING('Skipping database benchmark (requires PostgreSQL)'))
+            return
+
+        try:
+            with transaction.atomic():
+                self._bench_database(names, queries, threshold)
+                raise Rollback()
+        except Rollback:
+            pass
+
+    def _report(self, label, elapsed, queries, hits):
+        per_query = elapsed / max(len(queries), 1) * 1000
+        self.stdout.write(
+            f'  {label:<38} {elapsed * 1000:9.1f} ms total  {per_query:8.3f} ms/query  {hits} hits'
+        )
+
+    def _bench_in_memory(self, names, queries, threshold):
+        self.stdout.write('\nIn-memory staff matching')
+
+        roster = {name.lower(): name for name in names}
+        started = time.perf_counter()
+        hits = sum(1 for query in queries if find_matching_staff(query, roster))
+        self._report('find_matching_staff (scan)', time.perf_counter() - started, queries, hits)
+
+        started = time.perf_counter()
+        index = TrigramIndex(roster.items())
+        build = time.perf_counter() - started
+        started = time.perf_counter()
+        hits = sum(1 for query in queries if index.best(query, threshold))
+        self._report(f'TrigramIndex (+{build * 1000:.0f} ms build)', time.perf_counter() - started, queries, hits)
+
+    def _bench_database(self, names, queries, threshold):
+        self.stdout.write('\nDatabase lookups (PostgreSQL)')
+
+        # Documentation address; the whole transaction is rolled back
+        server = GameServer.objects.create(
+            name='Benchmark', ip_address='192.0.2.1', port=0, is_active=False
+        )
+        now = timezone.now()
+        PlayerPresence.objects.bulk_create([
+            PlayerPresence(
+                server=server, name=name, normalized_name=normalize_name(name)[:100],
+                first_seen=now, last_seen=now, is_current=False,
+            )
+            for name in names
+        ], batch_size=2000)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE servers_playerpresence')
+
+        started = time.perf_counter()
+        hits = 0
+        for query in queries:
+            normalized = normalize_name(query)
+            hits += any(
+                normalize_name(name) == normalized
+                for name in PlayerPresence.objects.values_list('name', flat=True)
+            )
+        self._report('normalize_name pass over all rows', time.perf_counter() - started, queries, hits)
+
+        started = time.perf_counter()
+        hits = sum(
+            1 for query in queries
+            if PlayerPresence.objects.filter(name__icontains=query).exists()
+        )
+        self._report('icontains', time.perf_counter() - started, queries, hits)
+
+        started = time.perf_counter()
+        hits = sum(1 for query in queries if search_players(query, threshold=threshold, limit=5))
+        self._report('pg_trgm search_players', time.perf_counter() - started, queries, hits)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN SELECT name FROM servers_playerpresence WHERE name %% %s',
+                [queries[0]],
+            )
+            plan = '\n'.join(f'    {row[0]}' for row in cursor.fetchall())
+        self.stdout.write(f'\n  Plan for a trigram lookup:\n{plan}')
+
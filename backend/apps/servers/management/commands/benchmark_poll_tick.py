@@ -0,0 +1,300 @@
+"""
+Management command to benchmark a server poll tick end-to-end.
+
+Starts a local fake A2S cluster (see apps.servers.fake_a2s), points a set of
+GameServer rows at it in a throwaway test database and runs
+ServerQueryService.query_all_servers() for a number of ticks, with players
+joining and leaving between ticks. For every tick it reports:
+
+* wall time,
+* database queries,
+* rows written (sum of rowcounts of INSERT/UPDATE/DELETE statements),
+* channel-layer messages (and their JSON size) sent to WebSocket groups.
+
+PostgreSQL only: the test database is built from the project migrations,
+which need PostgreSQL (pg_trgm among others). Cache and channel layer are
+swapped for in-memory backends and the Redis staff presence registry is
+stubbed out, so the numbers do not depend on Redis. --max-queries /
+--max-seconds turn the run into a regression gate (non-zero exit when the
+per-tick mean exceeds them).
+
+Use --record to capture real responses from the configured live servers
+and --replay to feed them through the fake cluster.
+"""
+import json
+import random
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+BENCHMARK_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'benchmark-poll-tick',
+    }
+}
+
+BENCHMARK_CHANNEL_LAYERS = {
+    'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'},
+}
+
+
+class RowCounter:
+    """connection.execute_wrapper that sums rows written by each statement."""
+
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        if sql.lstrip().upper().startswith(WRITE_PREFIXES):
+            rowcount = getattr(context['cursor'], 'rowcount', -1)
+            if rowcount and rowcount > 0:
+                self.rows += rowcount
+        return result
+
+
+class ChannelCounter:
+    """Counts messages and bytes sent through the channel layer."""
+
+    def __init__(self, layer):
+        self.messages = 0
+        self.bytes = 0
+        self._group_send = layer.group_send
+        self._send = layer.send
+        layer.group_send = self.group_send
+        layer.send = self.send
+
+    def _count(self, message):
+        self.messages += 1
+        self.bytes += len(json.dumps(message, default=str))
+
+    async def group_send(self, group, message):
+        self._count(message)
+        return await self._group_send(group, message)
+
+    async def send(self, channel, message):
+        self._count(message)
+        return await self._send(channel, message)
+
+    def reset(self):
+        self.messages = 0
+        self.bytes = 0
+
+
+class Command(BaseCommand):
+    help = 'Benchmark server poll ticks against a local fake A2S cluster'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', type=int, default=4, help='Number of simulated servers')
+        parser.add_argument('--players', type=int, default=80, help='Players per server (max 255)')
+        parser.add_argument('--staff', type=int, default=30, help='Roster size; staff are spread over the servers')
+        parser.add_argument('--ticks', type=int, default=5, help='Number of poll ticks')
+        parser.add_argument('--churn', type=float, default=0.1, help='Fraction of players replaced between ticks')
+        parser.add_argument('--bz2-servers', type=int, default=0, help='Servers sending compressed player lists')
+        parser.add_argument('--corrupt-servers', type=int, default=0, help='Servers sending corrupt bz2 player lists')
+        parser.add_argument('--players-timeout-servers', type=int, default=0,
+                            help='Servers answering info but not player requests')
+        parser.add_argument('--timeout-servers', type=int, default=0, help='Servers not answering at all')
+        parser.add_argument('--query-timeout', type=float, default=1.0, help='Per-request A2S timeout (seconds)')
+        parser.add_argument('--tick-deadline', type=float, default=2.0, help='Deadline for a whole tick (seconds)')
+        parser.add_argument('--replay', help='Replay responses from a recording made with --record')
+        parser.add_argument('--record', help='Record responses of the configured live servers to this file and exit')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the test database between runs')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        parser.add_argument('--max-queries', type=float, help='Fail if mean queries per tick exceed this')
+        parser.add_argument('--max-seconds', type=float, help='Fail if mean wall time per tick exceeds this')
+
+    def handle(self, *args, **options):
+        if options['record']:
+            self._record(options['record'])
+            return
+
+        if connection.vendor != 'postgresql':
+            raise CommandError(
+                f"benchmark_poll_tick needs PostgreSQL (the migrations do not run on {connection.vendor})"
+            )
+
+        options['players'] = max(0, min(options['players'], 255))
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, CHANNEL_LAYERS=BENCHMARK_CHANNEL_LAYERS):
+                ticks = self._run(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options['keepdb'])
+
+        summary = self._summarize(ticks)
+        if options['json']:
+            self.stdout.write(json.dumps({'ticks': ticks, 'summary': summary}, indent=2))
+        else:
+            self._print(ticks, summary)
+
+        failures = []
+        if options['max_queries'] is not None and summary['queries']['mean'] > options['max_queries']:
+            failures.append(f"mean queries {summary['queries']['mean']:.1f} > {options['max_queries']}")
+        if options['max_seconds'] is not None and summary['wall_seconds']['mean'] > options['max_seconds']:
+            failures.append(f"mean wall time {summary['wall_seconds']['mean']:.3f}s > {options['max_seconds']}s")
+        if failures:
+            raise CommandError('Benchmark regression: ' + '; '.join(failures))
+
+    def _record(self, path):
+        from apps.servers.fake_a2s import record_server
+        from apps.servers.models import GameServer
+
+        recording = {'servers': []}
+        for server in GameServer.objects.filter(is_active=True):
+            try:
+                captured = record_server((server.ip_address, server.port))
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f'{server.name}: {type(e).__name__} {e}'))
+                continue
+            recording['servers'].append({'name': server.name, **captured})
+            self.stdout.write(
+                f"{server.name}: {len(captured['info'])} info / {len(captured['players'])} player datagrams"
+            )
+
+        with open(path, 'w') as f:
+            json.dump(recording, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Recorded {len(recording['servers'])} servers to {path}"))
+
+    def _scenarios(self, options):
+        scenarios = (
+            ['timeout'] * options['timeout_servers']
+            + ['players_timeout'] * options['players_timeout_servers']
+            + ['corrupt_bz2'] * options['corrupt_servers']
+            + ['bz2'] * options['bz2_servers']
+        )
+        scenarios = scenarios[:options['servers']]
+        return scenarios + ['ok'] * (options['servers'] - len(scenarios))
+
+    def _run(self, options):
+        from channels.layers import channel_layers, get_channel_layer
+
+        from apps.servers import query_engine
+        from apps.servers.fake_a2s import FakeA2SCluster
+        from apps.servers.models import GameServer
+        from apps.servers.services import ServerQueryService, _staff_matcher_cache
+        from apps.staff import presence
+        from apps.staff.models import Staff, StaffRoster
+
+        rng = random.Random(options['seed'])
+        recording = None
+        if options['replay']:
+            with open(options['replay']) as f:
+                recording = json.load(f)['servers']
+
+        # Fresh in-memory layer and staff index for this database
+        channel_layers.backends = {}
+        _staff_matcher_cache.update({'fingerprint': None, 'matcher': None})
+        counter = ChannelCounter(get_channel_layer())
+
+        cluster = FakeA2SCluster()
+        staff_names = [f'Staff{i:03d}' for i in range(options['staff'])]
+        for i, name in enumerate(staff_names):
+            staff = Staff.objects.create(steam_id=f'STEAM_0:1:{100000 + i}', name=name)
+            StaffRoster.objects.create(staff=staff, rank='Moderator', rank_priority=10)
+
+        next_player = [0]
+
+        def new_player():
+            next_player[0] += 1
+            return [f'Player{next_player[0]:05d}', rng.randint(0, 50), rng.uniform(0, 3600)]
+
+        for index, scenario in enumerate(self._scenarios(options)):
+            fake = cluster.add_server(f'Bench {index + 1}', scenario)
+            fake.players = [new_player() for _ in range(options['players'])]
+            # Spread staff over the servers
+            for slot, name in enumerate(staff_names[index::options['servers']]):
+                if slot < len(fake.players):
+                    fake.players[slot][0] = name
+            if recording:
+                recorded = recording[index % len(recording)]
+                fake.recorded_info = [bytes.fromhex(p) for p in recorded['info']]
+                fake.recorded_players = [bytes.fromhex(p) for p in recorded['players']]
+            host, port = fake.address
+            GameServer.objects.create(
+                name=fake.name, ip_address=host, port=port, display_order=index,
+            )
+
+        row_counter = RowCounter()
+        service = ServerQueryService()
+        ticks = []
+        with cluster, \
+                mock.patch.object(query_engine, 'QUERY_TIMEOUT', options['query_timeout']), \
+                mock.patch.object(query_engine, 'TICK_DEADLINE', options['tick_deadline']), \
+                mock.patch.object(presence, 'update_server', lambda *args: None), \
+                connection.execute_wrapper(row_counter):
+            last_advance = time.monotonic()
+            for tick in range(1, options['ticks'] + 1):
+                if tick > 1:
+                    now = time.monotonic()
+                    self._advance(cluster, options['churn'], rng, new_player, now - last_advance)
+                    last_advance = now
+
+                row_counter.rows = 0
+                counter.reset()
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    results = service.query_all_servers()
+                    elapsed = time.perf_counter() - started
+
+                ticks.append({
+                    'tick': tick,
+                    'wall_seconds': round(elapsed, 4),
+                    'queries': len(queries.captured_queries),
+                    'rows_written': row_counter.rows,
+                    'channel_messages': counter.messages,
+                    'channel_bytes': counter.bytes,
+                    'servers_online': sum(1 for r in results if r['is_online']),
+                    'players_stored': sum(len(r['players']) for r in results),
+                })
+        return ticks
+
+    def _advance(self, cluster, churn, rng, new_player, elapsed):
+        """Move the fake servers forward one tick: time passes, some players swap."""
+        for fake in cluster.servers:
+            for player in fake.players:
+                player[1] += rng.randint(0, 3)
+                # Durations follow the wall clock, as on a real server
+                player[2] += elapsed
+            for slot in range(len(fake.players)):
+                if fake.players[slot][0].startswith('Player') and rng.random() < churn:
+                    fake.players[slot] = new_player()
+
+    def _summarize(self, ticks):
+        summary = {}
+        for key in ('wall_seconds', 'queries', 'rows_written', 'channel_messages', 'channel_bytes'):
+            values = [tick[key] for tick in ticks]
+            summary[key] = {
+                'mean': statistics.mean(values) if values else 0,
+                'max': max(values) if values else 0,
+                # Steady state, without the initial load of tick 1
+                'mean_after_first': statistics.mean(values[1:]) if len(values) > 1 else None,
+            }
+        return summary
+
+    def _print(self, ticks, summary):
+        header = f"{'tick':>4} {'wall s':>8} {'queries':>8} {'rows':>7} {'msgs':>5} {'msg KB':>8} {'online':>6} {'players':>7}"
+        self.stdout.write(self.style.SUCCESS(header))
+        for tick in ticks:
+            self.stdout.write(
+                f"{tick['tick']:>4} {tick['wall_seconds']:>8.3f} {tick['queries']:>8} "
+                f"{tick['rows_written']:>7} {tick['channel_messages']:>5} "
+                f"{tick['channel_bytes'] / 1024:>8.1f} {tick['servers_online']:>6} {tick['players_stored']:>7}"
+            )
+        self.stdout.write('')
+        for key, values in summary.items():
+            steady = values['mean_after_first']
+            steady = f'{steady:.3f}' if steady is not None else '-'
+            self.stdout.write(
+                f"{key:<18} mean {values['mean']:.3f}  max {values['max']}  after first tick {steady}"
+            )
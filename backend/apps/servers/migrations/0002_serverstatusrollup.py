@@ -0,0 +1,70 @@
+# Generated by Django 4.2.27 on 2026-10-17 01:38
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("servers", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ServerStatusRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "resolution",
+                    models.CharField(
+                        choices=[
+                            ("minute", "Minute"),
+                            ("hour", "Hour"),
+                            ("day", "Day"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                ("bucket_start", models.DateTimeField()),
+                ("sample_count", models.IntegerField(default=0)),
+                ("online_count", models.IntegerField(default=0)),
+                ("min_players", models.IntegerField(blank=True, null=True)),
+                ("max_players", models.IntegerField(blank=True, null=True)),
+                ("player_total", models.BigIntegerField(default=0)),
+                ("min_staff", models.IntegerField(blank=True, null=True)),
+                ("max_staff", models.IntegerField(blank=True, null=True)),
+                ("staff_total", models.BigIntegerField(default=0)),
+                (
+                    "server",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="status_rollups",
+                        to="servers.gameserver",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-bucket_start"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="serverstatusrollup",
+            index=models.Index(
+                fields=["resolution", "bucket_start"],
+                name="servers_ser_resolut_1d47be_idx",
+            ),
+        ),
+        migrations.AlterUniqueTogether(
+            name="serverstatusrollup",
+            unique_together={("server", "resolution", "bucket_start")},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("servers", "0002_serverstatusrollup"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="gameserver",
+            name="consecutive_failures",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="gameserver",
+            name="next_poll_at",
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("servers", "0003_gameserver_poll_schedule"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlayerPresence",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("normalized_name", models.CharField(max_length=100)),
+                ("steam_id", models.CharField(blank=True, max_length=50, null=True)),
+                ("is_staff", models.BooleanField(default=False)),
+                ("first_seen", models.DateTimeField()),
+                ("last_seen", models.DateTimeField()),
+                ("is_current", models.BooleanField(default=True)),
+                (
+                    "server",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="presence_history",
+                        to="servers.gameserver",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-last_seen"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="playerpresence",
+            index=models.Index(
+                fields=["normalized_name", "last_seen"],
+                name="servers_pla_normali_bfb860_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playerpresence",
+            index=models.Index(
+                fields=["steam_id", "last_seen"], name="servers_pla_steam_i_1eaff4_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="playerpresence",
+            index=models.Index(
+                fields=["server", "is_current"], name="servers_pla_server__b267ce_idx"
+            ),
+        ),
+    ]
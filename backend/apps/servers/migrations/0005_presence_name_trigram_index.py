@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:31
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("servers", "0004_playerpresence"),
+        # Creates the pg_trgm extension
+        ("staff", "0012_trigram_name_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="playerpresence",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="presence_name_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+    ]
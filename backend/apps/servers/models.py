@@ -1,3 +1,4 @@
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -19,6 +20,10 @@ class GameServer(models.Model):
     last_query = models.DateTimeField(null=True, blank=True)
     last_successful_query = models.DateTimeField(null=True, blank=True)
     is_online = models.BooleanField(default=False)
+    
+    # Adaptive polling state (see apps.servers.scheduler)
+    next_poll_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    consecutive_failures = models.IntegerField(default=0)
 
     class Meta:
         ordering = ['display_order', 'name']
@@ -90,3 +95,97 @@ class ServerStatusLog(models.Model):
 
     def __str__(self):
         return f"{self.server.name} - {self.timestamp}"
+
+
+class ServerStatusRollup(models.Model):
+    """Per-minute/hour/day aggregate of ServerStatusLog samples.
+
+    Player and staff min/max/totals only cover samples where the server was
+    online, matching how the stats endpoints have always averaged them.
+    """
+
+    RESOLUTION_CHOICES = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    server = models.ForeignKey(
+        GameServer,
+        on_delete=models.CASCADE,
+        related_name='status_rollups'
+    )
+    resolution = models.CharField(max_length=10, choices=RESOLUTION_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    sample_count = models.IntegerField(default=0)
+    online_count = models.IntegerField(default=0)
+
+    min_players = models.IntegerField(null=True, blank=True)
+    max_players = models.IntegerField(null=True, blank=True)
+    player_total = models.BigIntegerField(default=0)
+
+    min_staff = models.IntegerField(null=True, blank=True)
+    max_staff = models.IntegerField(null=True, blank=True)
+    staff_total = models.BigIntegerField(default=0)
+
+    class Meta:
+        ordering = ['-bucket_start']
+        unique_together = ['server', 'resolution', 'bucket_start']
+        indexes = [
+            models.Index(fields=['resolution', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.server.name} - {self.resolution} {self.bucket_start}"
+
+    @property
+    def avg_players(self):
+        return self.player_total / self.online_count if self.online_count else 0
+
+    @property
+    def avg_staff(self):
+        return self.staff_total / self.online_count if self.online_count else 0
+
+    @property
+    def uptime_ratio(self):
+        return self.online_count / self.sample_count if self.sample_count else 0
+
+
+class PlayerPresence(models.Model):
+    """One continuous stint of a player on a server.
+
+    Written by the poller: a row is opened when a name appears on a server,
+    its last_seen is bumped on every poll while the player stays, and it is
+    closed (is_current=False) once they leave. Rows are never deleted, so the
+    table answers "when was X last on, and where" long after the ephemeral
+    ServerPlayer row is gone.
+    """
+
+    server = models.ForeignKey(
+        GameServer,
+        on_delete=models.CASCADE,
+        related_name='presence_history'
+    )
+    name = models.CharField(max_length=100)
+    # normalize_name(name): lowercase with leading/trailing digits stripped
+    normalized_name = models.CharField(max_length=100)
+    steam_id = models.CharField(max_length=50, blank=True, null=True)
+    is_staff = models.BooleanField(default=False)
+
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+    is_current = models.BooleanField(default=True)
+
+    class Meta:
+        ordering = ['-last_seen']
+        indexes = [
+            models.Index(fields=['normalized_name', 'last_seen']),
+            models.Index(fields=['steam_id', 'last_seen']),
+            models.Index(fields=['server', 'is_current']),
+            # Trigram index for fuzzy name search (apps.servers.name_search)
+            GinIndex(fields=['name'], name='presence_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} on {self.server.name} ({self.first_seen} - {self.last_seen})"
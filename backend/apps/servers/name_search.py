@@ -0,0 +1,179 @@
+"""
+Fuzzy (trigram) name search for players and staff.
+
+Exact and digit-stripped matching (normalize_name) misses renamed players
+such as "xX_Cloudy_Xx" for "Cloudy". Trigram similarity scores those by the
+share of three-letter chunks two names have in common.
+
+Two implementations with the same scoring:
+
+* database searches use Postgres pg_trgm (TrigramSimilarity) backed by GIN
+  trigram indexes on Staff.name, Staff.steam_name and PlayerPresence.name,
+  for the roster search filter and PlayerLookupView,
+* TrigramIndex is an in-memory equivalent for the poller's StaffMatcher,
+  which matches every player every tick and must not query the database
+  per name.
+"""
+import re
+
+from django.db.models import Max, Q
+from django.db.models.functions import Greatest
+
+# pg_trgm's default similarity threshold
+DEFAULT_THRESHOLD = 0.3
+
+DEFAULT_LIMIT = 10
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """
+    Trigram set of a string, computed the way pg_trgm does: lowercase,
+    split into alphanumeric words, pad each word with two leading spaces and
+    one trailing space.
+    """
+    result = set()
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f"  {word} "
+        for i in range(len(padded) - 2):
+            result.add(padded[i:i + 3])
+    return result
+
+
+def similarity(a, b):
+    """pg_trgm similarity(): shared trigrams over all distinct trigrams."""
+    ta, tb = trigrams(a), trigrams(b)
+    if not ta or not tb:
+        return 0.0
+    return len(ta & tb) / len(ta | tb)
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index over a set of names.
+
+    An inverted index (trigram -> keys) limits scoring to names that share
+    at least one trigram with the query.
+    """
+
+    def __init__(self, items):
+        """
+        Args:
+            items: iterable of (name, value) pairs
+        """
+        self.entries = []
+        self.postings = {}
+        for name, value in items:
+            grams = trigrams(name)
+            if not grams:
+                continue
+            position = len(self.entries)
+            self.entries.append((name, grams, value))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, query, threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+        """Return [(score, name, value)] best first, scores >= threshold."""
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        shared = {}
+        for gram in query_grams:
+            for position in self.postings.get(gram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        results = []
+        for position, count in shared.items():
+            name, grams, value = self.entries[position]
+            score = count / (len(query_grams) + len(grams) - count)
+            if score >= threshold:
+                results.append((score, name, value))
+
+        results.sort(key=lambda r: (-r[0], r[1]))
+        return results[:limit]
+
+    def best(self, query, threshold=DEFAULT_THRESHOLD):
+        """Value of the best match above the threshold, or None."""
+        results = self.search(query, threshold, limit=1)
+        return results[0][2] if results else None
+
+
+def _staff_similarity(query):
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    # GREATEST ignores NULLs, so staff without a Steam name still score
+    return Greatest(
+        TrigramSimilarity('staff__name', query),
+        TrigramSimilarity('staff__steam_name', query),
+    )
+
+
+def filter_staff_by_name(queryset, query):
+    """
+    Narrow a StaffRoster queryset to substring or fuzzy name matches.
+
+    Matches staff name, Steam name or Steam ID containing ``query``, plus
+    names trigram-similar to it, and annotates ``similarity`` so callers can
+    rank results. Both the ILIKE and ``%`` filters use the GIN trigram
+    indexes.
+    """
+    return queryset.filter(
+        Q(staff__name__icontains=query) |
+        Q(staff__steam_name__icontains=query) |
+        Q(staff__steam_id__icontains=query) |
+        Q(staff__name__trigram_similar=query) |
+        Q(staff__steam_name__trigram_similar=query)
+    ).annotate(similarity=_staff_similarity(query))
+
+
+def search_staff(query, queryset=None, threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+    """
+    Roster entries whose staff name or Steam name is similar to ``query``.
+
+    Returns the queryset annotated with ``similarity`` (best of the two
+    names), filtered to the threshold and ordered best first. The
+    ``trigram_similar`` filters (the ``%`` operator) let Postgres use the
+    GIN indexes; they also apply pg_trgm.similarity_threshold (0.3 by
+    default), so lower thresholds have no effect.
+    """
+    from apps.staff.models import StaffRoster
+
+    if queryset is None:
+        queryset = StaffRoster.objects.all()
+
+    queryset = queryset.filter(
+        Q(staff__name__trigram_similar=query) |
+        Q(staff__steam_name__trigram_similar=query)
+    ).annotate(
+        similarity=_staff_similarity(query)
+    ).filter(similarity__gte=threshold).order_by('-similarity', 'staff__name')
+
+    return queryset[:limit] if limit else queryset
+
+
+def search_players(query, threshold=DEFAULT_THRESHOLD, limit=DEFAULT_LIMIT):
+    """
+    Player names in the presence history similar to ``query``.
+
+    Returns dicts with name, similarity and latest_seen (the most recent
+    last_seen for that name), best match first.
+    """
+    from django.contrib.postgres.search import TrigramSimilarity
+
+    from .models import PlayerPresence
+
+    return list(
+        PlayerPresence.objects.filter(name__trigram_similar=query)
+        .values('name')
+        .annotate(
+            similarity=TrigramSimilarity('name', query),
+            latest_seen=Max('last_seen'),
+        )
+        .filter(similarity__gte=threshold)
+        .order_by('-similarity', '-latest_seen')[:limit]
+    )
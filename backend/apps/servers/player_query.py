@@ -0,0 +1,279 @@
+"""
+In-house A2S_PLAYER client.
+
+python-a2s treats bit 15 of a split packet's message id as the compression
+flag and bz2-decompresses every fragment on its own. GMod servers regularly
+set that bit on uncompressed responses, so ``a2s.players`` fails with
+"Invalid data stream" and the whole player list for the tick was lost.
+
+This client follows the Source query protocol more closely:
+
+* compression is bit 31 of the message id, the bz2 stream spans all
+  fragments and is decompressed once after reassembly; a response flagged as
+  compressed that does not start with a bz2 header is read as plain data,
+* the challenge number is cached per server and sent with the next request,
+  which saves a round-trip on every poll once the first one is known,
+* each server keeps one long-lived UDP socket across ticks; stale datagrams
+  from an earlier timed-out request are drained before sending,
+* missing fragments, truncated bz2 streams and truncated player entries
+  yield the players decoded so far, flagged as partial, instead of an error.
+"""
+import asyncio
+import bz2
+import logging
+import socket
+import struct
+import threading
+
+from a2s import BrokenMessageError, Player
+
+logger = logging.getLogger(__name__)
+
+HEADER_SIMPLE = b'\xFF\xFF\xFF\xFF'
+HEADER_SPLIT = b'\xFE\xFF\xFF\xFF'
+
+A2S_PLAYER_REQUEST = 0x55
+A2S_PLAYER_RESPONSE = 0x44
+A2S_CHALLENGE_RESPONSE = 0x41
+
+NO_CHALLENGE = b'\xFF\xFF\xFF\xFF'
+
+# A server may answer with a fresh challenge when the cached one expired
+MAX_CHALLENGE_RETRIES = 2
+
+MAX_DATAGRAM = 65535
+
+
+class PlayerList(list):
+    """List of a2s.Player with decode metadata.
+
+    ``partial`` is True when some of the response was lost (missing
+    fragments, truncated compression or entries); ``expected`` is the player
+    count the server announced.
+    """
+
+    def __init__(self, players=(), expected=0, partial=False):
+        super().__init__(players)
+        self.expected = expected
+        self.partial = partial
+
+
+def decode_players(payload):
+    """
+    Decode an A2S_PLAYER response body (after the 0xFFFFFFFF header).
+
+    Stops at the first truncated entry and returns what was decoded, so a
+    partially received response still yields its leading players.
+    """
+    if not payload or payload[0] != A2S_PLAYER_RESPONSE:
+        raise BrokenMessageError(f"Invalid player response type: {payload[:1]!r}")
+    if len(payload) < 2:
+        return PlayerList(partial=True)
+
+    expected = payload[1]
+    players = []
+    offset = 2
+    for _ in range(expected):
+        # index (byte), name (cstring), score (int32), duration (float32)
+        name_end = payload.find(b'\x00', offset + 1)
+        if name_end == -1 or name_end + 9 > len(payload):
+            break
+        index = payload[offset]
+        name = payload[offset + 1:name_end].decode('utf-8', errors='replace')
+        score, duration = struct.unpack_from('<lf', payload, name_end + 1)
+        players.append(Player(index=index, name=name, score=score, duration=duration))
+        offset = name_end + 9
+
+    return PlayerList(players, expected=expected, partial=len(players) < expected)
+
+
+def _decompress_tolerant(data, chunk_size=4096):
+    """
+    bz2-decompress as much of ``data`` as possible.
+
+    The stream is fed in chunks so output produced before a corrupt or
+    missing tail is kept. Returns (bytes, complete).
+    """
+    decompressor = bz2.BZ2Decompressor()
+    output = []
+    try:
+        for start in range(0, len(data), chunk_size):
+            output.append(decompressor.decompress(data[start:start + chunk_size]))
+            if decompressor.eof:
+                break
+    except (OSError, EOFError, ValueError) as e:
+        logger.debug(f"bz2 stream broken after {sum(map(len, output))} bytes: {e}")
+        return b''.join(output), False
+    return b''.join(output), decompressor.eof
+
+
+def reassemble_split(fragments, total, message_id):
+    """
+    Join split-packet fragments into one response body.
+
+    Args:
+        fragments: dict of fragment number -> fragment payload
+        total: number of fragments the server announced
+        message_id: id from the split header (bit 31 marks bz2 compression)
+
+    Returns (payload, complete). With fragments missing, only the contiguous
+    run from fragment 0 is used.
+    """
+    chunks = []
+    for number in range(total):
+        if number not in fragments:
+            break
+        chunks.append(fragments[number])
+    complete = len(chunks) == total
+    data = b''.join(chunks)
+
+    if message_id & 0x80000000 and len(data) >= 8:
+        # First fragment carries the decompressed size and CRC32
+        body = data[8:]
+        if body.startswith(b'BZh'):
+            data, decompressed = _decompress_tolerant(body)
+            complete = complete and decompressed
+        else:
+            # Flagged as compressed but plain data; keep the body as-is
+            data = body
+
+    if data.startswith(HEADER_SIMPLE):
+        data = data[4:]
+    return data, complete
+
+
+class PlayerQueryClient:
+    """A2S_PLAYER client for one server with a persistent UDP socket."""
+
+    def __init__(self, address):
+        self.address = address
+        self.challenge = NO_CHALLENGE
+        self.sock = None
+        self.lock = threading.Lock()
+
+    def _socket(self):
+        if self.sock is None:
+            family = socket.AF_INET6 if ':' in self.address[0] else socket.AF_INET
+            sock = socket.socket(family, socket.SOCK_DGRAM)
+            sock.setblocking(False)
+            sock.connect(self.address)
+            self.sock = sock
+        return self.sock
+
+    def _drain(self, sock):
+        """Discard late datagrams left over from an earlier timed-out request."""
+        while True:
+            try:
+                sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # e.g. ICMP port unreachable reported on a connected socket
+                return
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    async def query(self, timeout):
+        """Request the player list; returns a PlayerList."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        sock = self._socket()
+        self._drain(sock)
+
+        try:
+            for _ in range(MAX_CHALLENGE_RETRIES + 1):
+                await loop.sock_sendall(sock, HEADER_SIMPLE + bytes([A2S_PLAYER_REQUEST]) + self.challenge)
+                payload, complete = await self._receive(loop, sock, deadline)
+                if not payload:
+                    # e.g. a compressed response whose bz2 stream broke in its first block
+                    raise BrokenMessageError("Player response could not be decoded")
+
+                if payload[:1] == bytes([A2S_CHALLENGE_RESPONSE]):
+                    if len(payload) < 5:
+                        raise BrokenMessageError("Truncated challenge response")
+                    self.challenge = payload[1:5]
+                    continue
+
+                players = decode_players(payload)
+                if not complete:
+                    players.partial = True
+                return players
+        except asyncio.TimeoutError:
+            # TimeoutError is an OSError, but the socket itself is fine
+            raise
+        except OSError:
+            # Socket may be unusable (e.g. network change); open a new one next time
+            self.close()
+            raise
+
+        raise BrokenMessageError("Server keeps sending challenge responses")
+
+    async def _receive(self, loop, sock, deadline):
+        """Receive one response, reassembling split packets; returns (payload, complete)."""
+        fragments = {}
+        total = 0
+        message_id = None
+
+        while True:
+            remaining = deadline - loop.time()
+            try:
+                if remaining <= 0:
+                    raise asyncio.TimeoutError()
+                packet = await asyncio.wait_for(loop.sock_recv(sock, MAX_DATAGRAM), remaining)
+            except asyncio.TimeoutError:
+                if fragments and 0 in fragments:
+                    logger.debug(
+                        f"{self.address}: timed out with {len(fragments)}/{total} fragments"
+                    )
+                    return reassemble_split(fragments, total, message_id)[0], False
+                raise
+
+            header = packet[:4]
+            if header == HEADER_SIMPLE:
+                return packet[4:], True
+
+            if header == HEADER_SPLIT and len(packet) >= 12:
+                packet_id, packet_total, number, _size = struct.unpack_from('<LBBH', packet, 4)
+                if message_id is None or packet_id != message_id:
+                    # First fragment of a (newer) response
+                    fragments = {}
+                    message_id = packet_id
+                    total = packet_total
+                fragments[number] = packet[12:]
+                if len(fragments) >= total:
+                    return reassemble_split(fragments, total, message_id)
+                continue
+
+            logger.debug(f"{self.address}: ignoring packet with unknown header {header!r}")
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+async def query_players(address, timeout):
+    """
+    Query a server's player list through its shared long-lived client.
+
+    If another thread is already using that server's client (a manual refresh
+    overlapping the poller in the same process), a throwaway client is used.
+    """
+    with _clients_lock:
+        client = _clients.get(address)
+        if client is None:
+            client = _clients[address] = PlayerQueryClient(address)
+
+    if not client.lock.acquire(blocking=False):
+        temporary = PlayerQueryClient(address)
+        try:
+            return await temporary.query(timeout)
+        finally:
+            temporary.close()
+
+    try:
+        return await client.query(timeout)
+    finally:
+        client.lock.release()
@@ -0,0 +1,100 @@
+"""
+Append-only player presence history.
+
+Every poll extends the open stint (PlayerPresence row) of each player still
+on a server, opens a stint for each player who joined and closes the stints
+of players who left. Closed stints are never rewritten, so the table keeps
+months of "who was where, and when" for PlayerLookupView at the cost of one
+row per visit rather than one per poll.
+"""
+import logging
+
+from django.db import transaction
+
+from .models import PlayerPresence
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on stints returned by a lookup
+LOOKUP_HISTORY_LIMIT = 10
+
+
+def record_presence(server, players, now, kept=()):
+    """
+    Reconcile the open stints of a server with the players seen this poll.
+
+    Args:
+        server: GameServer that was polled
+        players: ServerPlayer rows for the players on the server now
+        now: Poll timestamp
+        kept: ServerPlayer rows missing from an incomplete player list but
+            still retained; their stints are left open instead of being closed
+    """
+    from .services import normalize_name
+
+    open_by_name = {}
+    for stint in PlayerPresence.objects.filter(server=server, is_current=True).order_by('id'):
+        open_by_name.setdefault(stint.name, []).append(stint)
+
+    continuing_ids = []
+    to_create = []
+    for player in players:
+        stints = open_by_name.get(player.name)
+        if stints:
+            continuing_ids.append(stints.pop(0).id)
+        else:
+            to_create.append(PlayerPresence(
+                server=server,
+                name=player.name,
+                normalized_name=normalize_name(player.name)[:100],
+                steam_id=player.steam_id,
+                is_staff=player.is_staff,
+                first_seen=now,
+                last_seen=now,
+            ))
+
+    for player in kept:
+        stints = open_by_name.get(player.name)
+        if stints:
+            stints.pop(0)
+
+    ended_ids = [stint.id for stints in open_by_name.values() for stint in stints]
+
+    with transaction.atomic():
+        if continuing_ids:
+            PlayerPresence.objects.filter(id__in=continuing_ids).update(last_seen=now)
+        if ended_ids:
+            PlayerPresence.objects.filter(id__in=ended_ids).update(is_current=False)
+        if to_create:
+            PlayerPresence.objects.bulk_create(to_create)
+
+    logger.debug(
+        f"Presence for {server.name}: {len(continuing_ids)} continuing, "
+        f"{len(to_create)} joined, {len(ended_ids)} left"
+    )
+
+
+def lookup_presence(names=(), steam_ids=(), limit=LOOKUP_HISTORY_LIMIT):
+    """
+    Most recent stints matching any of the names (by normalized name) or
+    Steam IDs, newest first. Served by the normalized_name/steam_id indexes.
+    """
+    from django.db.models import Q
+
+    from .services import normalize_name
+
+    normalized = {normalize_name(name) for name in names if name}
+    normalized.discard('')
+    query = Q()
+    if normalized:
+        query |= Q(normalized_name__in=normalized)
+    if steam_ids:
+        query |= Q(steam_id__in=list(steam_ids))
+    if not query:
+        return []
+
+    return list(
+        PlayerPresence.objects.filter(query)
+        .select_related('server')
+        .order_by('-last_seen')[:limit]
+    )
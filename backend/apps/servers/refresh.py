@@ -0,0 +1,138 @@
+"""
+Single-flight coordination for manual server refreshes.
+
+RefreshServersView and the WebSocket ``refresh`` action both trigger a full
+UDP sweep of every server. When several staff click refresh at once, only the
+first request (the leader, holding a short cache lock) runs the sweep; the
+others wait for it and return the same result. A finished sweep is kept for a
+few seconds, so requests arriving right after it are answered from the cache
+without querying the servers again.
+"""
+import asyncio
+import logging
+import time
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+REFRESH_LOCK_KEY = 'servers:refresh_lock'
+REFRESH_RESULT_KEY = 'servers:refresh_result'
+
+# Longer than a sweep can take (query deadline plus DB writes), so a crashed
+# leader cannot block refreshes for long
+LOCK_TIMEOUT = 30
+
+# How long a finished sweep answers new refresh requests
+RESULT_TTL = 10
+
+# How long followers wait for the leader before falling back to the snapshot
+WAIT_TIMEOUT = 20
+POLL_INTERVAL = 0.2
+
+
+class RefreshCoordinator:
+    """Runs at most one manual refresh sweep at a time across all processes."""
+
+    def __init__(self, service=None):
+        if service is None:
+            from .services import ServerQueryService
+            service = ServerQueryService()
+        self.service = service
+
+    def begin(self):
+        """
+        Decide how to serve a refresh request.
+
+        Returns one of:
+            ('cached', servers): a sweep just finished, use its result
+            ('leader', token): this request holds the lock and runs the sweep
+            ('follower', token): another request is sweeping; wait for it
+        """
+        cached = cache.get(REFRESH_RESULT_KEY)
+        if cached is not None:
+            return 'cached', cached['servers']
+
+        token = uuid.uuid4().hex
+        if cache.add(REFRESH_LOCK_KEY, token, timeout=LOCK_TIMEOUT):
+            return 'leader', token
+        return 'follower', cache.get(REFRESH_LOCK_KEY)
+
+    def lead(self, token):
+        """Run the sweep, publish its result for followers and release the lock."""
+        try:
+            servers = self.service.query_all_servers()
+            cache.set(REFRESH_RESULT_KEY, {'token': token, 'servers': servers}, timeout=RESULT_TTL)
+            return servers
+        finally:
+            # Only release our own lock (it may have expired and been re-taken)
+            if cache.get(REFRESH_LOCK_KEY) == token:
+                cache.delete(REFRESH_LOCK_KEY)
+
+    def poll(self, token):
+        """
+        Check once whether the sweep a follower is waiting on has finished.
+
+        Returns the server list, or None while the sweep is still running.
+        """
+        cached = cache.get(REFRESH_RESULT_KEY)
+        if cached is not None:
+            return cached['servers']
+        if token is None or cache.get(REFRESH_LOCK_KEY) != token:
+            # Leader finished without publishing a result (it failed)
+            return self.fallback()
+        return None
+
+    def fallback(self):
+        """Latest published snapshot, used when no sweep result is available."""
+        from .snapshot import get_status_snapshot
+
+        return get_status_snapshot()['servers']
+
+    def refresh(self):
+        """Blocking refresh for views: lead, join or reuse a sweep."""
+        state, value = self.begin()
+        if state == 'cached':
+            return value
+        if state == 'leader':
+            return self.lead(value)
+
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            servers = self.poll(value)
+            if servers is not None:
+                return servers
+            time.sleep(POLL_INTERVAL)
+
+        logger.warning("Timed out waiting for in-progress server refresh, serving snapshot")
+        return self.fallback()
+
+    async def refresh_async(self):
+        """
+        Non-blocking refresh for consumers.
+
+        begin() and poll() only touch the cache and run in worker threads
+        (thread_sensitive=False), and waiting happens on the event loop, so
+        followers do not queue behind other consumers' database calls on the
+        shared sync thread. The leader's sweep also runs off that thread, so
+        it does not hold up other consumers' database work for its duration.
+        """
+        from asgiref.sync import sync_to_async
+        from channels.db import database_sync_to_async
+
+        state, value = await sync_to_async(self.begin, thread_sensitive=False)()
+        if state == 'cached':
+            return value
+        if state == 'leader':
+            return await database_sync_to_async(self.lead, thread_sensitive=False)(value)
+
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while time.monotonic() < deadline:
+            servers = await sync_to_async(self.poll, thread_sensitive=False)(value)
+            if servers is not None:
+                return servers
+            await asyncio.sleep(POLL_INTERVAL)
+
+        logger.warning("Timed out waiting for in-progress server refresh, serving snapshot")
+        return await database_sync_to_async(self.fallback)()
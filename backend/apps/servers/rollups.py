@@ -0,0 +1,190 @@
+"""
+Time-series rollups and retention for ServerStatusLog.
+
+The poller writes one raw ServerStatusLog row per server per tick. This module
+folds those rows into per-minute buckets, minute buckets into hours and hours
+into days (ServerStatusRollup), then prunes data that has been rolled up and
+is older than the configured retention. Each level is recomputed from its
+watermark (just behind the newest bucket already written), so runs are
+idempotent and partially filled buckets are simply rewritten on the next run.
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import Count, Max, Min, Q, Sum
+from django.db.models.functions import TruncDay, TruncHour, TruncMinute
+from django.utils import timezone
+
+from .models import ServerStatusLog, ServerStatusRollup
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_FIELDS = [
+    'sample_count', 'online_count',
+    'min_players', 'max_players', 'player_total',
+    'min_staff', 'max_staff', 'staff_total',
+]
+
+# Width of one bucket; each run also recomputes the bucket before the
+# watermark so rows committed late by a concurrent poll are not missed
+BUCKET_WIDTH = {
+    'minute': timedelta(minutes=1),
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+# SystemSetting key -> default retention in days (0 keeps data forever)
+RETENTION_SETTINGS = {
+    'raw': ('server_status_raw_retention_days', 2),
+    'minute': ('server_status_minute_retention_days', 3),
+    'hour': ('server_status_hour_retention_days', 90),
+    'day': ('server_status_day_retention_days', 0),
+}
+
+
+def get_retention_days(level):
+    """Retention for a level ('raw', 'minute', 'hour' or 'day') from SystemSetting."""
+    from apps.system_settings.models import SystemSetting
+
+    key, default = RETENTION_SETTINGS[level]
+    try:
+        return int(SystemSetting.get_setting_value(key, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_watermark(resolution):
+    """
+    Point from which a resolution's buckets are recomputed: the start of the
+    bucket before the newest one written, or None if nothing is rolled yet.
+    """
+    latest = ServerStatusRollup.objects.filter(
+        resolution=resolution
+    ).aggregate(latest=Max('bucket_start'))['latest']
+    if latest is None:
+        return None
+    return latest - BUCKET_WIDTH[resolution]
+
+
+class StatusRollupService:
+    """Builds ServerStatusRollup buckets and applies the retention policy."""
+
+    def run(self):
+        """Roll up every level, then prune. Returns a summary dict."""
+        result = {
+            'minute': self.rollup_raw(),
+            'hour': self.rollup_buckets('minute', 'hour', TruncHour),
+            'day': self.rollup_buckets('hour', 'day', TruncDay),
+        }
+        result['pruned'] = self.prune()
+        return result
+
+    def rollup_raw(self):
+        """Fold raw ServerStatusLog rows into minute buckets."""
+        logs = ServerStatusLog.objects.all()
+        since = get_watermark('minute')
+        if since:
+            logs = logs.filter(timestamp__gte=since)
+
+        online = Q(is_online=True)
+        rows = logs.annotate(
+            bucket=TruncMinute('timestamp')
+        ).values('server_id', 'bucket').annotate(
+            sample_count=Count('id'),
+            online_count=Count('id', filter=online),
+            min_players=Min('player_count', filter=online),
+            max_players=Max('player_count', filter=online),
+            player_total=Sum('player_count', filter=online),
+            min_staff=Min('staff_count', filter=online),
+            max_staff=Max('staff_count', filter=online),
+            staff_total=Sum('staff_count', filter=online),
+        ).order_by()
+
+        return self._upsert('minute', rows)
+
+    def rollup_buckets(self, source, target, trunc):
+        """Fold buckets of one resolution into the next coarser one."""
+        buckets = ServerStatusRollup.objects.filter(resolution=source)
+        since = get_watermark(target)
+        if since:
+            buckets = buckets.filter(bucket_start__gte=since)
+
+        rows = buckets.annotate(
+            bucket=trunc('bucket_start')
+        ).values('server_id', 'bucket').annotate(
+            sample_count=Sum('sample_count'),
+            online_count=Sum('online_count'),
+            min_players=Min('min_players'),
+            max_players=Max('max_players'),
+            player_total=Sum('player_total'),
+            min_staff=Min('min_staff'),
+            max_staff=Max('max_staff'),
+            staff_total=Sum('staff_total'),
+        ).order_by()
+
+        return self._upsert(target, rows)
+
+    def _upsert(self, resolution, rows):
+        rollups = [
+            ServerStatusRollup(
+                server_id=row['server_id'],
+                resolution=resolution,
+                bucket_start=row['bucket'],
+                sample_count=row['sample_count'] or 0,
+                online_count=row['online_count'] or 0,
+                min_players=row['min_players'],
+                max_players=row['max_players'],
+                player_total=row['player_total'] or 0,
+                min_staff=row['min_staff'],
+                max_staff=row['max_staff'],
+                staff_total=row['staff_total'] or 0,
+            )
+            for row in rows
+        ]
+        if rollups:
+            ServerStatusRollup.objects.bulk_create(
+                rollups,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['server', 'resolution', 'bucket_start'],
+                update_fields=ROLLUP_FIELDS,
+            )
+        return len(rollups)
+
+    def prune(self):
+        """
+        Delete data past its retention. Rows are only removed once the next
+        level up has rolled them, so a stalled rollup never loses data.
+        """
+        now = timezone.now()
+        pruned = {}
+
+        levels = [
+            ('raw', 'minute'),
+            ('minute', 'hour'),
+            ('hour', 'day'),
+            ('day', None),
+        ]
+        for level, parent in levels:
+            days = get_retention_days(level)
+            if days <= 0:
+                pruned[level] = 0
+                continue
+
+            cutoff = now - timedelta(days=days)
+            if parent:
+                watermark = get_watermark(parent)
+                if watermark is None:
+                    pruned[level] = 0
+                    continue
+                cutoff = min(cutoff, watermark)
+
+            if level == 'raw':
+                queryset = ServerStatusLog.objects.filter(timestamp__lt=cutoff)
+            else:
+                queryset = ServerStatusRollup.objects.filter(
+                    resolution=level, bucket_start__lt=cutoff
+                )
+            pruned[level], _ = queryset.delete()
+
+        return pruned
@@ -0,0 +1,115 @@
+"""
+Adaptive per-server polling schedule.
+
+Instead of querying every server on a fixed 60 s beat, each GameServer keeps
+its own ``next_poll_at``. After every query the next poll is scheduled:
+
+* sooner (active interval) while staff are online or the player count moved
+  since the previous poll,
+* at the base interval for a quiet, healthy server,
+* with exponential backoff and jitter after consecutive failures, capped at
+  the configured maximum, so an unreachable server stops costing a UDP
+  timeout and a log row every minute.
+
+A short beat tick (``poll_due_servers``) queries only servers that are due.
+Manual refreshes bypass the schedule and query everything immediately; the
+result reschedules each server as usual.
+
+All intervals come from SystemSetting so they can be tuned without a deploy.
+"""
+import logging
+import random
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import GameServer
+
+logger = logging.getLogger(__name__)
+
+# SystemSetting key -> default (seconds, except jitter which is a percentage)
+POLL_SETTINGS = {
+    'base_interval': ('server_poll_interval_seconds', 60),
+    'active_interval': ('server_poll_active_interval_seconds', 30),
+    'backoff_max': ('server_poll_backoff_max_seconds', 900),
+    'jitter_percent': ('server_poll_jitter_percent', 10),
+}
+
+# Servers due within this window are polled on the current tick rather than
+# waiting a whole extra tick
+DUE_SLACK = timedelta(seconds=5)
+
+
+def get_poll_policy():
+    """Current polling intervals from SystemSetting, falling back to defaults."""
+    from apps.system_settings.models import SystemSetting
+
+    policy = {}
+    for name, (key, default) in POLL_SETTINGS.items():
+        try:
+            policy[name] = max(0, int(SystemSetting.get_setting_value(key, default)))
+        except (TypeError, ValueError):
+            policy[name] = default
+    # An active interval above the base interval would slow busy servers down
+    policy['active_interval'] = min(policy['active_interval'], policy['base_interval'])
+    return policy
+
+
+def _with_jitter(seconds, jitter_percent):
+    """Spread polls out so servers that failed together do not retry in lockstep."""
+    if not jitter_percent:
+        return seconds
+    spread = seconds * jitter_percent / 100.0
+    return max(1.0, seconds + random.uniform(-spread, spread))
+
+
+def next_poll_interval(policy, online, failures=0, staff_online=0, player_delta=0):
+    """
+    Seconds until a server should be polled again.
+
+    Args:
+        policy: Result of get_poll_policy()
+        online: Whether the last query succeeded
+        failures: Consecutive failed queries, including the last one
+        staff_online: Staff currently on the server
+        player_delta: Change in player count since the previous poll
+    """
+    if not online:
+        # base, 2x base, 4x base, ... capped at backoff_max
+        exponent = max(0, failures - 1)
+        interval = min(policy['base_interval'] * (2 ** min(exponent, 16)), policy['backoff_max'])
+        interval = max(interval, policy['base_interval'])
+    elif staff_online or player_delta:
+        interval = policy['active_interval']
+    else:
+        interval = policy['base_interval']
+    return _with_jitter(interval, policy['jitter_percent'])
+
+
+def schedule_after_success(server, staff_online, player_delta, policy=None, now=None):
+    """Reset the failure count and schedule the next poll of a healthy server."""
+    policy = policy or get_poll_policy()
+    now = now or timezone.now()
+    interval = next_poll_interval(policy, True, staff_online=staff_online, player_delta=player_delta)
+    server.consecutive_failures = 0
+    server.next_poll_at = now + timedelta(seconds=interval)
+    return interval
+
+
+def schedule_after_failure(server, policy=None, now=None):
+    """Count the failure and back off the next poll of an unreachable server."""
+    policy = policy or get_poll_policy()
+    now = now or timezone.now()
+    server.consecutive_failures = (server.consecutive_failures or 0) + 1
+    interval = next_poll_interval(policy, False, failures=server.consecutive_failures)
+    server.next_poll_at = now + timedelta(seconds=interval)
+    return interval
+
+
+def get_due_servers(now=None):
+    """Active servers whose next poll is due (never-polled servers included)."""
+    now = now or timezone.now()
+    return list(
+        GameServer.objects.filter(is_active=True).exclude(next_poll_at__gt=now + DUE_SLACK)
+    )
+
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import GameServer, ServerPlayer, ServerStatusLog
+from .models import (GameServer, ServerPlayer, ServerStatusLog,
+                     ServerStatusRollup)
 
 
 class ServerPlayerSerializer(serializers.ModelSerializer):
@@ -47,8 +48,7 @@ class ServerStatusSerializer(serializers.Serializer):
 class StaffDistributionSerializer(serializers.Serializer):
     """Serializer for staff distribution data."""
     
-    server_1 = serializers.ListField()
-    server_2 = serializers.ListField()
+    servers = serializers.ListField()
     offline = serializers.ListField()
 
 
@@ -58,3 +58,29 @@ class ServerStatusLogSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServerStatusLog
         fields = '__all__'
+
+
+class ServerStatusRollupSerializer(serializers.ModelSerializer):
+    """Serializer for status rollup buckets."""
+    
+    avg_players = serializers.SerializerMethodField()
+    avg_staff = serializers.SerializerMethodField()
+    uptime_ratio = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ServerStatusRollup
+        fields = [
+            'id', 'server', 'resolution', 'bucket_start',
+            'sample_count', 'online_count', 'uptime_ratio',
+            'min_players', 'max_players', 'avg_players',
+            'min_staff', 'max_staff', 'avg_staff',
+        ]
+    
+    def get_avg_players(self, obj):
+        return round(obj.avg_players, 2)
+    
+    def get_avg_staff(self, obj):
+        return round(obj.avg_staff, 2)
+    
+    def get_uptime_ratio(self, obj):
+        return round(obj.uptime_ratio, 4)
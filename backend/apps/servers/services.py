@@ -1,18 +1,31 @@
 import logging
 import re
+from datetime import timedelta
 
-import a2s
 from a2s import BrokenMessageError
 from apps.staff.models import ServerSession, StaffRoster
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
+from . import query_engine, scheduler
 from .models import GameServer, ServerPlayer, ServerStatusLog
+from .presence_history import record_presence
+from .snapshot import (build_status_message, get_status_snapshot,
+                       publish_status_snapshot)
 
 logger = logging.getLogger(__name__)
 
+# ServerPlayer columns refreshed for players who stay on a server between polls
+PLAYER_UPDATE_FIELDS = ['score', 'duration', 'is_staff', 'staff_rank', 'steam_id', 'last_seen']
+
+# How long players missing from an incomplete player list keep their row and
+# open session: a truncated list, and a player query that failed outright
+PARTIAL_LIST_GRACE = timedelta(minutes=5)
+FAILED_LIST_GRACE = timedelta(minutes=2)
+
 
 def normalize_name(name):
     """
@@ -66,74 +79,258 @@ def find_matching_staff(player_name, staff_roster_dict):
     return None
 
 
+class StaffMatcher:
+    """
+    Prebuilt index for matching server player names to staff.
+
+    Holds an exact-lowercase dictionary (roster names first, then Steam names)
+    and a normalized-name dictionary built from the same keys, so matching a
+    player is two dict lookups instead of a regex pass over the whole roster.
+
+    With a fuzzy threshold set, names that match neither dictionary fall back
+    to trigram similarity against the same keys (catches renamed staff such
+    as "xX_Cloudy_Xx"); results are memoized per name for the matcher's life.
+    """
+
+    def __init__(self, roster_entries, fuzzy_threshold=0):
+        self.exact = {}
+        for entry in roster_entries:
+            # Key by roster name (lowercase)
+            self.exact[entry.name.lower()] = entry
+
+        for entry in roster_entries:
+            # Also key by Steam name if available (roster name takes priority)
+            if entry.staff and entry.staff.steam_name:
+                self.exact.setdefault(entry.staff.steam_name.lower(), entry)
+
+        self.normalized = {}
+        for key, entry in self.exact.items():
+            # First key wins, mirroring the scan order of find_matching_staff
+            self.normalized.setdefault(normalize_name(key), entry)
+
+        self.entries = list(roster_entries)
+
+        self.fuzzy_threshold = fuzzy_threshold
+        self._trigram_index = None
+        self._fuzzy_matches = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def match(self, player_name):
+        """Return the StaffRoster entry matching a player name, or None."""
+        entry = self.exact.get(player_name.lower().strip())
+        if entry is not None:
+            return entry
+        entry = self.normalized.get(normalize_name(player_name))
+        if entry is not None or not self.fuzzy_threshold:
+            return entry
+        return self.match_fuzzy(player_name, self.fuzzy_threshold)
+
+    def match_fuzzy(self, player_name, threshold):
+        """Best trigram match for a player name at or above threshold, or None."""
+        from .name_search import TrigramIndex
+
+        key = (player_name.lower().strip(), threshold)
+        if key not in self._fuzzy_matches:
+            if self._trigram_index is None:
+                self._trigram_index = TrigramIndex(self.exact.items())
+            self._fuzzy_matches[key] = self._trigram_index.best(player_name, threshold)
+        return self._fuzzy_matches[key]
+
+    @staticmethod
+    def fuzzy_threshold_setting():
+        """Similarity (0-1) for fuzzy staff matching in the poller; 0 disables it."""
+        try:
+            from apps.system_settings.models import SystemSetting
+            percent = int(SystemSetting.get_setting_value('staff_fuzzy_match_threshold', 0))
+        except Exception:
+            return 0
+        return max(0, min(percent, 100)) / 100.0
+
+    @staticmethod
+    def roster_queryset():
+        """Active roster entries eligible for matching (builders excluded if configured)."""
+        from django.db.models import Q
+
+        staff_queryset = StaffRoster.objects.filter(is_active=True).select_related('staff')
+
+        # Exclude builders if system setting is enabled
+        try:
+            from apps.system_settings.models import SystemSetting
+            if SystemSetting.exclude_builders():
+                staff_queryset = staff_queryset.exclude(Q(rank__icontains='builder'))
+        except Exception:
+            # Setting doesn't exist yet or database error - skip filtering
+            pass
+
+        return staff_queryset
+
+    @staticmethod
+    def fingerprint():
+        """
+        Cheap signature of everything the index depends on.
+
+        Roster saves bump StaffRoster.last_synced and Steam name syncs bump
+        Staff.steam_name_last_updated, so a change in either (or in the builder
+        setting) yields a new fingerprint and forces a rebuild.
+        """
+        from django.db.models import Count, Max
+
+        stats = StaffRoster.objects.aggregate(
+            count=Count('id'),
+            synced=Max('last_synced'),
+            steam=Max('staff__steam_name_last_updated'),
+        )
+        try:
+            from apps.system_settings.models import SystemSetting
+            exclude_builders = SystemSetting.exclude_builders()
+        except Exception:
+            exclude_builders = None
+        return (
+            stats['count'], stats['synced'], stats['steam'], exclude_builders,
+            StaffMatcher.fuzzy_threshold_setting(),
+        )
+
+
+_staff_matcher_cache = {'fingerprint': None, 'matcher': None}
+
+
+def get_staff_matcher():
+    """
+    Return the process-wide StaffMatcher, rebuilding it only when the roster
+    or Steam names have changed since it was last built.
+    """
+    fingerprint = StaffMatcher.fingerprint()
+    if _staff_matcher_cache['matcher'] is None or _staff_matcher_cache['fingerprint'] != fingerprint:
+        matcher = StaffMatcher(
+            list(StaffMatcher.roster_queryset()),
+            fuzzy_threshold=fingerprint[-1],
+        )
+        _staff_matcher_cache['matcher'] = matcher
+        _staff_matcher_cache['fingerprint'] = fingerprint
+        logger.debug(f"Rebuilt staff matcher index ({len(matcher)} staff, {len(matcher.exact)} names)")
+    return _staff_matcher_cache['matcher']
+
+
 class ServerQueryService:
     """Service for querying game server status."""
     
     def query_server(self, server):
         """Query a single server for its status and players."""
-        try:
-            address = (server.ip_address, server.port)
-            
-            # Query server info
-            info = a2s.info(address, timeout=5)
-            
-            # Try to query players
-            players = []
-            query_method = "none"
-            
+        return self.query_servers([server])[0]
+
+    def query_servers(self, servers):
+        """
+        Query several servers concurrently and persist the results.
+
+        The UDP round-trips all happen at once (see query_engine); the database
+        writes are then applied one server at a time on this thread.
+        """
+        statuses = []
+        errors = {}
+        # Read the polling policy once per sweep rather than once per server
+        policy = scheduler.get_poll_policy()
+        for result in query_engine.query_servers(servers):
             try:
-                players = a2s.players(address, timeout=5)
-                query_method = "a2s"
-                logger.debug(f"Successfully queried {len(players)} players using python-a2s")
-            except (OSError, BrokenMessageError) as e:
-                # Handle bz2 decompression errors or other query failures
-                # This is a known issue with some GMod servers sending corrupted compressed data
-                logger.warning(f"Failed to query players for {server.name}: {type(e).__name__}: {e}")
-                logger.info(f"Server will still be marked as online based on info query, but detailed player list unavailable")
-            
-            # Update server record
-            server.server_name = info.server_name
-            server.map_name = info.map_name
-            server.max_players = info.max_players
-            server.current_players = info.player_count
-            server.is_online = True
-            server.last_query = timezone.now()
-            server.last_successful_query = timezone.now()
-            server.save()
-            
-            # Update players (may be empty list if player query failed)
-            self._update_server_players(server, players)
-            
-            # Log status
-            staff_count = ServerPlayer.objects.filter(
-                server=server, is_staff=True
-            ).count()
-            
-            ServerStatusLog.objects.create(
-                server=server,
-                player_count=info.player_count,
-                staff_count=staff_count,
-                is_online=True
-            )
-            
-            return {
-                'server_name': info.server_name,
-                'map': info.map_name,
-                'players': info.player_count,
-                'max_players': info.max_players,
-                'online': True,
-            }
-            
-        except BrokenMessageError as e:
-            # Invalid or partial UDP payload; typically means the server is unreachable, firewalled, or answering with a non-Source packet.
-            logger.warning(f"Invalid A2S response from {server.name} ({server.ip_address}:{server.port}): {e}")
-            return self._handle_server_error(server, f"Invalid data stream (A2S parse failed)")
+                status = self._apply_query_result(result, policy)
+            except Exception as e:
+                logger.error(f"Error querying server {result.server.name}: {e}")
+                status = self._handle_server_error(result.server, str(e), policy)
+            statuses.append(status)
+            errors[result.server.id] = status.get('error')
+        
+        # Publish one snapshot for the REST, WebSocket and broadcast readers
+        try:
+            publish_status_snapshot(errors)
         except Exception as e:
+            logger.warning(f"Could not publish server status snapshot: {e}")
+        
+        return statuses
+
+    def _apply_query_result(self, result, policy=None):
+        """Persist the outcome of a single server query and schedule the next one."""
+        server = result.server
+
+        if not result.online:
+            e = result.info_error
+            if isinstance(e, BrokenMessageError):
+                # Invalid or partial UDP payload; typically means the server is unreachable, firewalled, or answering with a non-Source packet.
+                logger.warning(f"Invalid A2S response from {server.name} ({server.ip_address}:{server.port}): {e}")
+                return self._handle_server_error(server, f"Invalid data stream (A2S parse failed)", policy)
             logger.error(f"Error querying server {server.name}: {e}")
-            return self._handle_server_error(server, str(e))
-    def _handle_server_error(self, server, error_msg):
+            return self._handle_server_error(server, str(e) or type(e).__name__, policy)
+
+        info = result.info
+        players = result.players
+
+        if result.players_error is None:
+            if result.players_partial:
+                logger.warning(
+                    f"Partial player list for {server.name}: decoded {len(players)} "
+                    f"of {getattr(players, 'expected', '?')} players"
+                )
+            else:
+                logger.debug(f"Successfully queried {len(players)} players")
+        elif isinstance(result.players_error, (OSError, BrokenMessageError)):
+            # Timeout or a response the decoder could not use at all
+            e = result.players_error
+            logger.warning(f"Failed to query players for {server.name}: {type(e).__name__}: {e}")
+            logger.info(f"Server will still be marked as online based on info query; keeping last known player list for up to {FAILED_LIST_GRACE}")
+        else:
+            raise result.players_error
+
+        # Player count from the previous poll, used to detect a busy server
+        player_delta = info.player_count - server.current_players if server.is_online else 0
+
+        # Update server record
+        server.server_name = info.server_name
+        server.map_name = info.map_name
+        server.max_players = info.max_players
+        server.current_players = info.player_count
+        server.is_online = True
+        server.last_query = timezone.now()
+        server.last_successful_query = timezone.now()
+
+        # Update players; with a partial (or failed) list, players not seen
+        # this tick are kept for a grace period rather than treated as having left
+        if result.players_error is not None:
+            grace = FAILED_LIST_GRACE
+        elif result.players_partial:
+            grace = PARTIAL_LIST_GRACE
+        else:
+            grace = None
+        self._update_server_players(server, players, grace=grace)
+
+        # Log status
+        staff_count = ServerPlayer.objects.filter(
+            server=server, is_staff=True
+        ).count()
+
+        # Poll sooner while staff are on or players are moving
+        scheduler.schedule_after_success(server, staff_count, player_delta, policy)
+        server.save()
+
+        ServerStatusLog.objects.create(
+            server=server,
+            player_count=info.player_count,
+            staff_count=staff_count,
+            is_online=True
+        )
+
+        return {
+            'server_name': info.server_name,
+            'map': info.map_name,
+            'players': info.player_count,
+            'max_players': info.max_players,
+            'online': True,
+        }
+
+    def _handle_server_error(self, server, error_msg, policy=None):
         server.is_online = False
         server.last_query = timezone.now()
+        # Back off (with jitter) instead of timing out on every tick
+        scheduler.schedule_after_failure(server, policy)
         server.save()
 
         ServerStatusLog.objects.create(
@@ -149,301 +346,256 @@ class ServerQueryService:
             'error': error_msg,
         }
     
-    def _update_server_players(self, server, players):
-        """Update player list for a server and track staff sessions."""
-        # Get current staff on this server before clearing
+    def _update_server_players(self, server, players, grace=None):
+        """
+        Reconcile the stored player list for a server and track staff sessions.
+
+        Rows are keyed on player identity (name, plus occurrence order for
+        duplicate names) so players who stay keep their row id: joins are
+        bulk-inserted, stayers bulk-updated and leavers bulk-deleted, all in
+        one transaction.
+
+        When ``grace`` is set the list is known to be incomplete, so rows and
+        staff sessions for players missing from it are left alone until the
+        row was last seen more than ``grace`` ago; then they are treated as
+        having left.
+        """
+        existing_players = list(ServerPlayer.objects.filter(server=server))
+        
+        # Get current staff on this server before reconciling
         current_staff = {
             p.steam_id: p 
-            for p in ServerPlayer.objects.filter(server=server, is_staff=True)
-            if p.steam_id
+            for p in existing_players
+            if p.is_staff and p.steam_id
         }
         
-        # Clear old players
-        ServerPlayer.objects.filter(server=server).delete()
+        # Cached name index over roster names and Steam names (builders excluded if configured)
+        staff_matcher = get_staff_matcher()
         
-        # Get staff list for matching (excluding builders if setting enabled)
-        # Build multiple lookup dictionaries for different name sources:
-        # 1. Roster name (from Google Sheets)
-        # 2. Steam name (from Steam API, synced periodically)
-        from django.db.models import Q
+        # Existing rows grouped by name, in id order, so duplicate names pair up stably
+        existing_by_name = {}
+        for row in sorted(existing_players, key=lambda p: p.id):
+            existing_by_name.setdefault(row.name, []).append(row)
         
-        staff_queryset = StaffRoster.objects.filter(is_active=True).select_related('staff')
-        
-        # Exclude builders if system setting is enabled
-        try:
-            from apps.system_settings.models import SystemSetting
-            if SystemSetting.exclude_builders():
-                staff_queryset = staff_queryset.exclude(Q(rank__icontains='builder'))
-        except Exception:
-            # Setting doesn't exist yet or database error - skip filtering
-            pass
-        
-        staff_roster = {}
-        for entry in staff_queryset:
-            # Key by roster name (lowercase)
-            staff_roster[entry.name.lower()] = entry
-            
-            # Also key by Steam name if available (lowercase)
-            if entry.staff and entry.staff.steam_name:
-                steam_name_lower = entry.staff.steam_name.lower()
-                # Only add if not already present (roster name takes priority)
-                if steam_name_lower not in staff_roster:
-                    staff_roster[steam_name_lower] = entry
+        now = timezone.now()
+        to_create = []
+        to_update = []
         
         # Track new staff on server
         new_staff = {}
         
         for player in players:
-            # Use flexible matching function
-            staff_entry = find_matching_staff(player.name, staff_roster)
+            # Exact, then normalized (numbers stripped) name match
+            staff_entry = staff_matcher.match(player.name)
             is_staff = staff_entry is not None
             
             steam_id = staff_entry.steam_id if staff_entry else None
             
-            ServerPlayer.objects.create(
-                server=server,
-                name=player.name,
-                score=player.score,
-                duration=int(player.duration),
-                is_staff=is_staff,
-                staff_rank=staff_entry.rank if staff_entry else '',
-                steam_id=steam_id,
-            )
+            fields = {
+                'score': player.score,
+                'duration': int(player.duration),
+                'is_staff': is_staff,
+                'staff_rank': staff_entry.rank if staff_entry else '',
+                'steam_id': steam_id,
+                'last_seen': now,
+            }
+            
+            matches = existing_by_name.get(player.name)
+            if matches:
+                row = matches.pop(0)
+                for field, value in fields.items():
+                    setattr(row, field, value)
+                to_update.append(row)
+            else:
+                to_create.append(ServerPlayer(server=server, name=player.name, **fields))
             
             if is_staff and steam_id:
                 new_staff[steam_id] = staff_entry
         
+        missing = [row for rows in existing_by_name.values() for row in rows]
+        if grace:
+            kept = [row for row in missing if row.last_seen and now - row.last_seen < grace]
+        else:
+            kept = []
+        kept_ids = {row.id for row in kept}
+        departed_ids = [row.id for row in missing if row.id not in kept_ids]
+        
+        with transaction.atomic():
+            if departed_ids:
+                ServerPlayer.objects.filter(id__in=departed_ids).delete()
+            if to_update:
+                ServerPlayer.objects.bulk_update(to_update, PLAYER_UPDATE_FIELDS)
+            if to_create:
+                ServerPlayer.objects.bulk_create(to_create)
+        
+        # Extend, open and close stints in the long-term presence history
+        try:
+            record_presence(server, to_update + to_create, now, kept=kept)
+        except Exception as e:
+            logger.warning(f"Could not record presence history for {server.name}: {e}")
+        
         # Track session changes and broadcast staff online status
-        self._track_session_changes(server, current_staff, new_staff)
+        keep_steam_ids = {row.steam_id for row in kept if row.is_staff and row.steam_id}
+        self._track_session_changes(server, current_staff, new_staff, keep_steam_ids)
     
-    def _track_session_changes(self, server, old_staff, new_staff):
-        """Track staff join/leave events and update sessions."""
-        from apps.staff.consumers import broadcast_staff_online_change
+    def _track_session_changes(self, server, old_staff, new_staff, keep_steam_ids=()):
+        """
+        Reconcile staff sessions for a server against who is online now.
+
+        Loads every open session for the server in one query, works out which
+        sessions to open and close in memory, then writes them with
+        bulk_create/bulk_update in a single transaction. Sessions for staff no
+        longer on the server are closed whether they left this tick or were
+        orphaned by a missed poll; online staff without an open session get
+        one (covers restarts and missed join events). Sessions for
+        ``keep_steam_ids`` (staff absent from an incomplete player list,
+        within its grace period) stay open. Online/offline broadcasts go out only after the transaction
+        commits.
+        """
+        from apps.staff.leaderboards import invalidate_for_sessions
+        from apps.staff.models import Staff
         
         now = timezone.now()
+        online_steam_ids = set(new_staff.keys()) | set(keep_steam_ids)
+        
+        open_sessions = list(
+            ServerSession.objects.filter(server=server, leave_time__isnull=True)
+        )
+        open_steam_ids = {session.steam_id for session in open_sessions}
+        
+        # Sessions for staff who are NOT currently on this server
+        to_close = [s for s in open_sessions if s.steam_id not in online_steam_ids]
+        for session in to_close:
+            session.leave_time = now
+            session.calculate_duration()
+            session.updated_at = now
         
-        # Find staff who left (were in old but not in new)
-        left_staff = set(old_staff.keys()) - set(new_staff.keys())
-        for steam_id in left_staff:
-            # Close active session for this staff member
-            active_session = ServerSession.objects.filter(
+        # Online staff without an active session
+        to_open = [
+            ServerSession(
+                # Use staff_entry.staff (Staff object), not staff_entry (StaffRoster)
+                staff=staff_entry.staff,
                 server=server,
+                join_time=now,
                 steam_id=steam_id,
-                leave_time__isnull=True
-            ).first()
-            
-            if active_session:
-                active_session.leave_time = now
-                active_session.calculate_duration()
-                active_session.save()
-                logger.info(f"Closed session for {active_session.staff.name} on {server.name}")
-                
-                # Update staff roster online status and last_seen
-                staff_entry = active_session.staff
-                
-                # Always update last_seen when staff leaves
-                staff_entry.last_seen = now
+                player_name=staff_entry.name
+            )
+            for steam_id, staff_entry in new_staff.items()
+            if steam_id not in open_steam_ids
+        ]
+        
+        closed_staff_ids = {session.staff_id for session in to_close}
+        
+        try:
+            with transaction.atomic():
+                if to_close:
+                    ServerSession.objects.bulk_update(to_close, ['leave_time', 'duration', 'updated_at'])
+                    # Always update last_seen when staff leaves
+                    Staff.objects.filter(steam_id__in=closed_staff_ids).update(last_seen=now)
+                    # Closed sessions change their periods' server time leaderboards
+                    transaction.on_commit(lambda: invalidate_for_sessions(
+                        {session.join_time for session in to_close}
+                    ))
+                if to_open:
+                    ServerSession.objects.bulk_create(to_open)
                 
-                # Check if staff is still on another server
-                still_online = ServerSession.objects.filter(
-                    staff=staff_entry,
-                    leave_time__isnull=True
-                ).exists()
+                # Staff who closed a session here but are still on another server stay online
+                still_online = set(
+                    ServerSession.objects.filter(
+                        staff_id__in=closed_staff_ids,
+                        leave_time__isnull=True
+                    ).values_list('staff_id', flat=True)
+                ) if closed_staff_ids else set()
                 
-                # Save last_seen timestamp
-                staff_entry.save(update_fields=['last_seen'])
-                    
-                # Broadcast staff went offline from this server
-                if not still_online:
-                    try:
-                        broadcast_staff_online_change(
-                            staff_id=staff_entry.steam_id,
-                            is_online=False,
-                            server_name=None,
-                            server_id=None
-                        )
-                    except Exception as e:
-                        logger.warning(f"Could not broadcast staff offline: {e}")
+                # Staff with an open session here after this reconcile
+                online_since = {
+                    session.steam_id: session.join_time
+                    for session in open_sessions + to_open
+                    if session.leave_time is None
+                }
+                transaction.on_commit(lambda: self._update_presence(server, online_since))
+                transaction.on_commit(lambda: self._broadcast_session_changes(
+                    server, to_open, closed_staff_ids - still_online
+                ))
+        except Exception as e:
+            logger.error(f"Failed to reconcile sessions on {server.name}: {e}")
+            return
         
-        # Find staff who joined (in new but not in old)
-        joined_staff = set(new_staff.keys()) - set(old_staff.keys())
-        for steam_id in joined_staff:
-            staff_entry = new_staff[steam_id]
-            
-            # Check if there's already an active session (shouldn't happen, but safety check)
-            existing_session = ServerSession.objects.filter(
-                server=server,
-                steam_id=steam_id,
-                leave_time__isnull=True
-            ).first()
-            
-            if not existing_session:
-                # Create new session - use staff_entry.staff (Staff object), not staff_entry (StaffRoster)
-                try:
-                    ServerSession.objects.create(
-                        staff=staff_entry.staff,
-                        server=server,
-                        join_time=now,
-                        steam_id=steam_id,
-                        player_name=staff_entry.name
-                    )
-                    logger.info(f"Started session for {staff_entry.name} on {server.name}")
-                except Exception as e:
-                    logger.error(f"Failed to create session for {staff_entry.name}: {e}")
-                    continue
-                
-                # Broadcast staff came online
-                try:
-                    broadcast_staff_online_change(
-                        staff_id=staff_entry.staff.steam_id,
-                        is_online=True,
-                        server_name=server.name,
-                        server_id=server.id
-                    )
-                except Exception as e:
-                    logger.warning(f"Could not broadcast staff online: {e}")
+        for session in to_close:
+            if session.steam_id in old_staff:
+                logger.info(f"Closed session for {session.player_name} on {server.name}")
+            else:
+                logger.info(f"Closed orphaned session for {session.player_name} on {server.name} (cleanup)")
+        for session in to_open:
+            if session.steam_id in old_staff:
+                logger.info(f"Created missing session for {session.player_name} on {server.name} (recovery)")
+            else:
+                logger.info(f"Started session for {session.player_name} on {server.name}")
+    
+    def _update_presence(self, server, online_since):
+        """Record who is on the server in the live presence registry."""
+        from apps.staff import presence
         
-        # Also check for staff who are online but don't have active sessions
-        # This handles edge cases like system restarts or missed join events
-        for steam_id, staff_entry in new_staff.items():
-            existing_session = ServerSession.objects.filter(
-                server=server,
-                steam_id=steam_id,
-                leave_time__isnull=True
-            ).first()
-            
-            if not existing_session:
-                # Staff is online but has no active session - create one
-                try:
-                    ServerSession.objects.create(
-                        staff=staff_entry.staff,
-                        server=server,
-                        join_time=now,
-                        steam_id=steam_id,
-                        player_name=staff_entry.name
-                    )
-                    logger.info(f"Created missing session for {staff_entry.name} on {server.name} (recovery)")
-                except Exception as e:
-                    logger.error(f"Failed to create recovery session for {staff_entry.name}: {e}")
+        try:
+            presence.update_server(server.id, server.name, online_since)
+        except Exception as e:
+            logger.warning(f"Could not update staff presence for {server.name}: {e}")
+    
+    def _broadcast_session_changes(self, server, opened_sessions, offline_staff_ids):
+        """Broadcast staff online/offline changes from a committed session reconcile."""
+        from apps.staff.consumers import broadcast_staff_online_change
         
-        # Close any orphaned sessions - active sessions for staff who are NOT currently on this server
-        # This handles edge cases where staff left but their session wasn't properly closed
-        online_steam_ids = set(new_staff.keys())
-        orphaned_sessions = ServerSession.objects.filter(
-            server=server,
-            leave_time__isnull=True
-        ).exclude(steam_id__in=online_steam_ids)
+        for session in opened_sessions:
+            # Broadcast staff came online
+            try:
+                broadcast_staff_online_change(
+                    staff_id=session.staff_id,
+                    is_online=True,
+                    server_name=server.name,
+                    server_id=server.id
+                )
+            except Exception as e:
+                logger.warning(f"Could not broadcast staff online: {e}")
         
-        for session in orphaned_sessions:
-            session.leave_time = now
-            session.calculate_duration()
-            session.save()
-            logger.info(f"Closed orphaned session for {session.player_name} on {server.name} (cleanup)")
-            
-            # Update last_seen for the staff member
+        for staff_id in offline_staff_ids:
+            # Broadcast staff went offline from this server
             try:
-                session.staff.last_seen = now
-                session.staff.save(update_fields=['last_seen'])
+                broadcast_staff_online_change(
+                    staff_id=staff_id,
+                    is_online=False,
+                    server_name=None,
+                    server_id=None
+                )
             except Exception as e:
-                logger.warning(f"Could not update last_seen for {session.player_name}: {e}")
+                logger.warning(f"Could not broadcast staff offline: {e}")
     
     def query_all_servers(self):
         """Query all active servers and return a list payload safe for WebSocket serialization."""
-        servers = GameServer.objects.filter(is_active=True)
-        results = []
+        servers = list(GameServer.objects.filter(is_active=True))
+        self.query_servers(servers)
         
-        for server in servers:
-            status = self.query_server(server)
-
-            # Build a JSON-serializable payload with string keys only (msgpack rejects int keys).
-            server_name = server.server_name or server.name
-            map_name = server.map_name or 'Unknown'
-            results.append({
-                'id': server.id,
-                'name': server.name,
-                'server_name': server_name,
-                'map_name': map_name,
-                'current_players': server.current_players,
-                'max_players': server.max_players,
-                'is_online': server.is_online,
-                'staff_online': ServerPlayer.objects.filter(server=server, is_staff=True).count(),
-                'last_query': server.last_query.isoformat() if server.last_query else None,
-                'error': status.get('error'),
-            })
+        # Build a JSON-serializable payload with string keys only (msgpack rejects int keys).
+        snapshot = get_status_snapshot()
         
         # Broadcast update
-        self._broadcast_server_update(results)
+        self._broadcast_server_update(snapshot)
         
-        return results
+        return snapshot['servers']
     
-    def _broadcast_server_update(self, results):
-        """Broadcast server status update via WebSocket."""
+    def _broadcast_server_update(self, snapshot):
+        """Broadcast the snapshot's changes (or the full list) via WebSocket."""
         channel_layer = get_channel_layer()
         
         async_to_sync(channel_layer.group_send)(
             "server_status",
-            {
-                'type': 'status_update',
-                'data': results
-            }
+            build_status_message(snapshot)
         )
     
     def get_staff_distribution(self):
-        """Get staff distribution across servers."""
-        servers = GameServer.objects.filter(is_active=True)
-        
-        distribution = {
-            'server_1': [],
-            'server_2': [],
-            'offline': [],
-        }
-        
-        # Get all active staff
-        all_staff = list(StaffRoster.objects.filter(is_active=True))
-        
-        # Build staff roster dict for matching
-        staff_roster = {
-            entry.name.lower(): entry 
-            for entry in all_staff
-        }
-        
-        # Track which staff are found online (by their database object)
-        online_staff_ids = set()
-        
-        for server in servers:
-            server_players = ServerPlayer.objects.filter(
-                server=server, is_staff=True
-            )
-            
-            for player in server_players:
-                # Find matching staff member
-                staff_entry = find_matching_staff(player.name, staff_roster)
-                
-                if staff_entry:
-                    online_staff_ids.add(staff_entry.id)
-                    
-                    staff_data = {
-                        'name': player.name,
-                        'rank': player.staff_rank,
-                        'duration': player.duration_formatted,
-                        'server': server.name,
-                    }
-                    
-                    if server.display_order == 0:
-                        distribution['server_1'].append(staff_data)
-                    else:
-                        distribution['server_2'].append(staff_data)
-        
-        # Add offline staff
-        for staff in all_staff:
-            if staff.id not in online_staff_ids:
-                distribution['offline'].append({
-                    'name': staff.name,
-                    'rank': staff.rank,
-                    'server': None,
-                })
+        """Get staff distribution across all active servers (cached per poll tick)."""
+        from .distribution import get_staff_distribution
         
-        return distribution
+        return get_staff_distribution()
 
 
 def initialize_default_servers():
@@ -0,0 +1,285 @@
+"""
+Shared server status snapshot.
+
+The poller builds one versioned snapshot of every active server (info, player
+list and staff list) per tick and stores it in the Django cache (Redis in
+production). The REST status endpoint, the WebSocket consumer and the
+broadcast task all serve from it, so a dashboard refresh or a new WebSocket
+connection costs one cache read instead of per-server ServerPlayer queries.
+
+Each published snapshot also carries a delta against the one it replaced, so
+the ``server_status`` WebSocket group only receives what changed (players
+joining/leaving, score changes, map or online flips). Durations are not
+diffed: each player carries ``joined_at`` from the moment they first appear
+and clients advance ``duration_seconds`` from it; the duration fields are
+only resent when ``joined_at`` jumps (a reconnect resets the server-side
+duration). Clients track the snapshot version as a sequence number and ask
+for a resync when they notice a gap.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import GameServer, ServerPlayer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_KEY = 'servers:status_snapshot'
+SNAPSHOT_VERSION_KEY = 'servers:status_snapshot_version'
+
+# Safety net so the snapshot is rebuilt even if the poller stops publishing
+SNAPSHOT_TIMEOUT = 300
+
+# Server-level fields compared when building a delta (last_query changes on
+# every poll and is only sent in full snapshots)
+SERVER_DIFF_FIELDS = [
+    'name', 'server_name', 'map_name', 'current_players', 'max_players',
+    'is_online', 'staff_online', 'error',
+]
+
+# Player fields compared when building a delta (name is the key)
+PLAYER_DIFF_FIELDS = [
+    'score', 'is_staff', 'staff_rank', 'steam_id',
+]
+
+# Sent for a player only when joined_at moves by more than JOIN_TIME_TOLERANCE
+PLAYER_DURATION_FIELDS = ['joined_at', 'duration', 'duration_seconds']
+
+# Slack for poll timing and A2S duration rounding
+JOIN_TIME_TOLERANCE = timedelta(seconds=30)
+
+
+def _next_version():
+    """Monotonic snapshot version shared by all processes."""
+    try:
+        return cache.incr(SNAPSHOT_VERSION_KEY)
+    except ValueError:
+        # Key does not exist yet (first run or cache flushed)
+        cache.add(SNAPSHOT_VERSION_KEY, 0, timeout=None)
+        return cache.incr(SNAPSHOT_VERSION_KEY)
+
+
+def _serialize_player(player):
+    joined_at = player.last_seen - timedelta(seconds=player.duration) if player.last_seen else None
+    return {
+        'name': player.name,
+        'score': player.score,
+        'duration': player.duration_formatted,
+        'duration_seconds': player.duration,
+        'joined_at': joined_at.isoformat() if joined_at else None,
+        'is_staff': player.is_staff,
+        'staff_rank': player.staff_rank,
+        'steam_id': player.steam_id,
+    }
+
+
+def _serialize_staff(player):
+    rank = player.staff_rank or 'Unknown'
+    return {
+        'name': player.name,
+        'rank': rank,
+        'role_color': settings.STAFF_ROLE_COLORS.get(rank, '#999999'),
+        'role_priority': settings.STAFF_ROLE_PRIORITIES.get(rank, 999),
+        'steam_id': player.steam_id,
+    }
+
+
+def build_status_snapshot(errors=None):
+    """
+    Build the snapshot from the database in two queries.
+
+    Args:
+        errors: Optional dict of server id -> last query error message
+    """
+    errors = errors or {}
+    servers = list(GameServer.objects.filter(is_active=True))
+
+    players_by_server = {}
+    for player in ServerPlayer.objects.filter(server__in=servers):
+        players_by_server.setdefault(player.server_id, []).append(player)
+
+    result = []
+    for server in servers:
+        players = players_by_server.get(server.id, [])
+        staff_list = [_serialize_staff(p) for p in players if p.is_staff]
+        # Sort staff list by role priority (lower = higher rank)
+        staff_list.sort(key=lambda x: x['role_priority'])
+
+        result.append({
+            'id': server.id,
+            'name': server.name,
+            'server_name': server.server_name or server.name,
+            'map_name': server.map_name or 'Unknown',
+            'current_players': server.current_players,
+            'max_players': server.max_players,
+            'is_online': server.is_online,
+            'staff_online': len(staff_list),
+            'last_query': server.last_query.isoformat() if server.last_query else None,
+            'error': errors.get(server.id),
+            'players': [_serialize_player(p) for p in players],
+            'staff_list': staff_list,
+        })
+
+    return {
+        'version': _next_version(),
+        'generated_at': timezone.now().isoformat(),
+        'servers': result,
+    }
+
+
+def _join_time_moved(old, new):
+    """True when a player's joined_at changed by more than JOIN_TIME_TOLERANCE."""
+    if not old.get('joined_at') or not new.get('joined_at'):
+        return old.get('joined_at') != new.get('joined_at')
+    delta = datetime.fromisoformat(new['joined_at']) - datetime.fromisoformat(old['joined_at'])
+    return abs(delta) > JOIN_TIME_TOLERANCE
+
+
+def _without_durations(players):
+    return [
+        {field: value for field, value in player.items() if field not in PLAYER_DURATION_FIELDS}
+        for player in players
+    ]
+
+
+def _diff_players(old_players, new_players):
+    """
+    Diff two player lists keyed by name.
+
+    Returns None when either list has duplicate names, in which case the
+    caller sends the full list for that server instead.
+    """
+    old_by_name = {p['name']: p for p in old_players}
+    new_by_name = {p['name']: p for p in new_players}
+    if len(old_by_name) != len(old_players) or len(new_by_name) != len(new_players):
+        return None
+
+    joined = [p for name, p in new_by_name.items() if name not in old_by_name]
+    left = [name for name in old_by_name if name not in new_by_name]
+    updated = []
+    for name, player in new_by_name.items():
+        old = old_by_name.get(name)
+        if old is None:
+            continue
+        changed = {
+            field: player.get(field)
+            for field in PLAYER_DIFF_FIELDS
+            if player.get(field) != old.get(field)
+        }
+        if _join_time_moved(old, player):
+            changed.update({field: player.get(field) for field in PLAYER_DURATION_FIELDS})
+        if changed:
+            changed['name'] = name
+            updated.append(changed)
+
+    return joined, left, updated
+
+
+def diff_status_snapshots(previous, current):
+    """
+    Compute the per-server changes between two snapshots.
+
+    Returns a list of change dicts (only servers that changed are included),
+    or None if the set or order of servers changed and clients need the full
+    snapshot.
+    """
+    old_servers = previous.get('servers', [])
+    new_servers = current.get('servers', [])
+    if [s['id'] for s in old_servers] != [s['id'] for s in new_servers]:
+        return None
+
+    changes = []
+    for old, new in zip(old_servers, new_servers):
+        change = {}
+
+        fields = {
+            field: new.get(field)
+            for field in SERVER_DIFF_FIELDS
+            if new.get(field) != old.get(field)
+        }
+        if fields:
+            change['fields'] = fields
+
+        players_diff = _diff_players(old.get('players', []), new.get('players', []))
+        if players_diff is None:
+            old_players = _without_durations(old.get('players', []))
+            if _without_durations(new.get('players', [])) != old_players:
+                change['players'] = new.get('players', [])
+        else:
+            joined, left, updated = players_diff
+            if joined:
+                change['players_joined'] = joined
+            if left:
+                change['players_left'] = left
+            if updated:
+                change['players_updated'] = updated
+
+        if new.get('staff_list') != old.get('staff_list'):
+            change['staff_list'] = new.get('staff_list', [])
+
+        if change:
+            change['id'] = new['id']
+            changes.append(change)
+
+    return changes
+
+
+def publish_status_snapshot(errors=None):
+    """
+    Build a fresh snapshot and store it for every reader.
+
+    Args:
+        errors: Optional dict of server id -> error for the servers just
+            queried; other servers keep the error from the previous snapshot.
+    """
+    previous = cache.get(SNAPSHOT_CACHE_KEY)
+    merged_errors = {
+        server['id']: server.get('error')
+        for server in (previous or {}).get('servers', [])
+    }
+    merged_errors.update(errors or {})
+
+    snapshot = build_status_snapshot(merged_errors)
+    if previous is not None:
+        changes = diff_status_snapshots(previous, snapshot)
+        if changes is not None:
+            snapshot['delta'] = {
+                'base_version': previous['version'],
+                'changes': changes,
+            }
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, timeout=SNAPSHOT_TIMEOUT)
+    logger.debug(f"Published server status snapshot v{snapshot['version']}")
+    return snapshot
+
+
+def build_status_message(snapshot):
+    """
+    Build the ``server_status`` group event for a published snapshot.
+
+    Sends only the delta when the snapshot has one, otherwise the full
+    server list. Both carry the snapshot version as ``seq``.
+    """
+    delta = snapshot.get('delta')
+    if delta is not None:
+        return {
+            'type': 'status_delta',
+            'seq': snapshot['version'],
+            'base_seq': delta['base_version'],
+            'changes': delta['changes'],
+        }
+    return {
+        'type': 'status_update',
+        'seq': snapshot['version'],
+        'data': snapshot['servers'],
+    }
+
+
+def get_status_snapshot():
+    """Return the current snapshot, rebuilding it from the database on a cache miss."""
+    snapshot = cache.get(SNAPSHOT_CACHE_KEY)
+    if snapshot is None:
+        snapshot = publish_status_snapshot()
+    return snapshot
@@ -14,81 +14,79 @@ def broadcast_server_status():
     from asgiref.sync import async_to_sync
     from channels.layers import get_channel_layer
 
-    from .models import GameServer, ServerPlayer
+    from .snapshot import build_status_message, get_status_snapshot
     
     try:
         channel_layer = get_channel_layer()
         if not channel_layer:
             logger.warning("No channel layer configured, skipping broadcast")
             return
-            
-        servers = GameServer.objects.filter(is_active=True)
         
-        result = []
-        for server in servers:
-            staff_count = ServerPlayer.objects.filter(
-                server=server, is_staff=True
-            ).count()
-            
-            players = ServerPlayer.objects.filter(server=server)
-            
-            result.append({
-                'id': server.id,
-                'name': server.name,
-                'server_name': server.server_name,
-                'map_name': server.map_name,
-                'current_players': server.current_players,
-                'max_players': server.max_players,
-                'is_online': server.is_online,
-                'staff_online': staff_count,
-                'players': [
-                    {
-                        'name': p.name,
-                        'score': p.score,
-                        'duration': p.duration_formatted,
-                        'is_staff': p.is_staff,
-                        'staff_rank': p.staff_rank,
-                    }
-                    for p in players
-                ]
-            })
+        # Served from the snapshot the poller just published; only the
+        # changes since the previous snapshot go over the channel layer
+        snapshot = get_status_snapshot()
         
         async_to_sync(channel_layer.group_send)(
             "server_status",
-            {
-                'type': 'status_update',
-                'data': result
-            }
+            build_status_message(snapshot)
         )
-        logger.debug(f"Broadcasted server status to clients")
+        logger.debug(f"Broadcasted server status snapshot v{snapshot['version']} to clients")
     except Exception as e:
         logger.error(f"Error broadcasting server status: {e}")
 
 
 @shared_task
 def refresh_all_servers():
-    """Refresh status for all game servers."""
+    """Refresh status for all game servers now, regardless of their poll schedule."""
     from .models import GameServer
     from .services import ServerQueryService
     
-    servers = GameServer.objects.filter(is_active=True)
+    servers = list(GameServer.objects.filter(is_active=True))
     service = ServerQueryService()
     
-    for server in servers:
-        try:
-            # The service.query_server handles all the updates internally
-            status = service.query_server(server)
+    # All servers are queried concurrently, so the tick takes as long as the
+    # slowest server rather than the sum of all of them
+    try:
+        statuses = service.query_servers(servers)
+        for server, status in zip(servers, statuses):
             logger.debug(f"Server {server.name}: {status}")
-            
-        except Exception as e:
-            logger.error(f"Error refreshing server {server.name}: {e}")
+    except Exception as e:
+        logger.error(f"Error refreshing servers: {e}")
     
-    logger.info(f"Refreshed {servers.count()} servers")
+    logger.info(f"Refreshed {len(servers)} servers")
     
     # Broadcast updated status to all WebSocket clients
     broadcast_server_status()
 
 
+@shared_task
+def poll_due_servers():
+    """
+    Query only the servers whose adaptive poll interval has elapsed.
+    
+    Runs on a short beat tick; each query schedules that server's next poll
+    (see apps.servers.scheduler), so busy servers are polled more often and
+    unreachable ones back off.
+    """
+    from .scheduler import get_due_servers
+    from .services import ServerQueryService
+    
+    servers = get_due_servers()
+    if not servers:
+        return 0
+    
+    try:
+        ServerQueryService().query_servers(servers)
+    except Exception as e:
+        logger.error(f"Error polling due servers: {e}")
+    
+    logger.debug(f"Polled {len(servers)} due servers: {', '.join(s.name for s in servers)}")
+    
+    # Broadcast updated status to all WebSocket clients
+    broadcast_server_status()
+    return len(servers)
+
+
 @shared_task
 def refresh_single_server(server_id: int):
     """Refresh status for a single server."""
@@ -112,3 +110,17 @@ def refresh_single_server(server_id: int):
     except Exception as e:
         logger.error(f"Error refreshing server {server_id}: {e}")
         return False
+
+
+@shared_task
+def rollup_server_status():
+    """Fold raw ServerStatusLog rows into rollup buckets and prune old data."""
+    from .rollups import StatusRollupService
+    
+    try:
+        result = StatusRollupService().run()
+        logger.info(f"Server status rollup completed: {result}")
+        return {'success': True, **result}
+    except Exception as e:
+        logger.error(f"Error rolling up server status logs: {e}")
+        return {'success': False, 'error': str(e)}
@@ -1,14 +1,17 @@
 from datetime import datetime, timedelta
 
-from django.db.models import Avg, Count
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import ExtractHour
 from django.utils import timezone
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import GameServer, ServerPlayer, ServerStatusLog
+from .models import (GameServer, ServerPlayer, ServerStatusLog,
+                     ServerStatusRollup)
+from .refresh import RefreshCoordinator
 from .serializers import (GameServerSerializer, ServerPlayerSerializer,
-                          ServerStatusLogSerializer,
+                          ServerStatusRollupSerializer,
                           StaffDistributionSerializer)
 from .services import ServerQueryService
 
@@ -32,45 +35,22 @@ class ServerStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        from django.conf import settings
-        
-        servers = GameServer.objects.filter(is_active=True)
+        from .snapshot import get_status_snapshot
         
+        # Served from the snapshot published by the poller (one cache read)
         result = []
-        for server in servers:
-            staff_players = ServerPlayer.objects.filter(
-                server=server, is_staff=True
-            )
-            
-            server_name = server.server_name or server.name
-            map_name = server.map_name or 'Unknown'
-            
-            # Build staff list with details including role color and priority
-            staff_list = []
-            for player in staff_players:
-                rank = player.staff_rank or 'Unknown'
-                staff_list.append({
-                    'name': player.name,
-                    'rank': rank,
-                    'role_color': settings.STAFF_ROLE_COLORS.get(rank, '#999999'),
-                    'role_priority': settings.STAFF_ROLE_PRIORITIES.get(rank, 999),
-                    'steam_id': player.steam_id,
-                })
-            
-            # Sort staff list by role priority (lower = higher rank)
-            staff_list.sort(key=lambda x: x['role_priority'])
-            
+        for server in get_status_snapshot()['servers']:
             result.append({
-                'id': server.id,
-                'name': server.name,
-                'server_name': server_name,
-                'map_name': map_name,
-                'current_players': server.current_players,
-                'max_players': server.max_players,
-                'is_online': server.is_online,
-                'staff_online': staff_players.count(),
-                'staff_list': staff_list,
-                'last_query': server.last_query,
+                'id': server['id'],
+                'name': server['name'],
+                'server_name': server['server_name'],
+                'map_name': server['map_name'],
+                'current_players': server['current_players'],
+                'max_players': server['max_players'],
+                'is_online': server['is_online'],
+                'staff_online': server['staff_online'],
+                'staff_list': server['staff_list'],
+                'last_query': server['last_query'],
             })
         
         return Response(result)
@@ -81,8 +61,9 @@ class RefreshServersView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        service = ServerQueryService()
-        results = service.query_all_servers()
+        # Concurrent refreshes share one sweep; a sweep that just finished
+        # is reused instead of querying the servers again
+        results = RefreshCoordinator().refresh()
         
         return Response({
             'message': 'Servers refreshed',
@@ -122,11 +103,14 @@ class StaffDistributionView(APIView):
 
 
 class PlayerLookupView(APIView):
-    """Look up a player by Steam ID or name across all servers."""
+    """Look up a player by Steam ID or name: where they are now and when they were last on."""
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        from .services import normalize_name
+        from django.db.models import Q
+
+        from .presence_history import lookup_presence
+        from .services import get_staff_matcher
         
         steam_id = request.query_params.get('steam_id')
         player_names = request.query_params.get('player_names', '').split(',')
@@ -138,40 +122,63 @@ class PlayerLookupView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Search for player across all servers
-        # First try by Steam ID (for staff members)
-        players = ServerPlayer.objects.none()
-        if steam_id:
-            players = ServerPlayer.objects.filter(steam_id__iexact=steam_id).select_related('server')
-        
-        # If not found by Steam ID, try by player names (with flexible matching)
-        if not players.exists() and player_names:
-            from django.db.models import Q
-
-            # Build a query to match any of the player names (case-insensitive)
-            name_query = Q()
+        steam_ids = {steam_id} if steam_id else set()
+        if player_names:
+            # Staff matched through the roster/Steam name index
+            staff_matcher = get_staff_matcher()
             for name in player_names:
-                # Exact match
-                name_query |= Q(name__iexact=name)
-                
-                # Also try normalized version (without numbers)
-                normalized = normalize_name(name)
-                if normalized != name.lower():
-                    # Find all players whose normalized name matches
-                    all_players = ServerPlayer.objects.select_related('server')
-                    for player in all_players:
-                        if normalize_name(player.name) == normalized:
-                            players = players | ServerPlayer.objects.filter(id=player.id)
-            
-            # Apply exact name matches
-            if name_query:
-                players = players | ServerPlayer.objects.filter(name_query).select_related('server')
+                staff_entry = staff_matcher.match(name)
+                if staff_entry:
+                    steam_ids.add(staff_entry.steam_id)
         
-        if not players.exists():
-            return Response({
+        # One indexed query over the presence history (exact and normalized
+        # names, plus Steam IDs), newest stint first
+        stints = lookup_presence(player_names, steam_ids)
+        history = [
+            {
+                'server': {
+                    'id': stint.server.id,
+                    'name': stint.server.name,
+                },
+                'player_name': stint.name,
+                'is_staff': stint.is_staff,
+                'first_seen': stint.first_seen,
+                'last_seen': stint.last_seen,
+                'is_current': stint.is_current,
+            }
+            for stint in stints
+        ]
+        
+        # Live score/duration for stints that are still open
+        current_query = Q()
+        for stint in stints:
+            if stint.is_current:
+                current_query |= Q(server_id=stint.server_id, name=stint.name)
+        players = (
+            ServerPlayer.objects.filter(current_query).select_related('server')
+            if current_query else []
+        )
+        
+        if not players:
+            response = {
                 'found': False,
-                'message': 'Player not currently online on any server'
-            })
+                'message': 'Player not currently online on any server',
+                'last_seen': history[0] if history else None,
+                'history': history,
+            }
+            if not history and player_names:
+                # Nothing under these names; offer similar names seen before
+                from .name_search import search_players
+                response['similar_names'] = [
+                    {
+                        'player_name': match['name'],
+                        'similarity': round(match['similarity'], 3),
+                        'last_seen': match['latest_seen'],
+                    }
+                    for name in player_names[:5]
+                    for match in search_players(name, limit=5)
+                ]
+            return Response(response)
         
         # Return all server instances where player is found
         player_data = []
@@ -192,18 +199,84 @@ class PlayerLookupView(APIView):
         
         return Response({
             'found': True,
-            'servers': player_data
+            'servers': player_data,
+            'last_seen': history[0],
+            'history': history,
         })
 
 
 class ServerHistoryView(generics.ListAPIView):
-    """Get server status history."""
-    serializer_class = ServerStatusLogSerializer
+    """Get server status history from rollup buckets (?resolution=minute|hour|day)."""
+    serializer_class = ServerStatusRollupSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         server_id = self.kwargs.get('pk')
-        return ServerStatusLog.objects.filter(server_id=server_id)[:100]
+        resolution = self.request.query_params.get('resolution', 'minute')
+        if resolution not in dict(ServerStatusRollup.RESOLUTION_CHOICES):
+            resolution = 'minute'
+        return ServerStatusRollup.objects.filter(
+            server_id=server_id,
+            resolution=resolution
+        ).order_by('-bucket_start')[:100]
+
+
+def _hour_of_day_totals(server, since):
+    """
+    Online samples and staff/player totals per hour of day since ``since``.
+
+    Completed hour buckets cover most of the range; the newest hour bucket
+    may still be partial, so from its start onward minute buckets are used,
+    and raw ServerStatusLog rows from the start of the newest minute bucket
+    (retention never prunes past these watermarks). Every sample is counted
+    exactly once.
+    """
+    def latest(resolution):
+        return ServerStatusRollup.objects.filter(
+            server=server, resolution=resolution
+        ).aggregate(latest=Max('bucket_start'))['latest']
+
+    hour_cutoff = latest('hour') or since
+    minute_cutoff = max(latest('minute') or hour_cutoff, hour_cutoff)
+
+    def buckets(resolution, start, end):
+        return ServerStatusRollup.objects.filter(
+            server=server,
+            resolution=resolution,
+            bucket_start__gte=start,
+            bucket_start__lt=end,
+        ).annotate(
+            hour=ExtractHour('bucket_start')
+        ).values('hour').annotate(
+            samples=Sum('online_count'),
+            staff_total=Sum('staff_total'),
+            player_total=Sum('player_total'),
+        ).order_by()
+
+    online = Q(is_online=True)
+    live = ServerStatusLog.objects.filter(
+        server=server,
+        timestamp__gte=max(minute_cutoff, since),
+    ).annotate(
+        hour=ExtractHour('timestamp')
+    ).values('hour').annotate(
+        samples=Count('id', filter=online),
+        staff_total=Sum('staff_count', filter=online),
+        player_total=Sum('player_count', filter=online),
+    ).order_by()
+
+    totals = {}
+    for rows in (
+        buckets('hour', since, hour_cutoff),
+        buckets('minute', max(hour_cutoff, since), minute_cutoff),
+        live,
+    ):
+        for row in rows:
+            entry = totals.setdefault(row['hour'], {'samples': 0, 'staff_total': 0, 'player_total': 0})
+            entry['samples'] += row['samples'] or 0
+            entry['staff_total'] += row['staff_total'] or 0
+            entry['player_total'] += row['player_total'] or 0
+    return totals
 
 
 class ServerStatsView(APIView):
@@ -219,17 +292,33 @@ class ServerStatsView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get logs from the last 24 hours
+        # Get minute buckets from the last 24 hours
         now = timezone.now()
         last_24h = now - timedelta(hours=24)
-        recent_logs = ServerStatusLog.objects.filter(
+        recent_buckets = ServerStatusRollup.objects.filter(
             server=server,
-            timestamp__gte=last_24h
-        ).order_by('timestamp')
+            resolution='minute',
+            bucket_start__gte=last_24h
+        ).order_by('bucket_start')
 
         # Format 24-hour data
         hourly_data = []
-        for log in recent_logs:
+        latest_bucket = None
+        for bucket in recent_buckets:
+            latest_bucket = bucket.bucket_start
+            hourly_data.append({
+                'timestamp': bucket.bucket_start.isoformat(),
+                'staff_count': round(bucket.avg_staff),
+                'player_count': round(bucket.avg_players),
+                'is_online': bucket.online_count > 0
+            })
+
+        # Raw samples newer than the last rollup run keep the chart current
+        tail_start = latest_bucket + timedelta(minutes=1) if latest_bucket else last_24h
+        for log in ServerStatusLog.objects.filter(
+            server=server,
+            timestamp__gte=tail_start
+        ).order_by('timestamp'):
             hourly_data.append({
                 'timestamp': log.timestamp.isoformat(),
                 'staff_count': log.staff_count,
@@ -237,26 +326,19 @@ class ServerStatsView(APIView):
                 'is_online': log.is_online
             })
 
-        # Get all historical data for daily averages (last 30 days)
-        last_30d = now - timedelta(days=30)
-        all_logs = ServerStatusLog.objects.filter(
-            server=server,
-            timestamp__gte=last_30d,
-            is_online=True
-        )
+        # Calculate hourly averages across the last 30 days
+        hour_stats = _hour_of_day_totals(server, now - timedelta(days=30))
 
-        # Calculate hourly averages across all days
         hourly_averages = []
         for hour in range(24):
-            hour_logs = all_logs.filter(timestamp__hour=hour)
-            if hour_logs.exists():
-                avg_staff = hour_logs.aggregate(Avg('staff_count'))['staff_count__avg'] or 0
-                avg_players = hour_logs.aggregate(Avg('player_count'))['player_count__avg'] or 0
-                count = hour_logs.count()
+            row = hour_stats.get(hour)
+            count = row['samples'] if row else 0
+            if count:
+                avg_staff = row['staff_total'] / count
+                avg_players = row['player_total'] / count
             else:
                 avg_staff = 0
                 avg_players = 0
-                count = 0
             
             hourly_averages.append({
                 'hour': hour,
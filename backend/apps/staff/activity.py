@@ -0,0 +1,179 @@
+"""
+In-app staff activity heartbeats.
+
+StaffActivityMiddleware records at most one heartbeat per user every
+HEARTBEAT_INTERVAL seconds in Redis; requests in between cost a single
+``SET NX``. Nothing touches the database on the request path.
+
+Two hashes keyed by user id hold the heartbeat timestamps:
+
+* PENDING_KEY: heartbeats not yet written to the database. flush_heartbeats()
+  renames it to PROCESSING_KEY, updates Staff.last_seen and
+  StaffRoster.is_active_in_app in bulk (flush_staff_activity task) and only
+  then deletes the batch; a failed write puts it back into PENDING_KEY,
+* SEEN_KEY: the latest heartbeat of every user, which mark_inactive() uses to
+  clear is_active_in_app for staff who went quiet.
+"""
+import logging
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 60  # seconds
+
+# Staff without a heartbeat for this long are no longer active in the app
+INACTIVE_AFTER = timedelta(minutes=5)
+
+THROTTLE_KEY = 'staff:activity:throttle:{user_id}'
+PENDING_KEY = 'staff:activity:pending'
+PROCESSING_KEY = 'staff:activity:processing'
+SEEN_KEY = 'staff:activity:seen'
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def record_heartbeat(user_id, now=None):
+    """Record that a user was active, unless already recorded in this interval."""
+    conn = _redis()
+    if not conn.set(THROTTLE_KEY.format(user_id=user_id), 1, nx=True, ex=HEARTBEAT_INTERVAL):
+        return False
+
+    timestamp = now if now is not None else time.time()
+    pipe = conn.pipeline(transaction=False)
+    pipe.hset(PENDING_KEY, user_id, timestamp)
+    pipe.hset(SEEN_KEY, user_id, timestamp)
+    pipe.execute()
+    return True
+
+
+def _staff_for_users(user_ids):
+    """Map user id -> Staff for the given users (linked account, Steam ID or Discord ID)."""
+    from django.contrib.auth import get_user_model
+
+    from .models import Staff
+
+    users = list(
+        get_user_model().objects.filter(id__in=user_ids).values('id', 'steam_id', 'discord_id')
+    )
+    by_steam = {u['steam_id']: u['id'] for u in users if u['steam_id']}
+    by_discord = {u['discord_id']: u['id'] for u in users if u['discord_id']}
+
+    staff_by_user = {}
+    candidates = Staff.objects.filter(
+        Q(user_id__in=user_ids) |
+        Q(steam_id__in=list(by_steam)) |
+        Q(discord_id__in=list(by_discord))
+    )
+    for staff in candidates:
+        # Linked account first, then Steam ID, then Discord ID
+        if staff.user_id in user_ids:
+            staff_by_user[staff.user_id] = staff
+        elif staff.steam_id in by_steam:
+            staff_by_user.setdefault(by_steam[staff.steam_id], staff)
+        elif staff.discord_id in by_discord:
+            staff_by_user.setdefault(by_discord[staff.discord_id], staff)
+    return staff_by_user
+
+
+def _restore_pending(conn, heartbeats):
+    """Put a batch back into PENDING_KEY, keeping heartbeats recorded since."""
+    pipe = conn.pipeline(transaction=False)
+    for user_id, timestamp in heartbeats.items():
+        pipe.hsetnx(PENDING_KEY, user_id, timestamp)
+    pipe.delete(PROCESSING_KEY)
+    pipe.execute()
+
+
+def flush_heartbeats():
+    """
+    Write pending heartbeats to the database: Staff.last_seen with one bulk
+    update, StaffRoster.is_active_in_app with one UPDATE. Returns the number
+    of staff updated.
+
+    The batch stays in Redis under PROCESSING_KEY until the write commits, so
+    heartbeats survive a failed write or a worker killed mid-flush.
+    """
+    from redis.exceptions import ResponseError
+
+    conn = _redis()
+
+    # A batch left behind by a flush that died goes back into the queue first
+    leftover = conn.hgetall(PROCESSING_KEY)
+    if leftover:
+        _restore_pending(conn, leftover)
+
+    try:
+        conn.rename(PENDING_KEY, PROCESSING_KEY)
+    except ResponseError:
+        # No pending heartbeats
+        return 0
+    pending = conn.hgetall(PROCESSING_KEY)
+
+    try:
+        updated = _write_heartbeats(pending)
+    except Exception:
+        _restore_pending(conn, pending)
+        raise
+
+    conn.delete(PROCESSING_KEY)
+    return updated
+
+
+def _write_heartbeats(pending):
+    """Apply one batch of {user_id: timestamp} heartbeats; returns staff updated."""
+    from .models import Staff, StaffRoster
+
+    if not pending:
+        return 0
+
+    seen_at = {
+        int(user_id): datetime.fromtimestamp(float(timestamp), tz=dt_timezone.utc)
+        for user_id, timestamp in pending.items()
+    }
+    staff_by_user = _staff_for_users(set(seen_at))
+
+    updated = {}
+    for user_id, staff in staff_by_user.items():
+        current = updated.get(staff.steam_id)
+        staff.last_seen = max(seen_at[user_id], current.last_seen) if current else seen_at[user_id]
+        updated[staff.steam_id] = staff
+
+    if updated:
+        with transaction.atomic():
+            Staff.objects.bulk_update(list(updated.values()), ['last_seen'], batch_size=500)
+            StaffRoster.objects.filter(
+                staff_id__in=list(updated), is_active=True, is_active_in_app=False
+            ).update(is_active_in_app=True)
+    return len(updated)
+
+
+def mark_inactive(now=None):
+    """
+    Clear is_active_in_app for staff without a recent heartbeat and drop
+    stale entries from the seen hash. Returns the number of roster entries
+    marked inactive.
+    """
+    from .models import StaffRoster
+
+    now = now if now is not None else time.time()
+    cutoff = now - INACTIVE_AFTER.total_seconds()
+
+    conn = _redis()
+    seen = conn.hgetall(SEEN_KEY)
+    active_users = {int(user_id) for user_id, timestamp in seen.items() if float(timestamp) >= cutoff}
+    stale = [user_id for user_id, timestamp in seen.items() if float(timestamp) < cutoff]
+    if stale:
+        conn.hdel(SEEN_KEY, *stale)
+
+    active_staff = [staff.steam_id for staff in _staff_for_users(active_users).values()] if active_users else []
+    return StaffRoster.objects.filter(
+        is_active_in_app=True
+    ).exclude(staff_id__in=active_staff).update(is_active_in_app=False)
@@ -81,6 +81,13 @@ class StaffStatusConsumer(AsyncWebsocketConsumer):
             'discord_activity': event.get('discord_activity'),
         }))
 
+    async def staff_discord_status_batch(self, event):
+        """Handle a batch of staff Discord status updates from the bot."""
+        await self.send(text_data=json.dumps({
+            'type': 'staff_discord_status_batch',
+            'updates': event['updates'],
+        }))
+
     async def staff_roster_sync(self, event):
         """Handle staff roster sync completion broadcast."""
         await self.send(text_data=json.dumps({
@@ -99,34 +106,23 @@ class StaffStatusConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def _get_staff_summary(self):
-        from apps.servers.models import ServerPlayer
-
         from .models import Staff, StaffRoster
+        from .presence import get_online
         
         staff = StaffRoster.objects.filter(is_active=True).select_related('staff')[:100]
         
-        # Get all online staff steam_ids from ServerPlayer
-        online_steam_ids = set(
-            ServerPlayer.objects.filter(is_staff=True).values_list('steam_id', flat=True)
-        )
+        # Online staff and their servers from the presence registry
+        online = get_online()
         
-        # Count online staff (those in roster with matching steam_id in ServerPlayer)
-        total_online = sum(1 for s in staff if s.steam_id in online_steam_ids)
+        # Count online staff (those in roster with a presence entry)
+        total_online = sum(1 for s in staff if s.staff_id in online)
         
         # Count LOA staff
         total_on_loa = Staff.objects.filter(staff_status='loa').count()
         
-        def get_server_info(steam_id):
-            """Get server name and ID for a staff member."""
-            player = ServerPlayer.objects.filter(steam_id=steam_id, is_staff=True).first()
-            if player:
-                return player.server.name, player.server.id
-            return None, None
-        
         staff_list = []
         for s in staff:
-            is_online = s.steam_id in online_steam_ids
-            server_name, server_id = get_server_info(s.steam_id) if is_online else (None, None)
+            presence = online.get(s.staff_id)
             is_on_loa = s.staff.staff_status == 'loa' if hasattr(s, 'staff') else False
             
             staff_list.append({
@@ -134,9 +130,9 @@ class StaffStatusConsumer(AsyncWebsocketConsumer):
                 'name': s.name,
                 'role': s.rank,
                 'role_color': s.rank_color,
-                'is_online': is_online,
-                'server_name': server_name,
-                'server_id': server_id,
+                'is_online': presence is not None,
+                'server_name': presence['server_name'] if presence else None,
+                'server_id': presence['server_id'] if presence else None,
                 'discord_status': s.discord_status,
                 'is_on_loa': is_on_loa,
             })
@@ -150,18 +146,16 @@ class StaffStatusConsumer(AsyncWebsocketConsumer):
 
     @database_sync_to_async
     def _get_online_staff(self):
-        from apps.servers.models import ServerPlayer
-
         from .models import StaffRoster
+        from .presence import get_online
 
-        # Get all online staff steam_ids from ServerPlayer
-        online_players = ServerPlayer.objects.filter(is_staff=True).select_related('server')
-        online_steam_ids = {p.steam_id: p for p in online_players}
+        # Online staff and their servers from the presence registry
+        online = get_online()
         
         # Get roster entries for online staff
         roster_entries = StaffRoster.objects.filter(
             is_active=True,
-            staff_id__in=online_steam_ids.keys()
+            staff_id__in=list(online)
         ).select_related('staff')
         
         return [
@@ -170,8 +164,8 @@ class StaffStatusConsumer(AsyncWebsocketConsumer):
                 'name': s.name,
                 'role': s.rank,
                 'role_color': s.rank_color,
-                'server_name': online_steam_ids[s.staff_id].server.name if s.staff_id in online_steam_ids else None,
-                'server_id': online_steam_ids[s.staff_id].server.id if s.staff_id in online_steam_ids else None,
+                'server_name': online[s.staff_id]['server_name'],
+                'server_id': online[s.staff_id]['server_id'],
             }
             for s in roster_entries
         ]
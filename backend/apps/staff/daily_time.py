@@ -0,0 +1,129 @@
+"""
+Per-day server time for a staff member, in their own timezone.
+
+Sessions are split at local midnight, so a session from 23:00 to 01:00 counts
+one hour on each day, and the per-day totals are computed in PostgreSQL:
+every session overlapping the range is expanded into one slice per local day
+it touches (``generate_series``) and the slices are summed per day. A chart
+over any date range costs one query.
+
+Roster timezones come from the staff sheet and are free text such as
+"GMT-5", "EST" or "Europe/London"; resolve_timezone() maps them to an IANA
+name both Python and PostgreSQL understand, falling back to UTC.
+"""
+import logging
+import re
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import connection
+
+from .models import ServerSession
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEZONE = 'UTC'
+
+# Longest range one request may ask for
+MAX_RANGE_DAYS = 366
+
+# Common abbreviations used on the roster sheet
+TIMEZONE_ALIASES = {
+    'EST': 'America/New_York',
+    'EDT': 'America/New_York',
+    'CST': 'America/Chicago',
+    'CDT': 'America/Chicago',
+    'MST': 'America/Denver',
+    'MDT': 'America/Denver',
+    'PST': 'America/Los_Angeles',
+    'PDT': 'America/Los_Angeles',
+    'BST': 'Europe/London',
+    'CEST': 'Europe/Paris',
+    'AEST': 'Australia/Sydney',
+    'AEDT': 'Australia/Sydney',
+}
+
+_OFFSET_RE = re.compile(r'^(?:GMT|UTC)\s*([+-])\s*(\d{1,2})(?::?00)?$', re.IGNORECASE)
+
+DAILY_TIME_SQL = """
+    SELECT slices.day, SUM(slices.seconds)
+    FROM (
+        SELECT
+            local_day::date AS day,
+            EXTRACT(EPOCH FROM
+                LEAST(s.leave_time, (local_day + INTERVAL '1 day') AT TIME ZONE %(tz)s)
+                - GREATEST(s.join_time, local_day AT TIME ZONE %(tz)s)
+            ) AS seconds
+        FROM {table} s
+        CROSS JOIN LATERAL generate_series(
+            date_trunc('day', s.join_time AT TIME ZONE %(tz)s),
+            date_trunc('day', s.leave_time AT TIME ZONE %(tz)s),
+            INTERVAL '1 day'
+        ) AS local_day
+        WHERE s.staff_id = %(staff_id)s
+          AND s.leave_time IS NOT NULL
+          AND s.join_time < %(range_end)s
+          AND s.leave_time > %(range_start)s
+    ) slices
+    WHERE slices.day >= %(start)s AND slices.day <= %(end)s
+    GROUP BY slices.day
+"""
+
+
+def resolve_timezone(name):
+    """IANA timezone name for a roster timezone string (UTC if unknown)."""
+    name = (name or '').strip()
+    if not name or name.upper() in ('GMT', 'UTC'):
+        return DEFAULT_TIMEZONE
+
+    match = _OFFSET_RE.match(name)
+    if match:
+        sign, hours = match.groups()
+        if int(hours) > 14:
+            return DEFAULT_TIMEZONE
+        # Etc/GMT zones use the POSIX sign: GMT-5 is Etc/GMT+5
+        return f"Etc/GMT{'-' if sign == '+' else '+'}{int(hours)}"
+
+    name = TIMEZONE_ALIASES.get(name.upper(), name)
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.debug(f"Unknown roster timezone {name!r}, using {DEFAULT_TIMEZONE}")
+        return DEFAULT_TIMEZONE
+    return name
+
+
+def local_today(tz_name):
+    return datetime.now(ZoneInfo(tz_name)).date()
+
+
+def daily_totals(steam_id, start, end, tz_name=DEFAULT_TIMEZONE):
+    """
+    Seconds on servers per local day for a staff member.
+
+    Args:
+        steam_id: Staff primary key
+        start, end: First and last local date (inclusive)
+        tz_name: IANA timezone, see resolve_timezone()
+
+    Returns:
+        [(date, seconds)] for every day from start to end, zero-filled
+    """
+    zone = ZoneInfo(tz_name)
+    params = {
+        'tz': tz_name,
+        'staff_id': steam_id,
+        'start': start,
+        'end': end,
+        'range_start': datetime.combine(start, time.min, tzinfo=zone),
+        'range_end': datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone),
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(DAILY_TIME_SQL.format(table=ServerSession._meta.db_table), params)
+        totals = {day: int(seconds or 0) for day, seconds in cursor.fetchall()}
+
+    days = (end - start).days + 1
+    return [
+        (start + timedelta(days=i), totals.get(start + timedelta(days=i), 0))
+        for i in range(days)
+    ]
@@ -1,10 +1,18 @@
-"""Discord bot service for monitoring staff member presence and status."""
+"""Discord bot service for monitoring staff member presence and status.
+
+Presence events arrive on the bot's event loop, which also runs the gateway
+heartbeat, so nothing in an event handler touches the ORM. Updates are
+buffered in a PresenceBuffer keyed by Discord ID (later updates for a member
+replace earlier ones) and flushed every FLUSH_INTERVAL seconds with one
+bulk_update run in a worker thread, followed by one batched
+``staff_discord_status_batch`` broadcast.
+"""
 import asyncio
 import logging
-from datetime import datetime
 from typing import Dict, List, Optional
 
 import discord
+from channels.db import database_sync_to_async
 from django.conf import settings
 from django.utils import timezone
 
@@ -12,6 +20,109 @@ from .models import StaffRoster
 
 logger = logging.getLogger(__name__)
 
+# Seconds between presence flushes
+FLUSH_INTERVAL = 5
+
+PRESENCE_FIELDS = ['discord_status', 'discord_activity', 'discord_custom_status', 'discord_status_updated']
+
+
+def get_member_presence(member: discord.Member) -> Dict:
+    """Status, activity and custom status of a guild member."""
+    activity_name = None
+    custom_status = None
+    
+    if member.activities:
+        for activity in member.activities:
+            if isinstance(activity, discord.CustomActivity):
+                custom_status = activity.name
+            elif activity.name:
+                activity_name = activity.name
+    
+    return {
+        'status': str(member.status) if member.status else 'offline',
+        'activity': activity_name,
+        'custom_status': custom_status,
+    }
+
+
+def write_presence_updates(updates: Dict[str, Dict]) -> List[Dict]:
+    """
+    Write buffered presence updates ({discord_id: presence}) to the active
+    roster entries with one bulk_update. Entries whose presence did not
+    change are left alone. Returns broadcast payloads for the changed ones.
+    """
+    entries = StaffRoster.objects.filter(
+        is_active=True,
+        staff__discord_id__in=list(updates),
+    ).select_related('staff')
+    
+    changed = []
+    for entry in entries:
+        presence = updates[entry.staff.discord_id]
+        if (entry.discord_status, entry.discord_activity, entry.discord_custom_status) == (
+            presence['status'], presence['activity'], presence['custom_status']
+        ):
+            continue
+        entry.discord_status = presence['status']
+        entry.discord_activity = presence['activity']
+        entry.discord_custom_status = presence['custom_status']
+        entry.discord_status_updated = presence['updated']
+        changed.append(entry)
+    
+    if changed:
+        StaffRoster.objects.bulk_update(changed, PRESENCE_FIELDS)
+    
+    return [
+        {
+            'staff_id': entry.id,
+            'discord_status': entry.discord_status,
+            'discord_custom_status': entry.discord_custom_status,
+            'discord_activity': entry.discord_activity,
+        }
+        for entry in changed
+    ]
+
+
+class PresenceBuffer:
+    """Collapses presence updates per member until the next flush."""
+    
+    def __init__(self):
+        self.pending: Dict[str, Dict] = {}
+        self._lock = asyncio.Lock()
+    
+    def add(self, discord_id: str, presence: Dict):
+        self.pending[discord_id] = {**presence, 'updated': timezone.now()}
+    
+    async def flush(self) -> int:
+        """Write pending updates and broadcast the changes. Returns the number written."""
+        async with self._lock:
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+            
+            try:
+                changes = await database_sync_to_async(write_presence_updates)(batch)
+            except Exception:
+                # Keep the batch for the next flush unless newer updates arrived
+                for discord_id, presence in batch.items():
+                    self.pending.setdefault(discord_id, presence)
+                raise
+            if changes:
+                try:
+                    from channels.layers import get_channel_layer
+                    await get_channel_layer().group_send(
+                        "staff_status",
+                        {
+                            'type': 'staff_discord_status_batch',
+                            'updates': changes,
+                        }
+                    )
+                except Exception as e:
+                    logger.warning(f"Could not broadcast Discord statuses: {e}")
+            
+            logger.debug(f"Flushed {len(batch)} presence updates, {len(changes)} changed")
+            return len(changes)
+
 
 class DiscordStatusBot:
     """Discord bot for tracking staff member presence and status."""
@@ -22,6 +133,8 @@ class DiscordStatusBot:
         self.guild_id = None
         self.is_running = False
         self.loop = None
+        self.presence = PresenceBuffer()
+        self._flush_task = None
         
     async def start_bot(self, token: str, guild_id: int):
         """Start the Discord bot.
@@ -52,6 +165,9 @@ class DiscordStatusBot:
             logger.info(f"Discord bot logged in as {client.user}")
             self.is_running = True
             
+            if self._flush_task is None or self._flush_task.done():
+                self._flush_task = asyncio.create_task(self._flush_loop())
+            
             # Initial sync of all member statuses
             await self.sync_all_member_statuses()
         
@@ -60,7 +176,7 @@ class DiscordStatusBot:
             """Handle presence updates for members."""
             # Only track members in our staff roster
             if after.guild.id == self.guild_id:
-                await self.update_member_status(after)
+                self.update_member_status(after)
         
         # Start the bot
         try:
@@ -72,10 +188,28 @@ class DiscordStatusBot:
     
     async def stop_bot(self):
         """Stop the Discord bot."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
         if self.bot and self.is_running:
             await self.bot.close()
             self.is_running = False
             logger.info("Discord bot stopped")
+        
+        # Write whatever is still buffered
+        try:
+            await self.presence.flush()
+        except Exception as e:
+            logger.error(f"Error flushing presence updates: {e}")
+    
+    async def _flush_loop(self):
+        """Flush buffered presence updates every FLUSH_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.presence.flush()
+            except Exception as e:
+                logger.error(f"Error flushing presence updates: {e}")
     
     async def sync_all_member_statuses(self):
         """Sync status for all staff members in the guild."""
@@ -90,77 +224,41 @@ class DiscordStatusBot:
                 return
             
             # Get all staff members with Discord IDs
-            staff_members = StaffRoster.objects.filter(
-                discord_id__isnull=False,
-                is_active=True
-            ).exclude(discord_id='')
+            discord_ids = await database_sync_to_async(lambda: list(
+                StaffRoster.objects.filter(
+                    is_active=True,
+                    staff__discord_id__isnull=False,
+                ).exclude(staff__discord_id='').values_list('staff__discord_id', flat=True)
+            ))()
             
             updated_count = 0
-            for staff in staff_members:
+            for discord_id in discord_ids:
                 try:
                     # Find member in guild
-                    member = guild.get_member(int(staff.discord_id))
-                    if member:
-                        await self.update_member_status(member, staff)
-                        updated_count += 1
-                    else:
-                        # Member not found, set offline
-                        staff.discord_status = 'offline'
-                        staff.discord_activity = None
-                        staff.discord_custom_status = None
-                        staff.discord_status_updated = timezone.now()
-                        staff.save()
-                except (ValueError, AttributeError) as e:
-                    logger.error(f"Error processing staff member {staff.name}: {e}")
+                    member = guild.get_member(int(discord_id))
+                except ValueError as e:
+                    logger.error(f"Invalid Discord ID {discord_id}: {e}")
+                    continue
+                if member:
+                    self.update_member_status(member)
+                    updated_count += 1
+                else:
+                    # Member not found, set offline
+                    self.presence.add(discord_id, {'status': 'offline', 'activity': None, 'custom_status': None})
             
+            await self.presence.flush()
             logger.info(f"Synced status for {updated_count} staff members")
             
         except Exception as e:
             logger.error(f"Error syncing member statuses: {e}")
     
-    async def update_member_status(self, member: discord.Member, staff: Optional[StaffRoster] = None):
-        """Update status for a specific member.
+    def update_member_status(self, member: discord.Member):
+        """Buffer the current status of a member; written on the next flush.
         
         Args:
             member: Discord member object
-            staff: StaffRoster object (if None, will be looked up)
         """
-        try:
-            # Find staff member if not provided
-            if not staff:
-                staff = StaffRoster.objects.filter(
-                    discord_id=str(member.id),
-                    is_active=True
-                ).first()
-            
-            if not staff:
-                return  # Not a tracked staff member
-            
-            # Get status
-            status = str(member.status) if member.status else 'offline'
-            
-            # Get activity information
-            activity_name = None
-            custom_status = None
-            
-            if member.activities:
-                for activity in member.activities:
-                    if isinstance(activity, discord.CustomActivity):
-                        custom_status = activity.name
-                    elif activity.name:
-                        activity_name = activity.name
-            
-            # Update staff record
-            staff.discord_status = status
-            staff.discord_activity = activity_name
-            staff.discord_custom_status = custom_status
-            staff.discord_status_updated = timezone.now()
-            staff.save()
-            
-            logger.debug(f"Updated status for {staff.name}: {status}")
-            
-        except Exception as e:
-            logger.error(f"Error updating member status: {e}")
+        self.presence.add(str(member.id), get_member_presence(member))
     
     async def get_member_status(self, discord_id: str) -> Optional[Dict]:
         """Get current status for a specific Discord user.
@@ -183,22 +281,7 @@ class DiscordStatusBot:
             if not member:
                 return None
             
-            # Get activity information
-            activity_name = None
-            custom_status = None
-            
-            if member.activities:
-                for activity in member.activities:
-                    if isinstance(activity, discord.CustomActivity):
-                        custom_status = activity.name
-                    elif activity.name:
-                        activity_name = activity.name
-            
-            return {
-                'status': str(member.status),
-                'activity': activity_name,
-                'custom_status': custom_status,
-            }
+            return get_member_presence(member)
             
         except Exception as e:
             logger.error(f"Error getting member status: {e}")
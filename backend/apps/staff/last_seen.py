@@ -0,0 +1,180 @@
+"""
+Set-based Staff.last_seen backfill.
+
+Staff.last_seen is also written by in-app heartbeats (see activity), so the
+leave_time of a staff member's most recent completed ServerSession is a
+lower bound, not the value itself: last_seen should be
+``Greatest(last_seen, latest leave_time)``. The latest leave_time is
+computed for every staff row at once with a ``Subquery(Max(leave_time))``
+annotation. Two modes share it:
+
+* ``backfill``: set last_seen to the latest session where it is unset or
+  older (never clears anything),
+* ``fix``: the same, and also drop last_seen values in the future, falling
+  back to the latest session or clearing them for staff without sessions.
+  Values newer than the latest session (heartbeats) are kept.
+
+report() answers the dry run from the same expression in one aggregate
+query. run() applies a mode as UPDATE statements over chunks of CHUNK_SIZE
+staff, recording progress in the cache under a job id so the
+backfill_last_seen task can be polled from BackfillLastSeenView and
+FixLastSeenView.
+"""
+import logging
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Now
+
+from .models import ServerSession, Staff
+
+logger = logging.getLogger(__name__)
+
+MODES = ('backfill', 'fix')
+
+CHUNK_SIZE = 500
+
+JOB_CACHE_KEY = 'staff:last_seen_job:{job_id}'
+JOB_TIMEOUT = 3600
+
+
+def _latest_leave_time():
+    return Subquery(
+        ServerSession.objects.filter(
+            staff_id=OuterRef('pk'),
+            leave_time__isnull=False,
+        ).order_by().values('staff_id').annotate(latest=Max('leave_time')).values('latest')
+    )
+
+
+def _session_count():
+    return Coalesce(
+        Subquery(
+            ServerSession.objects.filter(staff_id=OuterRef('pk')).order_by().values('staff_id').annotate(
+                count=Count('id')
+            ).values('count'),
+            output_field=IntegerField(),
+        ),
+        Value(0),
+    )
+
+
+# Staff whose last_seen each mode would change (filters on a correct_last_seen annotation)
+HAS_SESSIONS = Q(correct_last_seen__isnull=False)
+IN_FUTURE = Q(last_seen__gt=Now())
+BACKFILL_NEEDED = HAS_SESSIONS & (Q(last_seen__isnull=True) | Q(last_seen__lt=F('correct_last_seen')))
+FIX_WITH_SESSION = BACKFILL_NEEDED | (HAS_SESSIONS & IN_FUTURE)
+FIX_WITHOUT_SESSION = Q(correct_last_seen__isnull=True) & IN_FUTURE
+
+
+def annotate_last_seen(queryset=None):
+    """Staff queryset annotated with correct_last_seen and session_count."""
+    queryset = Staff.objects.all() if queryset is None else queryset
+    return queryset.annotate(
+        correct_last_seen=_latest_leave_time(),
+        session_count=_session_count(),
+    )
+
+
+def report():
+    """Dry-run counts for both modes, from one query."""
+    counts = Staff.objects.annotate(correct_last_seen=_latest_leave_time()).aggregate(
+        total=Count('pk'),
+        no_sessions=Count('pk', filter=~HAS_SESSIONS),
+        backfill_needed=Count('pk', filter=BACKFILL_NEEDED),
+        fix_with_session=Count('pk', filter=FIX_WITH_SESSION),
+        fix_without_session=Count('pk', filter=FIX_WITHOUT_SESSION),
+    )
+    counts['backfill_up_to_date'] = counts['total'] - counts['no_sessions'] - counts['backfill_needed']
+    counts['fix_correct'] = counts['total'] - counts['fix_with_session'] - counts['fix_without_session']
+    return counts
+
+
+def pending(mode):
+    """Staff rows the mode would change, with their current and correct last_seen."""
+    queryset = annotate_last_seen()
+    if mode == 'backfill':
+        queryset = queryset.filter(BACKFILL_NEEDED)
+    else:
+        queryset = queryset.filter(FIX_WITH_SESSION | FIX_WITHOUT_SESSION)
+    return queryset.order_by('name')
+
+
+def _apply_chunk(mode, steam_ids):
+    """Apply a mode to one chunk of staff. Returns (set from sessions, cleared)."""
+    chunk = Staff.objects.filter(steam_id__in=steam_ids).annotate(correct_last_seen=_latest_leave_time())
+
+    if mode == 'backfill':
+        return chunk.filter(BACKFILL_NEEDED).update(last_seen=_latest_leave_time()), 0
+
+    with_session = chunk.filter(FIX_WITH_SESSION).update(last_seen=_latest_leave_time())
+    without_session = chunk.filter(FIX_WITHOUT_SESSION).update(last_seen=None)
+    return with_session, without_session
+
+
+def get_job(job_id):
+    return cache.get(JOB_CACHE_KEY.format(job_id=job_id))
+
+
+def _save_job(job):
+    cache.set(JOB_CACHE_KEY.format(job_id=job['job_id']), job, timeout=JOB_TIMEOUT)
+
+
+def create_job(mode):
+    """Register a queued job and return its state; run() picks it up by id."""
+    job = {
+        'job_id': uuid.uuid4().hex,
+        'mode': mode,
+        'status': 'queued',
+        'processed': 0,
+        'total': None,
+        'updated': 0,
+        'cleared': 0,
+        'error': None,
+    }
+    _save_job(job)
+    return job
+
+
+def run(mode, job_id=None, progress=None):
+    """
+    Apply a mode to every staff member, CHUNK_SIZE rows per UPDATE.
+
+    Args:
+        mode: 'backfill' or 'fix'
+        job_id: Job to record progress under (see create_job)
+        progress: Optional callable(job) invoked after every chunk
+
+    Returns:
+        The final job state
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown last_seen mode: {mode}")
+
+    job = (get_job(job_id) if job_id else None) or create_job(mode)
+    steam_ids = list(Staff.objects.order_by('steam_id').values_list('steam_id', flat=True))
+    job.update(status='running', total=len(steam_ids))
+    _save_job(job)
+
+    try:
+        for i in range(0, len(steam_ids), CHUNK_SIZE):
+            chunk = steam_ids[i:i + CHUNK_SIZE]
+            updated, cleared = _apply_chunk(mode, chunk)
+            job['processed'] += len(chunk)
+            job['updated'] += updated
+            job['cleared'] += cleared
+            _save_job(job)
+            if progress:
+                progress(job)
+    except Exception as e:
+        job.update(status='failed', error=str(e))
+        _save_job(job)
+        logger.error(f"last_seen {mode} job {job['job_id']} failed: {e}")
+        raise
+
+    job['status'] = 'completed'
+    _save_job(job)
+    logger.info(f"last_seen {mode} job {job['job_id']} completed: "
+               f"{job['updated']} updated, {job['cleared']} cleared of {job['total']} staff")
+    return job
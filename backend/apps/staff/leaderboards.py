@@ -0,0 +1,164 @@
+"""
+Server time leaderboard (weekly/monthly).
+
+Per-staff totals for a period come from one grouped query over completed
+ServerSessions (``values('staff').annotate(Sum, Count)``) and are cached per
+period. A session counts towards the period its join_time falls in, so a
+period's totals only change when one of its sessions closes; the poller
+calls invalidate_for_sessions() after closing sessions. Entries also expire
+as a safety net against totals cached by a query that raced the
+invalidation, or sessions edited outside the poller: the current period
+after a few minutes, finished periods after an hour.
+
+Only the totals are cached; roster details (rank, colour, builder
+exclusion) are joined per request so roster changes show up immediately.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.utils import get_week_start
+
+from .models import ServerSession, StaffRoster
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_CACHE_KEY = 'staff:server_time_totals:{period}:{start}'
+
+# Safety-net expiry for the current and for finished periods' entries
+CURRENT_PERIOD_TIMEOUT = 300
+PAST_PERIOD_TIMEOUT = 3600
+
+PERIODS = ('weekly', 'monthly')
+
+
+def _period_start(period, moment):
+    """Aware midnight starting the week (Saturday) or month containing ``moment``."""
+    if period == 'weekly':
+        day = get_week_start(moment)
+    else:
+        day = moment.date().replace(day=1)
+    return datetime.combine(day, datetime.min.time(), tzinfo=moment.tzinfo)
+
+
+def get_period_range(period, offset=0, now=None):
+    """
+    Return (period_start, period_end, label) for the period ``offset``
+    periods before the current one.
+    """
+    now = now or timezone.now()
+    start = _period_start(period, now)
+
+    if period == 'weekly':
+        start = start - timedelta(weeks=offset)
+        end = start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        return start, end, f"Week of {start.strftime('%b %d, %Y')}"
+
+    for _ in range(offset):
+        start = (start - timedelta(days=1)).replace(day=1)
+    next_month = start.replace(day=28) + timedelta(days=4)
+    end = next_month.replace(day=1) - timedelta(seconds=1)
+    return start, end, start.strftime('%B %Y')
+
+
+def _cache_key(period, start):
+    return LEADERBOARD_CACHE_KEY.format(period=period, start=start.date().isoformat())
+
+
+def get_period_totals(period, start, end, now=None):
+    """
+    {steam_id: (total_seconds, session_count)} for sessions joined in the
+    period and already closed.
+    """
+    now = now or timezone.now()
+    key = _cache_key(period, start)
+    totals = cache.get(key)
+    if totals is not None:
+        return totals
+
+    rows = ServerSession.objects.filter(
+        join_time__gte=start,
+        join_time__lte=end,
+        leave_time__isnull=False,  # Only completed sessions
+    ).values('staff_id').annotate(
+        total_seconds=Sum('duration'),
+        session_count=Count('id'),
+    ).order_by()
+    totals = {
+        row['staff_id']: (row['total_seconds'] or 0, row['session_count'])
+        for row in rows
+    }
+
+    timeout = PAST_PERIOD_TIMEOUT if end < now else CURRENT_PERIOD_TIMEOUT
+    cache.set(key, totals, timeout=timeout)
+    return totals
+
+
+def invalidate_for_sessions(join_times):
+    """Drop cached totals for every period containing one of the join times."""
+    keys = {
+        _cache_key(period, _period_start(period, join_time))
+        for join_time in join_times
+        for period in PERIODS
+    }
+    if keys:
+        cache.delete_many(list(keys))
+
+
+def build_leaderboard(period='weekly', offset=0):
+    """Leaderboard payload for ServerTimeLeaderboardView."""
+    period = 'weekly' if period == 'weekly' else 'monthly'
+    now = timezone.now()
+    start, end, label = get_period_range(period, offset, now)
+    totals = get_period_totals(period, start, end, now)
+
+    # Roster info for active staff (excluding builders if setting enabled)
+    roster_queryset = StaffRoster.objects.filter(
+        is_active=True, staff_id__in=list(totals)
+    ).select_related('staff')
+    try:
+        from apps.system_settings.models import SystemSetting
+        if SystemSetting.exclude_builders():
+            roster_queryset = roster_queryset.exclude(Q(rank__icontains='builder'))
+    except Exception:
+        # Setting doesn't exist yet or database error - skip filtering
+        pass
+
+    leaderboard = []
+    for roster in roster_queryset:
+        total_seconds, session_count = totals[roster.staff_id]
+        hours = total_seconds // 3600
+        minutes = (total_seconds % 3600) // 60
+
+        leaderboard.append({
+            'staff_id': roster.id,  # Use roster ID for navigation, not steam_id
+            'steam_id': roster.staff_id,
+            'name': roster.staff.name,
+            'role': roster.rank,
+            'role_color': settings.STAFF_ROLE_COLORS.get(roster.rank, '#808080'),
+            'role_priority': roster.rank_priority,
+            'total_seconds': total_seconds,
+            'total_time_formatted': f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m",
+            'session_count': session_count,
+            'avg_session_seconds': total_seconds // session_count if session_count > 0 else 0,
+        })
+
+    # Sort by total time (descending)
+    leaderboard.sort(key=lambda x: x['total_seconds'], reverse=True)
+
+    # Add ranks
+    for i, entry in enumerate(leaderboard):
+        entry['rank'] = i + 1
+
+    return {
+        'period': period,
+        'period_label': label,
+        'period_start': start.isoformat(),
+        'period_end': end.isoformat(),
+        'offset': offset,
+        'leaderboard': leaderboard,
+    }
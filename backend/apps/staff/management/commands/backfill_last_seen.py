@@ -2,9 +2,8 @@
 Management command to backfill last_seen timestamps for staff members.
 This updates the Staff.last_seen field based on their most recent ServerSession.
 """
-from apps.staff.models import ServerSession, Staff
+from apps.staff import last_seen
 from django.core.management.base import BaseCommand
-from django.utils import timezone
 
 
 class Command(BaseCommand):
@@ -16,55 +15,44 @@ class Command(BaseCommand):
             action='store_true',
             help='Show what would be updated without making changes',
         )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Also replace last_seen values in the future with the latest session (or clear them)',
+        )
 
     def handle(self, *args, **options):
         dry_run = options['dry_run']
+        mode = 'fix' if options['fix'] else 'backfill'
         
         if dry_run:
             self.stdout.write(self.style.WARNING('Running in DRY RUN mode - no changes will be made\n'))
-        
-        # Get all staff members
-        all_staff = Staff.objects.all()
-        updated_count = 0
-        skipped_count = 0
-        
-        self.stdout.write(f'Processing {all_staff.count()} staff members...\n')
-        
-        for staff in all_staff:
-            # Find their most recent session with a leave time
-            most_recent_session = ServerSession.objects.filter(
-                staff=staff,
-                leave_time__isnull=False
-            ).order_by('-leave_time').first()
             
-            if most_recent_session:
-                # Update last_seen if it's None or older than the session leave_time
-                if staff.last_seen is None or staff.last_seen < most_recent_session.leave_time:
-                    if dry_run:
-                        self.stdout.write(
-                            f'  Would update {staff.name}: '
-                            f'last_seen would be set to {most_recent_session.leave_time}'
-                        )
-                    else:
-                        staff.last_seen = most_recent_session.leave_time
-                        staff.save(update_fields=['last_seen'])
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'  ✓ Updated {staff.name}: '
-                                f'last_seen set to {most_recent_session.leave_time}'
-                            )
-                        )
-                    updated_count += 1
-                else:
-                    skipped_count += 1
+            for staff in last_seen.pending(mode):
+                self.stdout.write(
+                    f'  Would update {staff.name}: '
+                    f'last_seen would be set to {staff.correct_last_seen}'
+                )
+            
+            counts = last_seen.report()
+            if mode == 'backfill':
+                would_update = counts['backfill_needed']
             else:
-                skipped_count += 1
+                would_update = counts['fix_with_session'] + counts['fix_without_session']
+            self.stdout.write('\n' + '=' * 60)
+            self.stdout.write(self.style.WARNING(f'Would update: {would_update} staff members'))
+            self.stdout.write(f"Would skip: {counts['total'] - would_update} staff members (no sessions or already up to date)")
+            self.stdout.write('=' * 60)
+            return
+        
+        def progress(job):
+            self.stdout.write(f"  Processed {job['processed']}/{job['total']} staff members...")
+        
+        job = last_seen.run(mode, progress=progress)
         
         self.stdout.write('\n' + '=' * 60)
-        if dry_run:
-            self.stdout.write(self.style.WARNING(f'Would update: {updated_count} staff members'))
-            self.stdout.write(f'Would skip: {skipped_count} staff members (no sessions or already up to date)')
-        else:
-            self.stdout.write(self.style.SUCCESS(f'Updated: {updated_count} staff members'))
-            self.stdout.write(f'Skipped: {skipped_count} staff members (no sessions or already up to date)')
+        self.stdout.write(self.style.SUCCESS(f"Updated: {job['updated']} staff members"))
+        if mode == 'fix':
+            self.stdout.write(self.style.SUCCESS(f"Cleared: {job['cleared']} staff members without sessions"))
+        self.stdout.write(f"Skipped: {job['total'] - job['updated'] - job['cleared']} staff members (no sessions or already up to date)")
         self.stdout.write('=' * 60)
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:31
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0011_add_steam_name_fields"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name="staff",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["name"], name="staff_name_trgm", opclasses=["gin_trgm_ops"]
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="staff",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["steam_name"],
+                name="staff_steam_name_trgm",
+                opclasses=["gin_trgm_ops"],
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 14:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0012_trigram_name_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="staffsynclog",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
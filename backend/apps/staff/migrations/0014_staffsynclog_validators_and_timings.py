@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-17 15:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("staff", "0013_staffsynclog_content_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="staffsynclog",
+            name="etag",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name="staffsynclog",
+            name="last_modified",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="staffsynclog",
+            name="fetch_duration_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="staffsynclog",
+            name="parse_duration_ms",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models
 
 
@@ -61,6 +62,11 @@ class Staff(models.Model):
         ordering = ['current_role_priority', 'name']
         verbose_name = 'Staff Member'
         verbose_name_plural = 'Staff Members'
+        indexes = [
+            # Trigram indexes for fuzzy name search (apps.servers.name_search)
+            GinIndex(fields=['name'], name='staff_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['steam_name'], name='staff_steam_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.current_role or 'No Role'})"
@@ -169,6 +175,11 @@ class StaffSyncLog(models.Model):
     records_removed = models.IntegerField(default=0)
     success = models.BooleanField(default=True)
     error_message = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the sheet CSV
+    etag = models.CharField(max_length=255, blank=True)
+    last_modified = models.CharField(max_length=64, blank=True)
+    fetch_duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    parse_duration_ms = models.PositiveIntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['-synced_at']
@@ -0,0 +1,176 @@
+"""
+Live staff presence registry.
+
+Answers "is this staff member on a server, which one, since when" from Redis
+so any web, WebSocket or Celery process can read it without touching
+ServerPlayer/ServerSession:
+
+* ONLINE_KEY: hash of steam_id -> JSON ``{"server_id", "server_name", "since"}``,
+* SERVER_KEY: per-server hash of the same entries for the staff on it,
+* SERVERS_KEY: set of the server ids that have a SERVER_KEY hash.
+
+The session reconciler calls update_server() after every poll commits, with
+the open sessions on that server. Staff on several servers keep the entry of
+the server they joined first; when they leave it, the entry moves to another
+server they are still on. The registry is rebuilt from open sessions when
+READY_KEY is missing (cold Redis, or every READY_TIMEOUT seconds as a safety
+net for servers that stopped being polled), and readers fall back to the
+database if Redis is unreachable.
+"""
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+ONLINE_KEY = 'staff:presence:online'
+SERVER_KEY = 'staff:presence:server:{server_id}'
+SERVERS_KEY = 'staff:presence:servers'
+READY_KEY = 'staff:presence:ready'
+
+# Full rebuild at least this often (seconds)
+READY_TIMEOUT = 600
+
+
+def _redis():
+    from django_redis import get_redis_connection
+
+    return get_redis_connection('default')
+
+
+def _entry(server_id, server_name, since):
+    return json.dumps({
+        'server_id': server_id,
+        'server_name': server_name,
+        'since': since.isoformat() if since else None,
+    })
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def _load_sessions():
+    """(steam_id, server_id, server_name, join_time) for open sessions, oldest first."""
+    from .models import ServerSession
+
+    return list(ServerSession.objects.filter(
+        leave_time__isnull=True,
+        server__is_active=True,
+    ).order_by('join_time').values_list('steam_id', 'server_id', 'server__name', 'join_time'))
+
+
+def _online_from_db():
+    online = {}
+    for steam_id, server_id, server_name, join_time in _load_sessions():
+        online.setdefault(steam_id, json.loads(_entry(server_id, server_name, join_time)))
+    return online
+
+
+def rebuild():
+    """Replace the registry with the open sessions in the database."""
+    online = {}
+    by_server = {}
+    for steam_id, server_id, server_name, join_time in _load_sessions():
+        entry = _entry(server_id, server_name, join_time)
+        online.setdefault(steam_id, entry)
+        by_server.setdefault(server_id, {}).setdefault(steam_id, entry)
+
+    conn = _redis()
+    stale_keys = [SERVER_KEY.format(server_id=_decode(server_id)) for server_id in conn.smembers(SERVERS_KEY)]
+    pipe = conn.pipeline(transaction=True)
+    pipe.delete(ONLINE_KEY, SERVERS_KEY, *stale_keys)
+    if online:
+        pipe.hset(ONLINE_KEY, mapping=online)
+    for server_id, entries in by_server.items():
+        pipe.hset(SERVER_KEY.format(server_id=server_id), mapping=entries)
+        pipe.sadd(SERVERS_KEY, server_id)
+    pipe.set(READY_KEY, 1, ex=READY_TIMEOUT)
+    pipe.execute()
+
+
+def _ensure_ready(conn):
+    if not conn.exists(READY_KEY):
+        rebuild()
+
+
+def update_server(server_id, server_name, online_since):
+    """
+    Record the staff on a server after a poll.
+
+    Args:
+        server_id: GameServer id
+        server_name: GameServer name
+        online_since: {steam_id: join_time} for every open session on the server
+    """
+    conn = _redis()
+    key = SERVER_KEY.format(server_id=server_id)
+    departed = [
+        steam_id for steam_id in map(_decode, conn.hkeys(key))
+        if steam_id not in online_since
+    ]
+
+    # Entries pointing at this server move to another server the staff member
+    # is still on, or are dropped
+    moved, dropped = {}, []
+    if departed:
+        owners = dict(zip(departed, conn.hmget(ONLINE_KEY, departed)))
+        leaving = [
+            steam_id for steam_id, raw in owners.items()
+            if raw and json.loads(raw)['server_id'] == server_id
+        ]
+        other_keys = [
+            SERVER_KEY.format(server_id=_decode(other_id))
+            for other_id in conn.smembers(SERVERS_KEY)
+            if int(_decode(other_id)) != server_id
+        ]
+        for steam_id in leaving:
+            elsewhere = [raw for raw in (conn.hget(other, steam_id) for other in other_keys) if raw]
+            if elsewhere:
+                moved[steam_id] = min(elsewhere, key=lambda raw: json.loads(raw)['since'] or '')
+            else:
+                dropped.append(steam_id)
+
+    entries = {
+        steam_id: _entry(server_id, server_name, since)
+        for steam_id, since in online_since.items()
+    }
+
+    pipe = conn.pipeline(transaction=True)
+    if departed:
+        pipe.hdel(key, *departed)
+    if dropped:
+        pipe.hdel(ONLINE_KEY, *dropped)
+    if moved:
+        pipe.hset(ONLINE_KEY, mapping=moved)
+    if entries:
+        pipe.hset(key, mapping=entries)
+        pipe.sadd(SERVERS_KEY, server_id)
+        for steam_id, entry in entries.items():
+            # Keep the entry of a server the staff member joined earlier
+            pipe.hsetnx(ONLINE_KEY, steam_id, entry)
+    pipe.execute()
+
+
+def get_online():
+    """{steam_id: {'server_id', 'server_name', 'since'}} for every staff member on a server."""
+    try:
+        conn = _redis()
+        _ensure_ready(conn)
+        raw = conn.hgetall(ONLINE_KEY)
+    except Exception as e:
+        logger.warning(f"Presence registry unavailable, reading from the database: {e}")
+        return _online_from_db()
+
+    return {_decode(steam_id): json.loads(value) for steam_id, value in raw.items()}
+
+
+def get_presence(steam_id):
+    """Presence of one staff member, or None when not on a server."""
+    try:
+        conn = _redis()
+        _ensure_ready(conn)
+        raw = conn.hget(ONLINE_KEY, steam_id)
+    except Exception as e:
+        logger.warning(f"Presence registry unavailable, reading from the database: {e}")
+        return _online_from_db().get(steam_id)
+    return json.loads(raw) if raw else None
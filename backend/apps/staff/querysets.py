@@ -0,0 +1,63 @@
+"""
+Roster queryset builders.
+
+StaffRosterSerializer shows last-seen information for every row. Computing
+it per object costs several queries per row, so views serializing roster
+entries build their queryset with annotate_roster_status(), which adds
+everything in the same SELECT:
+
+* ``last_session_end``: leave_time of the most recent completed session,
+* ``session_count``: number of ServerSessions.
+
+Staff and the linked user account are joined in, so a page of any size
+costs a fixed number of queries. Entries loaded without the annotation are
+completed by with_roster_status() in one query per list. Live server status
+comes from the presence registry (apps.staff.presence), not the database.
+"""
+import logging
+
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import ServerSession, StaffRoster
+
+logger = logging.getLogger(__name__)
+
+
+def annotate_roster_status(queryset):
+    """Annotate a StaffRoster queryset with the fields StaffRosterSerializer reads."""
+    sessions = ServerSession.objects.filter(staff_id=OuterRef('staff_id'))
+    session_count = sessions.order_by().values('staff_id').annotate(
+        count=Count('id')
+    ).values('count')
+    last_session_end = sessions.filter(
+        leave_time__isnull=False
+    ).order_by('-leave_time').values('leave_time')[:1]
+
+    return queryset.select_related('staff', 'staff__user').annotate(
+        last_session_end=Subquery(last_session_end),
+        session_count=Coalesce(Subquery(session_count, output_field=IntegerField()), Value(0)),
+    )
+
+
+def with_roster_status(entries):
+    """
+    Return the entries with the annotate_roster_status() fields, loading
+    them in one query for any entry that lacks them.
+    """
+    entries = list(entries)
+    missing = [entry.pk for entry in entries if not hasattr(entry, 'session_count')]
+    if not missing:
+        return entries
+
+    logger.warning(f"Serializing {len(missing)} roster entries without annotate_roster_status()")
+    loaded = annotate_roster_status(StaffRoster.objects.filter(pk__in=missing)).in_bulk()
+    result = []
+    for entry in entries:
+        if not hasattr(entry, 'session_count'):
+            # Deleted since it was loaded: no sessions to report
+            entry = loaded.get(entry.pk, entry)
+            entry.session_count = getattr(entry, 'session_count', 0)
+            entry.last_session_end = getattr(entry, 'last_session_end', None)
+        result.append(entry)
+    return result
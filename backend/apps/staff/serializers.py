@@ -37,6 +37,16 @@ class LegacyStaffSerializer(serializers.ModelSerializer):
         return '#808080'
 
 
+class StaffRosterListSerializer(serializers.ListSerializer):
+    """Completes unannotated entries in one query for the whole list."""
+    
+    def to_representation(self, data):
+        from .querysets import with_roster_status
+        
+        entries = data.all() if hasattr(data, 'all') else data
+        return super().to_representation(with_roster_status(entries))
+
+
 class StaffRosterSerializer(serializers.ModelSerializer):
     """Serializer for staff roster entries."""
     
@@ -49,11 +59,15 @@ class StaffRosterSerializer(serializers.ModelSerializer):
     user_id = serializers.IntegerField(source='user.id', read_only=True, allow_null=True)
     user_avatar = serializers.URLField(source='user.avatar_url', read_only=True, allow_null=True)
     
-    # Online status fields
+    # Online status fields (from the presence registry)
     is_online = serializers.SerializerMethodField()
     server_name = serializers.SerializerMethodField()
     server_id = serializers.SerializerMethodField()
     
+    # Last-seen fields (annotated by apps.staff.querysets.annotate_roster_status)
+    last_session_end = serializers.DateTimeField(read_only=True, allow_null=True)
+    session_count = serializers.IntegerField(read_only=True)
+    
     # Discord status fields (optional - requires bot)
     discord_status_display = serializers.CharField(source='discord_status', read_only=True)
     
@@ -70,6 +84,7 @@ class StaffRosterSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = StaffRoster
+        list_serializer_class = StaffRosterListSerializer
         fields = [
             'id', 'username', 'display_name', 'role', 'role_color', 'role_priority',
             'steam_id', 'discord_id', 'discord_tag', 'timezone', 'active_time',
@@ -77,52 +92,44 @@ class StaffRosterSerializer(serializers.ModelSerializer):
             'is_active', 'is_on_loa', 'loa_end_date',
             'user_id', 'user_avatar', 'last_synced',
             'joined_date', 'last_activity',
-            'is_online', 'server_name', 'server_id', 
+            'is_online', 'server_name', 'server_id', 'last_session_end', 'session_count',
             'discord_status', 'discord_status_display', 'discord_custom_status', 
             'discord_activity', 'discord_status_updated'
         ]
         read_only_fields = [
             'last_synced', 'discord_status_updated', 'last_seen', 'is_active_in_app',
             'joined_date', 'last_activity',
-            'is_online', 'server_name', 'server_id', 'discord_status_display'
+            'is_online', 'server_name', 'server_id', 'last_session_end', 'session_count',
+            'discord_status_display'
         ]
     
+    def to_representation(self, instance):
+        # Views annotate their querysets; anything else is completed (and
+        # logged) here, once per list via StaffRosterListSerializer
+        if not hasattr(instance, 'session_count'):
+            from .querysets import with_roster_status
+            instance = with_roster_status([instance])[0]
+        return super().to_representation(instance)
+    
+    def _presence(self, obj):
+        """Registry entry for the staff member; the registry is read once per response."""
+        online = self.context.get('staff_presence')
+        if online is None:
+            from .presence import get_online
+            online = get_online()
+            self.context['staff_presence'] = online
+        return online.get(obj.staff_id)
+    
     def get_is_online(self, obj):
-        """Check if staff member is currently online on any server."""
-        from apps.servers.models import ServerPlayer
-
-        # Use steam_id for more reliable matching if available
-        if obj.steam_id:
-            return ServerPlayer.objects.filter(steam_id=obj.steam_id, is_staff=True).exists()
-        
-        # Fallback to name matching (exact match only as fallback)
-        return ServerPlayer.objects.filter(name__iexact=obj.name, is_staff=True).exists()
+        return self._presence(obj) is not None
     
     def get_server_name(self, obj):
-        """Get the server name where staff member is online."""
-        from apps.servers.models import ServerPlayer
-
-        # Use steam_id for more reliable matching if available
-        if obj.steam_id:
-            player = ServerPlayer.objects.filter(steam_id=obj.steam_id, is_staff=True).first()
-        else:
-            # Fallback to name matching (exact match only as fallback)
-            player = ServerPlayer.objects.filter(name__iexact=obj.name, is_staff=True).first()
-        
-        return player.server.name if player else None
+        presence = self._presence(obj)
+        return presence['server_name'] if presence else None
     
     def get_server_id(self, obj):
-        """Get the server ID where staff member is online."""
-        from apps.servers.models import ServerPlayer
-
-        # Use steam_id for more reliable matching if available
-        if obj.steam_id:
-            player = ServerPlayer.objects.filter(steam_id=obj.steam_id, is_staff=True).first()
-        else:
-            # Fallback to name matching (exact match only as fallback)
-            player = ServerPlayer.objects.filter(name__iexact=obj.name, is_staff=True).first()
-        
-        return player.server.id if player else None
+        presence = self._presence(obj)
+        return presence['server_id'] if presence else None
     
     def get_is_on_loa(self, obj):
         """Check if staff member is on LOA (Leave of Absence)."""
@@ -149,34 +156,17 @@ class StaffRosterSerializer(serializers.ModelSerializer):
         """Get human-readable time since last seen."""
         from datetime import timedelta
 
-        from apps.servers.models import ServerPlayer
         from django.utils import timezone
 
-        # Check if currently online (same logic as get_is_online)
-        if obj.steam_id:
-            is_online = ServerPlayer.objects.filter(steam_id=obj.steam_id, is_staff=True).exists()
-        else:
-            is_online = ServerPlayer.objects.filter(name__iexact=obj.name, is_staff=True).exists()
-        
         # If currently online, return None (will show "Online" in UI)
-        if is_online:
+        if self._presence(obj):
             return None
             
-        # Check if staff has a last_seen timestamp
-        last_seen = obj.staff.last_seen if hasattr(obj, 'staff') else obj.last_seen
-        
-        # If no last_seen, check if there are any completed sessions and use the most recent leave_time
+        # Fall back to the most recent completed session when last_seen is unset
+        last_seen = obj.staff.last_seen or obj.last_session_end
         if not last_seen:
-            most_recent_session = ServerSession.objects.filter(
-                staff=obj.staff if hasattr(obj, 'staff') else obj,
-                leave_time__isnull=False
-            ).order_by('-leave_time').first()
-            
-            if most_recent_session:
-                last_seen = most_recent_session.leave_time
-            else:
-                # Staff member has never been on the server
-                return 'Never'
+            # Staff member has never been on the server
+            return 'Never'
         
         now = timezone.now()
         diff = now - last_seen
@@ -253,9 +243,8 @@ class StaffSyncLogSerializer(serializers.ModelSerializer):
 class StaffDistributionSerializer(serializers.Serializer):
     """Serializer for staff distribution data."""
     
-    server_1 = serializers.ListField(child=StaffRosterSerializer())
-    server_2 = serializers.ListField(child=StaffRosterSerializer())
-    offline = serializers.ListField(child=StaffRosterSerializer())
+    servers = serializers.ListField(child=serializers.DictField())
+    offline = serializers.ListField(child=serializers.DictField())
 
 
 class RolePrioritySerializer(serializers.Serializer):
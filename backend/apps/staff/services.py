@@ -1,11 +1,18 @@
+import codecs
 import csv
+import hashlib
 import logging
+import time
+from contextlib import contextmanager
 from io import StringIO
 
 import requests
+from requests.adapters import HTTPAdapter
 from apps.system_settings.models import SystemSetting
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
 from .models import Staff, StaffHistoryEvent, StaffRoster, StaffSyncLog
@@ -13,6 +20,28 @@ from .models import Staff, StaffHistoryEvent, StaffRoster, StaffSyncLog
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Fields the roster sync writes
+STAFF_SYNC_FIELDS = [
+    'name', 'discord_id', 'discord_tag', 'current_role', 'current_role_priority',
+    'staff_status', 'staff_left_at', 'user',
+]
+ROSTER_SYNC_FIELDS = ['rank', 'rank_priority', 'timezone', 'active_time', 'is_active', 'last_synced']
+USER_SYNC_FIELDS = [
+    'role', 'role_priority', 'is_active_staff', 'is_legacy_staff', 'staff_left_at', 'staff_since',
+]
+
+_http_session = None
+
+
+def _get_http_session():
+    """Pooled HTTP session for sheet fetches, one per process."""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        _http_session = session
+    return _http_session
+
 
 class StaffSyncService:
     """Service for syncing staff data from Google Sheets."""
@@ -33,31 +62,103 @@ class StaffSyncService:
         # Using gid to specifically target the Staff Roster sheet tab
         return f"https://docs.google.com/spreadsheets/d/{self.sheet_id}/gviz/tq?tqx=out:csv&gid={self.SHEET_GID}"
     
-    def fetch_sheet_data(self):
-        """Fetch data from Google Sheets as CSV."""
+    @contextmanager
+    def open_sheet(self, etag='', last_modified=''):
+        """
+        Open the roster sheet CSV as a stream over the pooled HTTP session.
+        
+        Sends ``If-None-Match``/``If-Modified-Since`` when validators from a
+        previous fetch are given; Google answers 304 when the export is
+        unchanged.
+        
+        Yields a dict with ``lines`` (an iterator of decoded CSV lines read
+        from the response as it arrives, None on 304), ``digest`` (SHA-256
+        of the bytes read so far, for the content-hash fallback when no
+        validators are returned), ``etag`` and ``last_modified``.
+        """
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
         try:
-            response = requests.get(self.sheet_url, timeout=30)
-            response.raise_for_status()
-            return response.content.decode('utf-8')
+            with _get_http_session().get(self.sheet_url, headers=headers, timeout=30, stream=True) as response:
+                if response.status_code == 304:
+                    yield {
+                        'lines': None,
+                        'digest': None,
+                        'etag': etag,
+                        'last_modified': last_modified,
+                    }
+                    return
+                response.raise_for_status()
+                
+                digest = hashlib.sha256()
+                yield {
+                    'lines': self._iter_lines(response, digest),
+                    'digest': digest,
+                    'etag': response.headers.get('ETag', ''),
+                    'last_modified': response.headers.get('Last-Modified', ''),
+                }
         except requests.RequestException as e:
             logger.error(f"Error fetching Google Sheet: {e}")
             raise
     
+    @staticmethod
+    def _iter_lines(response, digest):
+        """Decoded lines of a streamed response (line endings kept, as csv.reader expects), hashing every chunk."""
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        pending = ''
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            digest.update(chunk)
+            # The last piece is a line cut by the chunk boundary (or '')
+            *lines, pending = (pending + decoder.decode(chunk)).split('\n')
+            for line in lines:
+                yield line + '\n'
+        pending += decoder.decode(b'', final=True)
+        if pending:
+            yield pending
+    
+    def fetch_sheet(self, etag='', last_modified=''):
+        """
+        Fetch the whole roster sheet as CSV (see open_sheet).
+        
+        Returns a dict with ``content`` (None on 304), ``content_hash``,
+        ``etag`` and ``last_modified``.
+        """
+        with self.open_sheet(etag=etag, last_modified=last_modified) as sheet:
+            content = ''.join(sheet['lines']) if sheet['lines'] is not None else None
+            return {
+                'content': content,
+                'content_hash': sheet['digest'].hexdigest() if content is not None else '',
+                'etag': sheet['etag'],
+                'last_modified': sheet['last_modified'],
+            }
+    
+    def fetch_sheet_data(self):
+        """Fetch data from Google Sheets as CSV."""
+        return self.fetch_sheet()['content']
+    
     def parse_csv_data(self, csv_content):
-        """Parse CSV content into list of dictionaries.
+        """Parse CSV content into list of dictionaries."""
+        return list(self.iter_staff_records(csv_content))
+    
+    def iter_staff_records(self, csv_content):
+        """Parse CSV content (a string, or an iterable of lines) into a stream of staff dictionaries.
         
         The Google Sheet exports with a quirky format:
         - Row 0 has headers merged with first data row: "Rank Manager", "Timezone GMT", etc.
         - Row 1+ has just values: "Manager", "GMT", etc.
         - Each row can have TWO staff members (columns 2-8 and 11-17)
-        """
-        staff_list = []
-        reader = csv.reader(StringIO(csv_content))
-        rows = list(reader)
         
-        if not rows:
-            logger.error("No data found in CSV")
-            return staff_list
+        Rows are read lazily and duplicates (by steam_id, first wins) are
+        dropped as they are seen.
+        """
+        lines = StringIO(csv_content) if isinstance(csv_content, str) else csv_content
+        reader = csv.reader(lines)
+        seen_steam_ids = set()
+        parsed = duplicates = 0
         
         # Fixed column positions based on sheet structure:
         # Only use Set 1: columns 2-8 (Rank, Timezone, Time, Name, SteamID, DiscordID, Discord Tag)
@@ -76,7 +177,7 @@ class StaffSyncService:
                 return value[len(prefix) + 1:].strip()
             return value
         
-        for row_num, row in enumerate(rows):
+        for row_num, row in enumerate(reader):
             if not row or len(row) < 7:
                 continue
             
@@ -132,29 +233,29 @@ class StaffSyncService:
                         'discord_tag': discord_tag if discord_tag else None,
                     }
                     
-                    # Only add if we have at least a name and one identifier
-                    if staff_data['name'] and (staff_data['steam_id'] or staff_data['discord_id']):
-                        staff_list.append(staff_data)
-                        logger.debug(f"Parsed staff member: {staff_data['name']} ({staff_data['rank']})")
-                    
                 except (IndexError, ValueError) as e:
                     logger.warning(f"Error parsing row {row_num}, column set {col_set}: {e}")
                     continue
+                
+                # Only add if we have at least a name and one identifier
+                if not (staff_data['name'] and (staff_data['steam_id'] or staff_data['discord_id'])):
+                    continue
+                
+                # Deduplicate by steam_id (keep first occurrence)
+                if parsed_steam_id and parsed_steam_id in seen_steam_ids:
+                    logger.debug(f"Skipping duplicate: {staff_data['name']} ({parsed_steam_id})")
+                    duplicates += 1
+                    continue
+                if parsed_steam_id:
+                    seen_steam_ids.add(parsed_steam_id)
+                
+                parsed += 1
+                logger.debug(f"Parsed staff member: {staff_data['name']} ({staff_data['rank']})")
+                yield staff_data
         
-        # Deduplicate by steam_id (keep first occurrence)
-        seen_steam_ids = set()
-        unique_staff = []
-        for staff in staff_list:
-            steam_id = staff.get('steam_id')
-            if steam_id and steam_id in seen_steam_ids:
-                logger.debug(f"Skipping duplicate: {staff['name']} ({steam_id})")
-                continue
-            if steam_id:
-                seen_steam_ids.add(steam_id)
-            unique_staff.append(staff)
-        
-        logger.info(f"Parsed {len(unique_staff)} unique staff members from CSV (removed {len(staff_list) - len(unique_staff)} duplicates)")
-        return unique_staff
+        if not parsed and not duplicates:
+            logger.error("No staff data found in CSV")
+        logger.info(f"Parsed {parsed} unique staff members from CSV (removed {duplicates} duplicates)")
     
     def _parse_steam_id(self, steam_id_raw):
         """Parse and clean Steam ID."""
@@ -182,187 +283,66 @@ class StaffSyncService:
         except (ValueError, TypeError):
             return None
     
-    def sync_staff_roster(self):
-        """Main sync method - fetches and updates staff roster."""
+    def sync_staff_roster(self, force=False):
+        """
+        Main sync method - fetches and updates staff roster.
+        
+        Incremental: the run stops early when the sheet answers 304 to the
+        last successful sync's validators or the CSV is byte-for-byte the
+        one that sync applied (unless ``force``), and rows
+        whose fingerprint matches the stored Staff/StaffRoster values are
+        skipped. The CSV is parsed line by line as the response arrives.
+        Changed records are written with bulk_create/bulk_update in one
+        transaction.
+        
+        Returns the StaffSyncLog; when the sheet was unchanged it is not
+        saved and has ``skipped`` set.
+        """
         log = StaffSyncLog()
         
         try:
-            # Fetch data
-            csv_content = self.fetch_sheet_data()
-            staff_data = self.parse_csv_data(csv_content)
+            previous = StaffSyncLog.objects.filter(success=True).exclude(content_hash='').first()
             
-            log.records_synced = len(staff_data)
+            # Fetch data, conditionally unless forced
+            validators = {}
+            if previous and not force:
+                validators = {'etag': previous.etag, 'last_modified': previous.last_modified}
             
-            # Track existing records by unique identifiers
-            existing_identifiers = set()
-            for entry in StaffRoster.objects.all():
-                identifier = self._get_unique_identifier(entry.staff.steam_id, entry.staff.discord_id, entry.staff.name)
-                existing_identifiers.add(identifier)
-            
-            processed_identifiers = set()
-            
-            for data in staff_data:
-                steam_id = data.get('steam_id')
-                discord_id = data.get('discord_id')
-                name = data.get('name')
-                
-                # Skip if no identifiable information
-                if not steam_id and not discord_id and not name:
-                    logger.warning(f"Skipping entry with no identifiable information: {data}")
-                    continue
-                
-                identifier = self._get_unique_identifier(steam_id, discord_id, name)
-                processed_identifiers.add(identifier)
-                
-                # Find or create Staff record first (by steam_id as primary key)
-                if not steam_id:
-                    logger.warning(f"Skipping staff member without Steam ID: {name}")
-                    continue
+            started = time.monotonic()
+            with self.open_sheet(**validators) as sheet:
+                # Time to the response headers; the body is read while parsing
+                log.fetch_duration_ms = int((time.monotonic() - started) * 1000)
                 
-                staff, staff_created = Staff.objects.get_or_create(
-                    steam_id=steam_id,
-                    defaults={
-                        'name': name,
-                        'discord_id': discord_id,
-                        'discord_tag': data['discord_tag'],
-                        'staff_status': 'active',
-                        'current_role': data['rank'],
-                        'current_role_priority': settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999),
-                        'staff_since': timezone.now(),
-                    }
-                )
-                
-                if not staff_created:
-                    # Update existing Staff record
-                    staff.name = name
-                    staff.discord_id = discord_id
-                    staff.discord_tag = data['discord_tag']
-                    staff.current_role = data['rank']
-                    staff.current_role_priority = settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999)
-                    staff.staff_status = 'active'
-                    staff.save()
-                
-                # Now find or create StaffRoster entry
-                roster_entry = StaffRoster.objects.filter(staff=staff).first()
-                
-                # Update or create the roster entry
-                if roster_entry:
-                    # Track if rank changed
-                    old_rank = roster_entry.rank
-                    old_rank_priority = roster_entry.rank_priority
-                    new_rank = data['rank']
-                    new_rank_priority = settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999)
-                    
-                    # Check if this staff was previously inactive (rejoining)
-                    was_inactive = not roster_entry.is_active
-                    
-                    # Update existing entry
-                    roster_entry.rank = new_rank
-                    roster_entry.rank_priority = new_rank_priority
-                    roster_entry.timezone = data['timezone']
-                    roster_entry.active_time = data['active_time']
-                    roster_entry.is_active = True
-                    roster_entry.save()
-                    log.records_updated += 1
-                    
-                    # Track history events
-                    if was_inactive:
-                        # Staff member rejoined
-                        StaffHistoryEvent.objects.create(
-                            staff=staff,
-                            event_type='rejoined',
-                            new_rank=new_rank,
-                            new_rank_priority=new_rank_priority,
-                            event_date=timezone.now(),
-                            auto_detected=True
-                        )
-                    elif old_rank != new_rank:
-                        # Rank changed - determine if promotion or demotion
-                        if new_rank_priority < old_rank_priority:
-                            event_type = 'promoted'
-                        elif new_rank_priority > old_rank_priority:
-                            event_type = 'demoted'
-                        else:
-                            event_type = 'role_change'
-                        
-                        StaffHistoryEvent.objects.create(
-                            staff=staff,
-                            event_type=event_type,
-                            old_rank=old_rank,
-                            new_rank=new_rank,
-                            old_rank_priority=old_rank_priority,
-                            new_rank_priority=new_rank_priority,
-                            event_date=timezone.now(),
-                            auto_detected=True
-                        )
-                else:
-                    # Create new roster entry
-                    roster_entry = StaffRoster.objects.create(
-                        staff=staff,
-                        rank=data['rank'],
-                        rank_priority=settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999),
-                        timezone=data['timezone'],
-                        active_time=data['active_time'],
-                        is_active=True,
-                    )
-                    log.records_added += 1
-                    
-                    # Track join event
-                    StaffHistoryEvent.objects.create(
-                        staff=staff,
-                        event_type='joined',
-                        new_rank=data['rank'],
-                        new_rank_priority=settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999),
-                        event_date=timezone.now(),
-                        auto_detected=True
-                    )
-                
-                # Link to user account if exists
-                self._link_to_user(staff)
+                if sheet['lines'] is not None:
+                    started = time.monotonic()
+                    rows = self._collect_rows(self.iter_staff_records(sheet['lines']), log)
+                    log.parse_duration_ms = int((time.monotonic() - started) * 1000)
+                    log.content_hash = sheet['digest'].hexdigest()
+                    log.etag = sheet['etag']
+                    log.last_modified = sheet['last_modified']
+            
+            unchanged = sheet['lines'] is None or (
+                previous is not None and previous.content_hash == log.content_hash
+            )
+            if not force and unchanged:
+                logger.info(f"Staff roster sheet unchanged since last sync, skipping "
+                           f"(fetch {log.fetch_duration_ms}ms)")
+                log.records_synced = previous.records_synced
+                log.content_hash = previous.content_hash
+                log.parse_duration_ms = None
+                log.skipped = True
+                return log
             
-            # Handle removed staff - mark roster entry as inactive (preserving all data)
-            removed_identifiers = existing_identifiers - processed_identifiers
-            if removed_identifiers:
-                # This is approximate - we need to find entries that weren't processed
-                for entry in StaffRoster.objects.filter(is_active=True):
-                    identifier = self._get_unique_identifier(entry.staff.steam_id, entry.staff.discord_id, entry.staff.name)
-                    if identifier in removed_identifiers:
-                        old_rank = entry.rank
-                        old_rank_priority = entry.rank_priority
-                        
-                        # Mark roster entry as inactive (preserves all data and history)
-                        entry.is_active = False
-                        entry.save()
-                        log.records_removed += 1
-                        
-                        # Update Staff status
-                        entry.staff.staff_status = 'inactive'
-                        entry.staff.staff_left_at = timezone.now()
-                        entry.staff.save(update_fields=['staff_status', 'staff_left_at'])
-                        
-                        # Update linked user account if exists
-                        if entry.staff.user:
-                            entry.staff.user.is_active_staff = False
-                            entry.staff.user.is_legacy_staff = True
-                            entry.staff.user.staff_left_at = timezone.now()
-                            entry.staff.user.save(update_fields=['is_active_staff', 'is_legacy_staff', 'staff_left_at'])
-                        
-                        # Track removal event
-                        StaffHistoryEvent.objects.create(
-                            staff=entry.staff,
-                            event_type='removed',
-                            old_rank=old_rank,
-                            old_rank_priority=old_rank_priority,
-                            event_date=timezone.now(),
-                            auto_detected=True
-                        )
+            with transaction.atomic():
+                self._apply_roster(rows, log)
             
             log.success = True
             log.save()
             
             logger.info(f"Staff sync completed: {log.records_synced} synced, "
                        f"{log.records_added} added, {log.records_updated} updated, "
-                       f"{log.records_removed} removed")
+                       f"{log.records_removed} removed "
+                       f"(fetch {log.fetch_duration_ms}ms, parse {log.parse_duration_ms}ms)")
             
             # Sync user access based on roster
             try:
@@ -381,48 +361,254 @@ class StaffSyncService:
             logger.error(f"Staff sync failed: {e}")
             raise
     
-    def _get_unique_identifier(self, steam_id, discord_id, name):
-        """Generate a unique identifier for a staff member."""
-        # Prefer steam_id, then discord_id, then name
-        if steam_id:
-            return f"steam:{steam_id}"
-        elif discord_id:
-            return f"discord:{discord_id}"
-        else:
-            return f"name:{name}"
+    @staticmethod
+    def _row_fingerprint(data):
+        """Fingerprint of a parsed sheet row, as it would be stored."""
+        return (
+            data['name'], data.get('discord_id'), data.get('discord_tag'),
+            data['rank'], settings.STAFF_ROLE_PRIORITIES.get(data['rank'], 999),
+            data['timezone'], data['active_time'],
+        )
     
-    def _link_to_user(self, staff):
-        """Link staff to user account if exists."""
-        user = None
+    @staticmethod
+    def _stored_fingerprint(staff, roster):
+        """Fingerprint of an active staff member's stored Staff/StaffRoster values."""
+        return (
+            staff.name, staff.discord_id, staff.discord_tag,
+            roster.rank, roster.rank_priority,
+            roster.timezone, roster.active_time,
+        )
+    
+    def _collect_rows(self, staff_records, log):
+        """Consume parsed staff records into {steam_id: data}, counting them on the log."""
+        rows = {}
+        for data in staff_records:
+            log.records_synced += 1
+            # Staff records are keyed by steam_id
+            if not data.get('steam_id'):
+                logger.warning(f"Skipping staff member without Steam ID: {data.get('name')}")
+                continue
+            rows[data['steam_id']] = data
+        return rows
+    
+    def _apply_roster(self, rows, log):
+        """Diff parsed rows ({steam_id: data}) against the database and write only the changes."""
+        now = timezone.now()
+        
+        # Two queries for the whole roster; an active entry wins over inactive ones
+        staff_by_id = {staff.steam_id: staff for staff in Staff.objects.select_related('user')}
+        roster_by_staff = {}
+        for entry in StaffRoster.objects.order_by('-is_active', 'id'):
+            roster_by_staff.setdefault(entry.staff_id, entry)
+        
+        staff_to_create, staff_to_update = [], []
+        roster_to_create, roster_to_update = [], []
+        users_to_update = {}
+        events = []
+        
+        for steam_id, data in rows.items():
+            staff = staff_by_id.get(steam_id)
+            roster = roster_by_staff.get(steam_id)
+            active = (
+                staff is not None and staff.staff_status == 'active'
+                and roster is not None and roster.is_active
+            )
+            if active and self._stored_fingerprint(staff, roster) == self._row_fingerprint(data):
+                continue
+            
+            new_rank = data['rank']
+            new_rank_priority = settings.STAFF_ROLE_PRIORITIES.get(new_rank, 999)
+            
+            if staff is None:
+                staff = Staff(
+                    steam_id=steam_id,
+                    staff_status='active',
+                    staff_since=now,
+                )
+                staff_by_id[steam_id] = staff
+                staff_to_create.append(staff)
+            else:
+                staff_to_update.append(staff)
+            staff.name = data['name']
+            staff.discord_id = data.get('discord_id')
+            staff.discord_tag = data.get('discord_tag')
+            staff.current_role = new_rank
+            staff.current_role_priority = new_rank_priority
+            staff.staff_status = 'active'
+            
+            if roster is None:
+                roster_to_create.append(StaffRoster(
+                    staff=staff,
+                    rank=new_rank,
+                    rank_priority=new_rank_priority,
+                    timezone=data['timezone'],
+                    active_time=data['active_time'],
+                    is_active=True,
+                ))
+                log.records_added += 1
+                
+                # Track join event
+                events.append(StaffHistoryEvent(
+                    staff=staff,
+                    event_type='joined',
+                    new_rank=new_rank,
+                    new_rank_priority=new_rank_priority,
+                    event_date=now,
+                    auto_detected=True
+                ))
+                continue
+            
+            # Track if rank changed
+            old_rank = roster.rank
+            old_rank_priority = roster.rank_priority
+            
+            # Check if this staff was previously inactive (rejoining)
+            was_inactive = not roster.is_active
+            
+            roster.rank = new_rank
+            roster.rank_priority = new_rank_priority
+            roster.timezone = data['timezone']
+            roster.active_time = data['active_time']
+            roster.is_active = True
+            roster.last_synced = now
+            roster_to_update.append(roster)
+            log.records_updated += 1
+            
+            # Track history events
+            if was_inactive:
+                # Staff member rejoined
+                events.append(StaffHistoryEvent(
+                    staff=staff,
+                    event_type='rejoined',
+                    new_rank=new_rank,
+                    new_rank_priority=new_rank_priority,
+                    event_date=now,
+                    auto_detected=True
+                ))
+            elif old_rank != new_rank:
+                # Rank changed - determine if promotion or demotion
+                if new_rank_priority < old_rank_priority:
+                    event_type = 'promoted'
+                elif new_rank_priority > old_rank_priority:
+                    event_type = 'demoted'
+                else:
+                    event_type = 'role_change'
+                
+                events.append(StaffHistoryEvent(
+                    staff=staff,
+                    event_type=event_type,
+                    old_rank=old_rank,
+                    new_rank=new_rank,
+                    old_rank_priority=old_rank_priority,
+                    new_rank_priority=new_rank_priority,
+                    event_date=now,
+                    auto_detected=True
+                ))
+        
+        # Handle removed staff - mark roster entry as inactive (preserving all data)
+        for steam_id, entry in roster_by_staff.items():
+            if not entry.is_active or steam_id in rows:
+                continue
+            staff = staff_by_id[steam_id]
+            
+            entry.is_active = False
+            entry.last_synced = now
+            roster_to_update.append(entry)
+            log.records_removed += 1
+            
+            staff.staff_status = 'inactive'
+            staff.staff_left_at = now
+            staff_to_update.append(staff)
+            
+            # Update linked user account if exists
+            if staff.user:
+                staff.user.is_active_staff = False
+                staff.user.is_legacy_staff = True
+                staff.user.staff_left_at = now
+                users_to_update[staff.user.pk] = staff.user
+            
+            # Track removal event
+            events.append(StaffHistoryEvent(
+                staff=staff,
+                event_type='removed',
+                old_rank=entry.rank,
+                old_rank_priority=entry.rank_priority,
+                event_date=now,
+                auto_detected=True
+            ))
         
-        # Try to find by Steam ID first
-        if staff.steam_id:
-            user = User.objects.filter(steam_id=staff.steam_id).first()
+        # Link to user accounts if they exist
+        self._link_to_users(
+            [staff_by_id[steam_id] for steam_id in rows],
+            staff_to_update,
+            users_to_update,
+            now,
+        )
         
-        # Try Discord ID if no Steam match
-        if not user and staff.discord_id:
-            user = User.objects.filter(discord_id=staff.discord_id).first()
+        if staff_to_create:
+            Staff.objects.bulk_create(staff_to_create)
+        if staff_to_update:
+            Staff.objects.bulk_update(
+                list({staff.steam_id: staff for staff in staff_to_update}.values()),
+                STAFF_SYNC_FIELDS,
+            )
+        if roster_to_create:
+            StaffRoster.objects.bulk_create(roster_to_create)
+        if roster_to_update:
+            StaffRoster.objects.bulk_update(roster_to_update, ROSTER_SYNC_FIELDS)
+        if users_to_update:
+            User.objects.bulk_update(list(users_to_update.values()), USER_SYNC_FIELDS)
+        if events:
+            StaffHistoryEvent.objects.bulk_create(events)
+    
+    def _link_to_users(self, staff_list, staff_to_update, users_to_update, now):
+        """
+        Link staff to user accounts if they exist, and keep the accounts' role
+        and staff flags in line with the roster. Only records that actually
+        change are queued for update.
+        """
+        steam_ids = [staff.steam_id for staff in staff_list]
+        discord_ids = [staff.discord_id for staff in staff_list if staff.discord_id]
+        users = User.objects.filter(Q(steam_id__in=steam_ids) | Q(discord_id__in=discord_ids))
+        by_steam = {user.steam_id: user for user in users if user.steam_id}
+        by_discord = {user.discord_id: user for user in users if user.discord_id}
         
-        if user:
-            staff.user = user
-            staff.save(update_fields=['user'])
+        for staff in staff_list:
+            # Try to find by Steam ID first, then Discord ID
+            user = by_steam.get(staff.steam_id) or by_discord.get(staff.discord_id)
+            if not user:
+                continue
+            user = users_to_update.get(user.pk, user)
+            
+            if staff.user_id != user.pk:
+                staff.user = user
+                staff_to_update.append(staff)
             
-            # Check if user is returning from legacy staff
             if user.is_legacy_staff:
                 # Re-added to staff roster - promote to SYSADMIN
-                user.role = 'SYSADMIN'
-                user.role_priority = 0
-                user.is_active_staff = True
-                user.is_legacy_staff = False
-                user.staff_left_at = None
-                user.save(update_fields=['role', 'role_priority', 'is_active_staff', 'is_legacy_staff', 'staff_left_at'])
+                changes = {
+                    'role': 'SYSADMIN',
+                    'role_priority': settings.STAFF_ROLE_PRIORITIES.get('SYSADMIN', 0),
+                    'is_active_staff': True,
+                    'is_legacy_staff': False,
+                    'staff_left_at': None,
+                }
                 logger.info(f"Re-added legacy staff {user.username} as SYSADMIN")
             else:
                 # Update user role to match roster
-                user.role = staff.current_role
-                user.role_priority = staff.current_role_priority
-                user.is_active_staff = True
-                user.save(update_fields=['role', 'role_priority', 'is_active_staff'])
+                changes = {
+                    'role': staff.current_role,
+                    'role_priority': staff.current_role_priority,
+                    'is_active_staff': True,
+                }
+            
+            if any(getattr(user, field) != value for field, value in changes.items()):
+                for field, value in changes.items():
+                    setattr(user, field, value)
+                # bulk_update skips the post_save signal that sets this
+                if not user.staff_since:
+                    user.staff_since = now
+                users_to_update[user.pk] = user
     
     def get_staff_member_data(self, steam_id=None, discord_id=None):
         """Get staff member data by Steam ID or Discord ID."""
@@ -0,0 +1,160 @@
+"""
+Daily, weekly and monthly ServerSessionAggregate buckets.
+
+Each run finds the closed ServerSessions changed since the watermark (the
+newest aggregate write, minus a safety margin), works out which buckets they
+fall into and recomputes those buckets with one GROUP BY per period over
+staff, server and period start. Results are upserted in bulk. Buckets are
+always recomputed from their sessions rather than incremented, so runs are
+idempotent and sessions seen twice (inside the margin) are never
+double-counted.
+
+Weeks run Saturday to Friday, matching apps.utils.get_week_start.
+"""
+import logging
+from datetime import timedelta
+
+from django.db.models import Avg, Count, DateField, DateTimeField, ExpressionWrapper, F, Max, Sum
+from django.db.models.functions import TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from apps.utils import get_week_start
+
+from .models import ServerSession, ServerSessionAggregate
+
+logger = logging.getLogger(__name__)
+
+AGGREGATE_FIELDS = [
+    'period_end', 'total_time', 'session_count', 'avg_session_time',
+    'longest_session', 'last_updated',
+]
+
+# Sessions updated this long before the watermark are folded in again, so
+# rows committed late by a concurrent poll are not missed
+WATERMARK_MARGIN = timedelta(minutes=10)
+
+PERIOD_TYPES = ['daily', 'weekly', 'monthly']
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def period_bounds(period_type, day):
+    """(period_start, period_end) of the bucket containing ``day``."""
+    if period_type == 'daily':
+        return day, day
+    if period_type == 'weekly':
+        start = get_week_start(day)
+        return start, start + timedelta(days=6)
+    start = day.replace(day=1)
+    return start, _next_month(start) - timedelta(days=1)
+
+
+def _period_expression(period_type):
+    """SQL expression for the local date a session's bucket starts on."""
+    if period_type == 'daily':
+        return TruncDate('join_time')
+    if period_type == 'weekly':
+        # TruncWeek starts weeks on Monday; shifting by two days lines
+        # Saturdays up with Mondays, the shift is undone in _bucket_start
+        shifted = ExpressionWrapper(F('join_time') + timedelta(days=2), output_field=DateTimeField())
+        return TruncWeek(shifted, output_field=DateField())
+    return TruncMonth('join_time', output_field=DateField())
+
+
+def _bucket_start(period_type, value):
+    if period_type == 'weekly':
+        return value - timedelta(days=2)
+    return value
+
+
+def get_watermark():
+    """
+    Point from which changed sessions are folded in, or None when nothing
+    has been aggregated yet (full backfill).
+    """
+    latest = ServerSessionAggregate.objects.filter(
+        period_type__in=PERIOD_TYPES
+    ).aggregate(latest=Max('last_updated'))['latest']
+    if latest is None:
+        return None
+    return latest - WATERMARK_MARGIN
+
+
+class SessionAggregationService:
+    """Builds ServerSessionAggregate buckets from closed ServerSessions."""
+
+    def run(self):
+        """Aggregate every period. Returns a summary dict."""
+        since = get_watermark()
+        closed = ServerSession.objects.filter(leave_time__isnull=False)
+        changed = closed
+        if since:
+            changed = changed.filter(updated_at__gte=since)
+
+        # Local join dates and staff touched since the last run
+        touched = list(
+            changed.annotate(day=TruncDate('join_time'))
+            .values_list('staff_id', 'day')
+            .distinct()
+        )
+        result = {'sessions_since': since.isoformat() if since else None}
+        if not touched:
+            return {**result, **{period: 0 for period in PERIOD_TYPES}}
+
+        staff_ids = {staff_id for staff_id, _ in touched}
+        days = {day for _, day in touched}
+        for period_type in PERIOD_TYPES:
+            result[period_type] = self.aggregate_period(period_type, closed, staff_ids, days)
+        return result
+
+    def aggregate_period(self, period_type, sessions, staff_ids, days):
+        """Recompute the buckets of one period covering the given days."""
+        periods = {period_bounds(period_type, day) for day in days}
+        first = min(start for start, _ in periods)
+        last = max(end for _, end in periods)
+
+        rows = sessions.filter(
+            staff_id__in=staff_ids,
+            join_time__date__gte=first,
+            join_time__date__lte=last,
+        ).annotate(
+            bucket=_period_expression(period_type)
+        ).values('staff_id', 'server_id', 'bucket').annotate(
+            total_time=Sum('duration'),
+            session_count=Count('id'),
+            avg_duration=Avg('duration'),
+            longest_session=Max('duration'),
+        ).order_by()
+
+        return self._upsert(period_type, rows)
+
+    def _upsert(self, period_type, rows):
+        now = timezone.now()
+        aggregates = []
+        for row in rows:
+            period_start, period_end = period_bounds(
+                period_type, _bucket_start(period_type, row['bucket'])
+            )
+            aggregates.append(ServerSessionAggregate(
+                staff_id=row['staff_id'],
+                server_id=row['server_id'],
+                period_type=period_type,
+                period_start=period_start,
+                period_end=period_end,
+                total_time=row['total_time'] or 0,
+                session_count=row['session_count'] or 0,
+                avg_session_time=int(row['avg_duration'] or 0),
+                longest_session=row['longest_session'] or 0,
+                last_updated=now,
+            ))
+        if aggregates:
+            ServerSessionAggregate.objects.bulk_create(
+                aggregates,
+                batch_size=1000,
+                update_conflicts=True,
+                unique_fields=['staff', 'server', 'period_type', 'period_start'],
+                update_fields=AGGREGATE_FIELDS,
+            )
+        return len(aggregates)
@@ -0,0 +1,274 @@
+"""
+Steam persona name sync for staff.
+
+The poller matches server players to staff by roster name and by Steam
+persona name, so renamed staff go unrecognised until their Steam name is
+refreshed. sync_steam_names() looks up persona names with GetPlayerSummaries
+(100 IDs per request), sending the batches concurrently over a pooled HTTP
+session, and writes every fetched name with one bulk_update.
+
+Two entry points use it:
+
+* full sync (sync_staff_steam_names task, twice a day): every active staff
+  member,
+* incremental sync (sync_recent_staff_steam_names task, every few minutes):
+  staff who are active right now (in the app, on Discord, or seen in the
+  last RECENT_WINDOW) but not matched on any server, i.e. the ones a rename
+  could be hiding, at most once per RECENT_WINDOW each; plus staff without a
+  Steam name (also at most once per RECENT_WINDOW) and staff the full sync
+  has missed for longer than STALE_AFTER.
+
+steam_name_last_updated is stamped for every staff member looked up, even
+when Steam returns no persona name for them (bad ID, deleted account), so
+they do not match the "never fetched" condition on every run. Staff in a
+batch whose request failed are not stamped and are retried.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .models import Staff
+
+logger = logging.getLogger(__name__)
+
+PLAYER_SUMMARIES_URL = "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/"
+
+# Steam API allows up to 100 Steam IDs per request
+BATCH_SIZE = 100
+MAX_WORKERS = 4
+
+RECENT_WINDOW = timedelta(minutes=30)
+# Longer than the gap between full syncs; only catches staff a sweep missed
+STALE_AFTER = timedelta(hours=24)
+
+_http_session = None
+
+
+def _get_http_session():
+    """Pooled HTTP session for Steam API requests, one per process."""
+    global _http_session
+    if _http_session is None:
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS))
+        _http_session = session
+    return _http_session
+
+
+def _convert_to_steam64(steam_id):
+    """
+    Convert various Steam ID formats to Steam64.
+    
+    Supports:
+    - Steam64 (76561198xxxxxxxxx)
+    - STEAM_X:Y:Z format
+    - [U:1:X] format
+    """
+    if not steam_id:
+        return None
+    
+    steam_id = str(steam_id).strip()
+    
+    # Already Steam64
+    if steam_id.isdigit() and len(steam_id) == 17 and steam_id.startswith('7656119'):
+        return steam_id
+    
+    # STEAM_X:Y:Z format
+    if steam_id.upper().startswith('STEAM_'):
+        try:
+            parts = steam_id.upper().replace('STEAM_', '').split(':')
+            if len(parts) == 3:
+                y = int(parts[1])
+                z = int(parts[2])
+                steam64 = 76561197960265728 + (z * 2) + y
+                return str(steam64)
+        except (ValueError, IndexError):
+            pass
+    
+    # [U:1:X] format
+    if steam_id.startswith('[U:'):
+        try:
+            account_id = int(steam_id.replace('[U:1:', '').replace(']', ''))
+            steam64 = 76561197960265728 + account_id
+            return str(steam64)
+        except ValueError:
+            pass
+    
+    # Try as raw account ID
+    try:
+        if steam_id.isdigit():
+            account_id = int(steam_id)
+            if account_id < 76561197960265728:
+                # Likely an account ID
+                steam64 = 76561197960265728 + account_id
+                return str(steam64)
+            else:
+                # Already a Steam64
+                return steam_id
+    except ValueError:
+        pass
+    
+    logger.warning(f"Could not convert Steam ID to Steam64: {steam_id}")
+    return None
+
+
+def _fetch_batch(api_key, batch):
+    """{steam64: persona_name} for one batch of Steam64 IDs."""
+    response = _get_http_session().get(
+        PLAYER_SUMMARIES_URL,
+        params={
+            'key': api_key,
+            'steamids': ','.join(batch)
+        },
+        timeout=30
+    )
+    if response.status_code != 200:
+        raise requests.RequestException(f"Steam API returned status {response.status_code}")
+
+    players = response.json().get('response', {}).get('players', [])
+    return {
+        player['steamid']: player['personaname']
+        for player in players
+        if player.get('steamid') and player.get('personaname')
+    }
+
+
+def fetch_persona_names(api_key, steam_ids_64):
+    """
+    Persona names for Steam64 IDs, batches sent concurrently.
+
+    Returns:
+        ({steam64: persona_name}, [error messages], {steam64 in failed batches})
+    """
+    batches = [steam_ids_64[i:i + BATCH_SIZE] for i in range(0, len(steam_ids_64), BATCH_SIZE)]
+    names = {}
+    errors = []
+    failed = set()
+
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(batches)) or 1) as executor:
+        futures = [
+            (i * BATCH_SIZE, batch, executor.submit(_fetch_batch, api_key, batch))
+            for i, batch in enumerate(batches)
+        ]
+        for start, batch, future in futures:
+            try:
+                names.update(future.result())
+            except requests.exceptions.Timeout:
+                error_msg = f"Steam API request timed out for batch starting at index {start}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                failed.update(batch)
+            except Exception as e:
+                error_msg = f"Error fetching Steam names for batch {start}: {e}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+                failed.update(batch)
+
+    return names, errors, failed
+
+
+def incremental_queryset(now=None):
+    """Active staff due for a Steam name refresh in an incremental run."""
+    from .models import ServerSession
+
+    now = now or timezone.now()
+    recent = now - RECENT_WINDOW
+
+    # Staff matched on a server right now (the poller keeps a session open)
+    matched = ServerSession.objects.filter(leave_time__isnull=True).values('staff_id')
+
+    active_unmatched = (
+        (
+            Q(roster_entries__is_active=True, roster_entries__is_active_in_app=True) |
+            Q(roster_entries__is_active=True, roster_entries__discord_status__in=['online', 'idle', 'dnd']) |
+            Q(last_seen__gte=recent)
+        ) &
+        ~Q(steam_id__in=matched) &
+        (Q(steam_name_last_updated__isnull=True) | Q(steam_name_last_updated__lt=recent))
+    )
+
+    # Staff without a Steam name, retried at most once per RECENT_WINDOW
+    unnamed = (
+        (Q(steam_name__isnull=True) | Q(steam_name='')) &
+        (Q(steam_name_last_updated__isnull=True) | Q(steam_name_last_updated__lt=recent))
+    )
+
+    return Staff.objects.filter(staff_status='active').filter(
+        active_unmatched |
+        unnamed |
+        Q(steam_name_last_updated__isnull=True) |
+        Q(steam_name_last_updated__lt=now - STALE_AFTER)
+    ).distinct()
+
+
+def sync_steam_names(staff_queryset):
+    """
+    Refresh Steam names for the given staff.
+
+    Returns a result dict for the task/view: success, updated (names that
+    changed), total (staff looked up) and errors.
+    """
+    steam_api_key = getattr(settings, 'SOCIAL_AUTH_STEAM_API_KEY', None)
+    if not steam_api_key:
+        logger.warning("Steam API key not configured, skipping Steam name sync")
+        return {'success': False, 'error': 'Steam API key not configured'}
+
+    now = timezone.now()
+    staff_by_steam64 = {}
+    unconvertible = []
+    for staff in staff_queryset.exclude(steam_id__isnull=True).exclude(steam_id=''):
+        steam64 = _convert_to_steam64(staff.steam_id)
+        if steam64:
+            staff_by_steam64[steam64] = staff
+        else:
+            # Cannot be looked up; stamp it so incremental runs do not keep retrying
+            staff.steam_name_last_updated = now
+            unconvertible.append(staff)
+
+    if unconvertible:
+        Staff.objects.bulk_update(unconvertible, ['steam_name_last_updated'], batch_size=500)
+
+    if not staff_by_steam64:
+        return {'success': True, 'updated': 0, 'total': 0}
+
+    names, errors, failed = fetch_persona_names(steam_api_key, list(staff_by_steam64))
+
+    fetched = []
+    updated_count = 0
+    for steam64, staff in staff_by_steam64.items():
+        if steam64 in failed:
+            continue
+
+        persona_name = names.get(steam64)
+        if persona_name is None:
+            # Looked up, but Steam returned no persona name; keep the old one
+            logger.debug(f"No Steam persona name returned for {staff.name} ({steam64})")
+        elif staff.steam_name != persona_name:
+            # Only log/count if name changed or never synced
+            if staff.steam_name:
+                logger.info(f"Updated Steam name for {staff.name}: '{staff.steam_name}' -> '{persona_name}'")
+            else:
+                logger.info(f"Set Steam name for {staff.name}: '{persona_name}'")
+            staff.steam_name = persona_name
+            updated_count += 1
+
+        # Update timestamp even if name unchanged
+        staff.steam_name_last_updated = now
+        fetched.append(staff)
+
+    if fetched:
+        Staff.objects.bulk_update(fetched, ['steam_name', 'steam_name_last_updated'], batch_size=500)
+
+    logger.info(f"Steam name sync completed: {updated_count}/{len(staff_by_steam64)} names updated")
+
+    return {
+        'success': len(errors) == 0,
+        'updated': updated_count,
+        'total': len(staff_by_steam64),
+        'errors': errors if errors else None,
+    }
@@ -0,0 +1,146 @@
+"""
+Query-count tests for roster serialization and tests for the incremental
+Steam name sync.
+
+Run with ``python manage.py test apps.staff`` (PostgreSQL, like the app).
+The presence registry is stubbed out so no Redis is needed.
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.servers.models import GameServer
+
+from . import steam_names
+from .models import ServerSession, Staff, StaffRoster
+from .querysets import annotate_roster_status
+from .serializers import StaffRosterSerializer
+
+
+@mock.patch('apps.staff.presence.get_online', lambda: {})
+class StaffRosterQueryCountTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username='viewer')
+        cls.server = GameServer.objects.create(name='Test', ip_address='127.0.0.1', port=27015)
+
+    def _add_staff(self, count):
+        now = timezone.now()
+        for _ in range(count):
+            index = Staff.objects.count()
+            staff = Staff.objects.create(steam_id=f'STEAM_0:0:{index}', name=f'Staff {index}')
+            StaffRoster.objects.create(staff=staff, rank='Moderator')
+            ServerSession.objects.create(
+                staff=staff, server=self.server, steam_id=staff.steam_id,
+                join_time=now - timedelta(hours=2), leave_time=now - timedelta(hours=1),
+            )
+
+    def _count_queries(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries.captured_queries)
+
+    def test_roster_list_query_count_does_not_grow_with_rows(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        self._add_staff(2)
+        small = self._count_queries(lambda: client.get('/api/staff/roster/'))
+        self._add_staff(8)
+        response = None
+
+        def get():
+            nonlocal response
+            response = client.get('/api/staff/roster/')
+
+        large = self._count_queries(get)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 10)
+        self.assertEqual(small, large)
+
+    def test_unannotated_list_is_completed_in_one_query(self):
+        self._add_staff(6)
+        entries = list(StaffRoster.objects.select_related('staff', 'staff__user'))
+
+        data = None
+
+        def serialize():
+            nonlocal data
+            data = StaffRosterSerializer(entries, many=True).data
+
+        with self.assertLogs('apps.staff.querysets', level='WARNING'):
+            self.assertEqual(self._count_queries(serialize), 1)
+        self.assertEqual([row['session_count'] for row in data], [1] * 6)
+        self.assertTrue(all(row['last_session_end'] for row in data))
+
+    def test_annotated_list_needs_no_queries(self):
+        self._add_staff(6)
+        entries = list(annotate_roster_status(StaffRoster.objects.all()))
+
+        self.assertEqual(
+            self._count_queries(lambda: StaffRosterSerializer(entries, many=True).data), 0
+        )
+
+    def test_unannotated_instance_is_serialized(self):
+        self._add_staff(1)
+        entry = StaffRoster.objects.get()
+
+        with self.assertLogs('apps.staff.querysets', level='WARNING'):
+            data = StaffRosterSerializer(entry).data
+        self.assertEqual(data['session_count'], 1)
+
+
+@override_settings(SOCIAL_AUTH_STEAM_API_KEY='test-key')
+class IncrementalSteamNameSyncTests(TestCase):
+
+    def setUp(self):
+        self.named = Staff.objects.create(steam_id='STEAM_0:0:1', name='Named')
+        self.deleted = Staff.objects.create(steam_id='STEAM_0:0:2', name='Deleted')
+        self.bad_id = Staff.objects.create(steam_id='not-a-steam-id', name='Bad ID')
+        self.steam64 = {
+            staff.pk: steam_names._convert_to_steam64(staff.steam_id)
+            for staff in (self.named, self.deleted)
+        }
+
+    def _sync(self, fetch_batch):
+        with mock.patch.object(steam_names, '_fetch_batch', fetch_batch):
+            return steam_names.sync_steam_names(steam_names.incremental_queryset())
+
+    def test_unnamed_staff_are_stamped_and_rate_limited(self):
+        named64 = self.steam64[self.named.pk]
+        result = self._sync(lambda api_key, batch: {named64: 'Persona'})
+
+        self.assertEqual(result['updated'], 1)
+        for staff in (self.named, self.deleted, self.bad_id):
+            staff.refresh_from_db()
+            self.assertIsNotNone(staff.steam_name_last_updated, staff.name)
+        self.assertEqual(self.named.steam_name, 'Persona')
+        self.assertFalse(self.deleted.steam_name)
+
+        # Nobody is due again until RECENT_WINDOW has passed
+        self.assertFalse(steam_names.incremental_queryset().exists())
+        later = timezone.now() + steam_names.RECENT_WINDOW + timedelta(minutes=1)
+        self.assertEqual(
+            set(steam_names.incremental_queryset(now=later)), {self.deleted, self.bad_id}
+        )
+
+    def test_failed_batch_is_not_stamped(self):
+        def fail(api_key, batch):
+            raise steam_names.requests.RequestException('boom')
+
+        result = self._sync(fail)
+
+        self.assertFalse(result['success'])
+        for staff in (self.named, self.deleted):
+            staff.refresh_from_db()
+            self.assertIsNone(staff.steam_name_last_updated, staff.name)
+        self.assertEqual(
+            set(steam_names.incremental_queryset()), {self.named, self.deleted}
+        )
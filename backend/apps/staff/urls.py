@@ -4,7 +4,8 @@ from .views import (BackfillLastSeenView, DeleteHistoryEventView,
                     DiscordBotStatusView, DiscordStatusSyncView,
                     FixLastSeenView, MyStaffProfileView, RecentPromotionsView,
                     RolePrioritiesView, ServerTimeLeaderboardView,
-                    StaffDailyBreakdownView, StaffDetailsView,
+                    StaffDailyBreakdownView, StaffDailyTimeView,
+                    StaffDetailsView,
                     StaffRosterDetailView, StaffRosterListView,
                     StaffSessionsView, StaffStatsView, StaffSyncLogListView,
                     StaffSyncView, SteamNameSyncView)
@@ -16,6 +17,7 @@ urlpatterns = [
     re_path(r'^roster/(?P<pk>\d+)/sessions/?$', StaffSessionsView.as_view(), name='staff_sessions'),
     re_path(r'^roster/(?P<pk>\d+)/stats/?$', StaffStatsView.as_view(), name='staff_stats'),
     re_path(r'^roster/(?P<pk>[^/]+)/daily-breakdown/?$', StaffDailyBreakdownView.as_view(), name='staff_daily_breakdown'),
+    re_path(r'^roster/(?P<pk>[^/]+)/daily-time/?$', StaffDailyTimeView.as_view(), name='staff_daily_time'),
     re_path(r'^sync/?$', StaffSyncView.as_view(), name='staff_sync'),
     re_path(r'^sync/logs/?$', StaffSyncLogListView.as_view(), name='staff_sync_logs'),
     re_path(r'^sync/steam-names/?$', SteamNameSyncView.as_view(), name='steam_name_sync'),
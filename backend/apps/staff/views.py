@@ -12,6 +12,7 @@ from rest_framework.views import APIView
 from .discord_service import get_bot_instance, sync_discord_statuses
 from .models import (ServerSession, ServerSessionAggregate, Staff, StaffRoster,
                      StaffSyncLog)
+from .querysets import annotate_roster_status
 from .serializers import (RolePrioritySerializer,
                           ServerSessionAggregateSerializer,
                           ServerSessionSerializer, StaffDetailsSerializer,
@@ -46,6 +47,9 @@ class StaffRosterListView(generics.ListAPIView):
             # Default: only active staff
             queryset = StaffRoster.objects.filter(is_active=True)
         
+        # Online status and last-seen data for the serializer, in the same query
+        queryset = annotate_roster_status(queryset)
+        
         # Exclude builders if system setting is enabled
         try:
             from apps.system_settings.models import SystemSetting
@@ -59,19 +63,22 @@ class StaffRosterListView(generics.ListAPIView):
         if rank:
             queryset = queryset.filter(rank=rank)
         
-        # Search by name or Steam ID (name is on related Staff model)
+        # Search by name, Steam name or Steam ID (on the related Staff model),
+        # including fuzzy (trigram) name matches such as renamed staff
         search = self.request.query_params.get('search')
         if search:
-            queryset = queryset.filter(
-                Q(staff__name__icontains=search) |
-                Q(staff__steam_id__icontains=search)
-            )
+            from apps.servers.name_search import filter_staff_by_name
+            queryset = filter_staff_by_name(queryset, search)
         
         # Filter by role
         role = self.request.query_params.get('role')
         if role and role != 'all':
             queryset = queryset.filter(rank=role)
         
+        # Without an explicit ordering, rank search results by similarity
+        if search and 'ordering' not in self.request.query_params:
+            return queryset.order_by('-similarity', 'rank_priority', 'staff__name')
+        
         # Handle ordering parameter
         ordering = self.request.query_params.get('ordering', 'rank_priority,staff__name')
         # Allow multiple ordering fields separated by comma
@@ -101,7 +108,7 @@ class StaffRosterDetailView(generics.RetrieveAPIView):
     """Get a specific staff member."""
     serializer_class = StaffRosterSerializer
     permission_classes = [permissions.IsAuthenticated]
-    queryset = StaffRoster.objects.all()  # Include inactive/legacy staff
+    queryset = annotate_roster_status(StaffRoster.objects.all())  # Include inactive/legacy staff
 
 
 class StaffSyncView(APIView):
@@ -111,7 +118,8 @@ class StaffSyncView(APIView):
     def post(self, request):
         try:
             service = StaffSyncService()
-            log = service.sync_staff_roster()
+            # Manual syncs always apply the sheet, even if it looks unchanged
+            log = service.sync_staff_roster(force=True)
             return Response({
                 'message': 'Sync completed successfully',
                 'details': StaffSyncLogSerializer(log).data
@@ -229,16 +237,14 @@ class MyStaffProfileView(APIView):
         user = request.user
         
         # Try to find roster entry
-        roster = StaffRoster.objects.filter(
-            is_active=True
-        ).filter(
-            steam_id=user.steam_id
+        active_roster = annotate_roster_status(StaffRoster.objects.filter(is_active=True))
+        roster = active_roster.filter(
+            staff_id=user.steam_id
         ).first() if user.steam_id else None
         
         if not roster and user.discord_id:
-            roster = StaffRoster.objects.filter(
-                is_active=True,
-                discord_id=user.discord_id
+            roster = active_roster.filter(
+                staff__discord_id=user.discord_id
             ).first()
         
         if roster:
@@ -381,6 +387,25 @@ class StaffStatsView(APIView):
         })
 
 
+def _start_last_seen_job(mode):
+    """Queue a last_seen job and return the 202 response pointing at its progress."""
+    from . import last_seen
+    from .tasks import backfill_last_seen
+    
+    job = last_seen.create_job(mode)
+    backfill_last_seen.delay(mode, job['job_id'])
+    return Response(job, status=status.HTTP_202_ACCEPTED)
+
+
+def _last_seen_job_response(job_id):
+    from . import last_seen
+    
+    job = last_seen.get_job(job_id)
+    if job is None:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job)
+
+
 class BackfillLastSeenView(APIView):
     """Backfill last_seen timestamps for staff members based on server sessions."""
     permission_classes = [permissions.IsAuthenticated, IsManager]
@@ -388,120 +413,62 @@ class BackfillLastSeenView(APIView):
     def get(self, request):
         """
         Get information about the backfill status.
-        Shows how many staff members need backfilling.
+        Shows how many staff members need backfilling, or the progress of
+        a running backfill with ?job=<job_id>.
         """
-        from django.utils import timezone
-
-        # Count staff members that need backfilling
-        all_staff = Staff.objects.all()
-        needs_update = 0
-        already_updated = 0
-        no_sessions = 0
-        
-        for staff in all_staff:
-            most_recent_session = ServerSession.objects.filter(
-                staff=staff,
-                leave_time__isnull=False
-            ).order_by('-leave_time').first()
-            
-            if most_recent_session:
-                if staff.last_seen is None or staff.last_seen < most_recent_session.leave_time:
-                    needs_update += 1
-                else:
-                    already_updated += 1
-            else:
-                no_sessions += 1
+        from . import last_seen
+
+        job_id = request.query_params.get('job')
+        if job_id:
+            return _last_seen_job_response(job_id)
         
+        counts = last_seen.report()
         return Response({
-            'total_staff': all_staff.count(),
-            'needs_update': needs_update,
-            'already_updated': already_updated,
-            'no_sessions': no_sessions,
-            'message': f'{needs_update} staff members need backfilling',
+            'total_staff': counts['total'],
+            'needs_update': counts['backfill_needed'],
+            'already_updated': counts['backfill_up_to_date'],
+            'no_sessions': counts['no_sessions'],
+            'message': f"{counts['backfill_needed']} staff members need backfilling",
             'endpoint': '/api/staff/backfill-last-seen/',
             'method': 'POST',
-            'description': 'POST to this endpoint to backfill last_seen timestamps for all staff members'
+            'description': 'POST to this endpoint to start a background backfill of last_seen timestamps for all staff members'
         })
     
     def post(self, request):
         """
-        Backfill last_seen timestamps for all staff members.
+        Start a background backfill of last_seen timestamps for all staff members.
         This updates Staff.last_seen based on their most recent ServerSession.leave_time.
+        Poll GET ?job=<job_id> for progress.
         """
-        from django.utils import timezone
-
-        # Get all staff members
-        all_staff = Staff.objects.all()
-        updated_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for staff in all_staff:
-            try:
-                # Find their most recent session with a leave time
-                most_recent_session = ServerSession.objects.filter(
-                    staff=staff,
-                    leave_time__isnull=False
-                ).order_by('-leave_time').first()
-                
-                if most_recent_session:
-                    # Update last_seen if it's None or older than the session leave_time
-                    if staff.last_seen is None or staff.last_seen < most_recent_session.leave_time:
-                        staff.last_seen = most_recent_session.leave_time
-                        staff.save(update_fields=['last_seen'])
-                        updated_count += 1
-                    else:
-                        skipped_count += 1
-                else:
-                    skipped_count += 1
-            except Exception as e:
-                errors.append(f"Error updating {staff.name}: {str(e)}")
-                skipped_count += 1
-        
-        return Response({
-            'success': True,
-            'updated': updated_count,
-            'skipped': skipped_count,
-            'total': all_staff.count(),
-            'errors': errors,
-            'message': f'Successfully updated {updated_count} staff members'
-        }, status=status.HTTP_200_OK)
+        return _start_last_seen_job('backfill')
 
 
 class FixLastSeenView(APIView):
-    """Fix last_seen timestamps - reset to correct values or None for staff without sessions."""
+    """Fix last_seen timestamps - backfill from sessions and drop values in the future."""
     permission_classes = [permissions.IsAuthenticated, IsManager]
     
     def get(self, request):
         """
         Get detailed information about last_seen values for all staff.
-        Shows which staff have incorrect last_seen values.
+        Shows which staff have incorrect last_seen values, or the progress
+        of a running fix with ?job=<job_id>.
         """
-        from django.utils import timezone
+        from . import last_seen
+
+        job_id = request.query_params.get('job')
+        if job_id:
+            return _last_seen_job_response(job_id)
         
         results = []
         needs_fix = 0
         correct = 0
+        to_fix = set(last_seen.pending('fix').values_list('steam_id', flat=True))
         
-        all_staff = Staff.objects.all().order_by('name')
-        
-        for staff in all_staff:
-            # Get most recent completed session
-            most_recent_session = ServerSession.objects.filter(
-                staff=staff,
-                leave_time__isnull=False
-            ).order_by('-leave_time').first()
-            
-            session_count = ServerSession.objects.filter(staff=staff).count()
-            
-            if most_recent_session:
-                # Staff has sessions - last_seen should match most recent session leave_time
-                correct_last_seen = most_recent_session.leave_time
-                is_correct = staff.last_seen == correct_last_seen
-            else:
-                # Staff has no sessions - last_seen should be None
-                correct_last_seen = None
-                is_correct = staff.last_seen is None
+        for staff in last_seen.annotate_last_seen().order_by('name'):
+            # last_seen should be no older than the latest session leave_time and
+            # not in the future; newer values come from app heartbeats
+            is_correct = staff.steam_id not in to_fix
+            correct_last_seen = staff.last_seen if is_correct else staff.correct_last_seen
             
             if not is_correct:
                 needs_fix += 1
@@ -511,7 +478,7 @@ class FixLastSeenView(APIView):
             results.append({
                 'name': staff.name,
                 'steam_id': staff.steam_id,
-                'session_count': session_count,
+                'session_count': staff.session_count,
                 'current_last_seen': staff.last_seen.isoformat() if staff.last_seen else None,
                 'correct_last_seen': correct_last_seen.isoformat() if correct_last_seen else None,
                 'is_correct': is_correct,
@@ -522,65 +489,23 @@ class FixLastSeenView(APIView):
         results.sort(key=lambda x: (not x['needs_fix'], x['name']))
         
         return Response({
-            'total_staff': all_staff.count(),
+            'total_staff': len(results),
             'needs_fix': needs_fix,
             'correct': correct,
             'staff': results,
             'endpoint': '/api/staff/fix-last-seen/',
-            'method': 'POST to fix all incorrect last_seen values'
+            'method': 'POST to start a background fix of all incorrect last_seen values'
         })
     
     def post(self, request):
         """
-        Fix all last_seen timestamps:
-        - Staff WITH sessions: Set last_seen to most recent session leave_time
-        - Staff WITHOUT sessions: Set last_seen to None (will show "Never")
+        Start a background fix of all last_seen timestamps:
+        - Staff WITH sessions: Set last_seen to the most recent session leave_time
+          where it is unset, older, or in the future
+        - Staff WITHOUT sessions: Clear last_seen values in the future
+        Poll GET ?job=<job_id> for progress.
         """
-        from django.utils import timezone
-        
-        all_staff = Staff.objects.all()
-        fixed_with_session = 0
-        fixed_without_session = 0
-        already_correct = 0
-        errors = []
-        
-        for staff in all_staff:
-            try:
-                # Get most recent completed session
-                most_recent_session = ServerSession.objects.filter(
-                    staff=staff,
-                    leave_time__isnull=False
-                ).order_by('-leave_time').first()
-                
-                if most_recent_session:
-                    # Staff has sessions - set last_seen to most recent session
-                    if staff.last_seen != most_recent_session.leave_time:
-                        staff.last_seen = most_recent_session.leave_time
-                        staff.save(update_fields=['last_seen'])
-                        fixed_with_session += 1
-                    else:
-                        already_correct += 1
-                else:
-                    # Staff has NO sessions - reset last_seen to None
-                    if staff.last_seen is not None:
-                        staff.last_seen = None
-                        staff.save(update_fields=['last_seen'])
-                        fixed_without_session += 1
-                    else:
-                        already_correct += 1
-                        
-            except Exception as e:
-                errors.append(f"Error fixing {staff.name}: {str(e)}")
-        
-        return Response({
-            'success': True,
-            'fixed_with_session': fixed_with_session,
-            'fixed_without_session': fixed_without_session,
-            'already_correct': already_correct,
-            'total': all_staff.count(),
-            'errors': errors,
-            'message': f'Fixed {fixed_with_session + fixed_without_session} staff members ({fixed_with_session} with sessions, {fixed_without_session} without sessions set to Never)'
-        }, status=status.HTTP_200_OK)
+        return _start_last_seen_job('fix')
 
 
 class ServerTimeLeaderboardView(APIView):
@@ -588,120 +513,32 @@ class ServerTimeLeaderboardView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        from datetime import timedelta
-
-        from django.db.models import Sum
-        from django.utils import timezone
+        from .leaderboards import build_leaderboard
 
         period = request.query_params.get('period', 'weekly')  # 'weekly' or 'monthly'
         offset = int(request.query_params.get('offset', 0))  # 0 = current, 1 = previous, etc.
         
-        now = timezone.now()
-        
-        if period == 'weekly':
-            # Calculate week start (Saturday is reset day)
-            week_start = get_week_start(now)
-            week_start = week_start if isinstance(week_start, timezone.datetime) else timezone.datetime.combine(week_start, timezone.datetime.min.time(), tzinfo=now.tzinfo)
-            
-            # Apply offset
-            week_start = week_start - timedelta(weeks=offset)
-            week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-            
-            period_start = week_start
-            period_end = week_end
-            period_label = f"Week of {week_start.strftime('%b %d, %Y')}"
-            
-        else:  # monthly
-            # Calculate month start
-            month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
-            # Apply offset
-            for _ in range(offset):
-                month_start = (month_start - timedelta(days=1)).replace(day=1)
-            
-            # Calculate month end
-            next_month = month_start.replace(day=28) + timedelta(days=4)
-            month_end = next_month.replace(day=1) - timedelta(seconds=1)
-            
-            period_start = month_start
-            period_end = month_end
-            period_label = month_start.strftime('%B %Y')
-        
-        # Query sessions within the period
-        sessions = ServerSession.objects.filter(
-            join_time__gte=period_start,
-            join_time__lte=period_end,
-            leave_time__isnull=False  # Only completed sessions
-        ).select_related('staff')
-        
-        # Aggregate by staff
-        staff_times = {}
-        for session in sessions:
-            staff_id = session.staff_id
-            if staff_id not in staff_times:
-                staff_times[staff_id] = {
-                    'staff': session.staff,
-                    'total_seconds': 0,
-                    'session_count': 0,
-                }
-            staff_times[staff_id]['total_seconds'] += session.duration
-            staff_times[staff_id]['session_count'] += 1
-        
-        # Get roster info for active staff (excluding builders if setting enabled)
-        roster_queryset = StaffRoster.objects.filter(is_active=True).select_related('staff')
-        
+        return Response(build_leaderboard(period, offset))
+
+
+def _get_staff_and_timezone(pk):
+    """
+    Resolve a Steam ID or roster ID to (Staff, IANA timezone name), or
+    (None, None) if neither matches.
+    """
+    from .daily_time import resolve_timezone
+
+    try:
+        staff = Staff.objects.get(steam_id=pk)
+    except Staff.DoesNotExist:
+        # Try by roster ID
         try:
-            from apps.system_settings.models import SystemSetting
-            from django.db.models import Q
-            if SystemSetting.exclude_builders():
-                roster_queryset = roster_queryset.exclude(Q(rank__icontains='builder'))
-        except Exception:
-            # Setting doesn't exist yet or database error - skip filtering
-            pass
-        
-        roster_map = {}
-        for roster in roster_queryset:
-            roster_map[roster.staff_id] = roster
-        
-        # Build leaderboard
-        leaderboard = []
-        for staff_id, data in staff_times.items():
-            roster = roster_map.get(staff_id)
-            if not roster:
-                continue  # Skip non-active staff
-                
-            total_seconds = data['total_seconds']
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            
-            leaderboard.append({
-                'staff_id': roster.id,  # Use roster ID for navigation, not steam_id
-                'steam_id': staff_id,
-                'name': data['staff'].name,
-                'role': roster.rank,
-                'role_color': settings.STAFF_ROLE_COLORS.get(roster.rank, '#808080'),
-                'role_priority': roster.rank_priority,
-                'total_seconds': total_seconds,
-                'total_time_formatted': f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m",
-                'session_count': data['session_count'],
-                'avg_session_seconds': total_seconds // data['session_count'] if data['session_count'] > 0 else 0,
-            })
-        
-        # Sort by total time (descending)
-        leaderboard.sort(key=lambda x: x['total_seconds'], reverse=True)
-        
-        # Add ranks
-        for i, entry in enumerate(leaderboard):
-            entry['rank'] = i + 1
-        
-        return Response({
-            'period': period,
-            'period_label': period_label,
-            'period_start': period_start.isoformat(),
-            'period_end': period_end.isoformat(),
-            'offset': offset,
-            'leaderboard': leaderboard,
-        })
+            staff = StaffRoster.objects.select_related('staff').get(pk=pk).staff
+        except (StaffRoster.DoesNotExist, ValueError):
+            return None, None
+    
+    roster = StaffRoster.objects.filter(staff=staff).order_by('-is_active').first()
+    return staff, resolve_timezone(roster.timezone if roster else '')
 
 
 class StaffDailyBreakdownView(APIView):
@@ -709,66 +546,39 @@ class StaffDailyBreakdownView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request, pk):
-        from datetime import timedelta
+        from datetime import datetime, time, timedelta
+        from zoneinfo import ZoneInfo
 
-        from django.utils import timezone
+        from .daily_time import daily_totals, local_today
 
         week_offset = int(request.query_params.get('week_offset', 0))  # 0 = current, 1 = last week
         
-        now = timezone.now()
-        
-        # Calculate week start (Saturday is reset day) for current week
-        current_week_start = get_week_start(now)
-        current_week_start = current_week_start if isinstance(current_week_start, timezone.datetime) else timezone.datetime.combine(current_week_start, timezone.datetime.min.time(), tzinfo=now.tzinfo)
-        
-        # Calculate the requested week
-        requested_week_start = current_week_start - timedelta(weeks=week_offset)
-        requested_week_end = requested_week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        staff, tz_name = _get_staff_and_timezone(pk)
+        if staff is None:
+            return Response({'error': 'Staff not found'}, status=status.HTTP_404_NOT_FOUND)
+        zone = ZoneInfo(tz_name)
         
-        # Calculate previous week for comparison
+        # Calculate week start (Saturday is reset day) in the staff member's timezone
+        requested_week_start = get_week_start(local_today(tz_name)) - timedelta(weeks=week_offset)
         previous_week_start = requested_week_start - timedelta(weeks=1)
-        previous_week_end = previous_week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
-        # Get staff member
-        try:
-            staff = Staff.objects.get(steam_id=pk)
-        except Staff.DoesNotExist:
-            # Try by roster ID
-            try:
-                roster = StaffRoster.objects.get(pk=pk)
-                staff = roster.staff
-            except StaffRoster.DoesNotExist:
-                return Response({'error': 'Staff not found'}, status=status.HTTP_404_NOT_FOUND)
-        
-        # Get sessions for current and previous week
-        current_sessions = ServerSession.objects.filter(
-            staff=staff,
-            join_time__gte=requested_week_start,
-            join_time__lte=requested_week_end,
-            leave_time__isnull=False
-        )
+        # Both weeks in one query, sessions split at local midnight
+        totals = dict(daily_totals(
+            staff.steam_id, previous_week_start, requested_week_start + timedelta(days=6), tz_name
+        ))
         
-        previous_sessions = ServerSession.objects.filter(
-            staff=staff,
-            join_time__gte=previous_week_start,
-            join_time__lte=previous_week_end,
-            leave_time__isnull=False
-        )
+        week_start_at = datetime.combine(requested_week_start, time.min, tzinfo=zone)
+        week_end_at = week_start_at + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
         # Initialize daily breakdown
         days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
         current_breakdown = {i: 0 for i in range(7)}  # 0=Mon, 6=Sun
         previous_breakdown = {i: 0 for i in range(7)}
         
-        # Aggregate current week sessions by day
-        for session in current_sessions:
-            day_of_week = session.join_time.weekday()
-            current_breakdown[day_of_week] += session.duration
-        
-        # Aggregate previous week sessions by day
-        for session in previous_sessions:
-            day_of_week = session.join_time.weekday()
-            previous_breakdown[day_of_week] += session.duration
+        for i in range(7):
+            day = requested_week_start + timedelta(days=i)
+            current_breakdown[day.weekday()] = totals[day]
+            previous_breakdown[day.weekday()] = totals[day - timedelta(weeks=1)]
         
         # Find max day
         max_seconds = max(current_breakdown.values()) if current_breakdown else 0
@@ -818,8 +628,9 @@ class StaffDailyBreakdownView(APIView):
             'staff_id': staff.steam_id,
             'staff_name': staff.name,
             'week_offset': week_offset,
-            'week_start': requested_week_start.isoformat(),
-            'week_end': requested_week_end.isoformat(),
+            'week_start': week_start_at.isoformat(),
+            'week_end': week_end_at.isoformat(),
+            'timezone': tz_name,
             'week_label': f"Week of {requested_week_start.strftime('%b %d')}",
             'previous_week_label': f"Week of {previous_week_start.strftime('%b %d')}",
             'daily_breakdown': daily_data,
@@ -831,6 +642,57 @@ class StaffDailyBreakdownView(APIView):
         })
 
 
+class StaffDailyTimeView(APIView):
+    """Get server time per day over any date range, in the staff member's timezone."""
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get(self, request, pk):
+        from datetime import date, timedelta
+
+        from .daily_time import MAX_RANGE_DAYS, daily_totals, local_today
+
+        staff, tz_name = _get_staff_and_timezone(pk)
+        if staff is None:
+            return Response({'error': 'Staff not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            end = date.fromisoformat(request.query_params['end']) if 'end' in request.query_params else local_today(tz_name)
+            start = date.fromisoformat(request.query_params['start']) if 'start' in request.query_params else end - timedelta(days=27)
+        except ValueError:
+            return Response({'error': 'start and end must be YYYY-MM-DD dates'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if start > end:
+            return Response({'error': 'start must not be after end'}, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days + 1 > MAX_RANGE_DAYS:
+            return Response(
+                {'error': f'Date range is limited to {MAX_RANGE_DAYS} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        days = []
+        total = 0
+        for day, seconds in daily_totals(staff.steam_id, start, end, tz_name):
+            total += seconds
+            hours = seconds // 3600
+            minutes = (seconds % 3600) // 60
+            days.append({
+                'date': day.isoformat(),
+                'day_short': day.strftime('%a'),
+                'seconds': seconds,
+                'formatted': f"{hours}h {minutes}m" if hours > 0 else f"{minutes}m",
+            })
+        
+        return Response({
+            'staff_id': staff.steam_id,
+            'staff_name': staff.name,
+            'timezone': tz_name,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'days': days,
+            'total_seconds': total,
+        })
+
+
 class RecentPromotionsView(APIView):
     """
     Get recent staff role changes grouped by week.
@@ -0,0 +1,70 @@
+# Generated migration to add server status rollup retention settings
+
+from django.db import migrations
+
+
+def create_retention_settings(apps, schema_editor):
+    """Create default retention settings for server status history."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    
+    default_settings = [
+        {
+            'key': 'server_status_raw_retention_days',
+            'value': '2',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Days to keep raw per-poll server status logs once they have been rolled up into minute buckets',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_status_minute_retention_days',
+            'value': '3',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Days to keep per-minute server status rollups (used by the 24-hour chart)',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_status_hour_retention_days',
+            'value': '90',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Days to keep per-hour server status rollups (used by hourly averages)',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_status_day_retention_days',
+            'value': '0',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Days to keep per-day server status rollups (0 keeps them forever)',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+    ]
+    
+    for setting in default_settings:
+        SystemSetting.objects.get_or_create(
+            key=setting['key'],
+            defaults=setting
+        )
+
+
+def remove_retention_settings(apps, schema_editor):
+    """Remove server status retention settings."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    SystemSetting.objects.filter(key__startswith='server_status_').filter(key__endswith='_retention_days').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_settings', '0005_add_exclude_builders_setting'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_retention_settings, remove_retention_settings),
+    ]
@@ -0,0 +1,70 @@
+# Generated migration to add adaptive server polling settings
+
+from django.db import migrations
+
+
+def create_poll_settings(apps, schema_editor):
+    """Create default settings for the adaptive server poll scheduler."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    
+    default_settings = [
+        {
+            'key': 'server_poll_interval_seconds',
+            'value': '60',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Seconds between queries of a healthy server with no staff online and a steady player count',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_poll_active_interval_seconds',
+            'value': '30',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Seconds between queries while staff are online or the player count is changing',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_poll_backoff_max_seconds',
+            'value': '900',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Upper limit for the exponential backoff between queries of an unreachable server',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+        {
+            'key': 'server_poll_jitter_percent',
+            'value': '10',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': 'Random spread (percent of the interval) added to each scheduled query',
+            'is_sensitive': False,
+            'is_active': True,
+        },
+    ]
+    
+    for setting in default_settings:
+        SystemSetting.objects.get_or_create(
+            key=setting['key'],
+            defaults=setting
+        )
+
+
+def remove_poll_settings(apps, schema_editor):
+    """Remove adaptive server polling settings."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    SystemSetting.objects.filter(key__startswith='server_poll_').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_settings', '0006_server_status_retention_settings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_poll_settings, remove_poll_settings),
+    ]
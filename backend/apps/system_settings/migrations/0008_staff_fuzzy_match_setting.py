@@ -0,0 +1,40 @@
+# Generated migration to add fuzzy staff name matching setting
+
+from django.db import migrations
+
+
+def create_fuzzy_match_setting(apps, schema_editor):
+    """Create the fuzzy staff matching threshold setting (disabled by default)."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    
+    SystemSetting.objects.get_or_create(
+        key='staff_fuzzy_match_threshold',
+        defaults={
+            'value': '0',
+            'setting_type': 'integer',
+            'category': 'game_servers',
+            'description': (
+                'Trigram similarity (percent, e.g. 60) at which a player name that does not match '
+                'any staff name exactly is still treated as that staff member. 0 disables fuzzy matching.'
+            ),
+            'is_sensitive': False,
+            'is_active': True,
+        }
+    )
+
+
+def remove_fuzzy_match_setting(apps, schema_editor):
+    """Remove the fuzzy staff matching threshold setting."""
+    SystemSetting = apps.get_model('system_settings', 'SystemSetting')
+    SystemSetting.objects.filter(key='staff_fuzzy_match_threshold').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('system_settings', '0007_server_poll_settings'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fuzzy_match_setting, remove_fuzzy_match_setting),
+    ]
@@ -27,21 +27,50 @@ if os.name == 'nt':
 
 # Celery Beat Schedule
 app.conf.beat_schedule = {
-    # Refresh server status every minute
-    'refresh-server-status-every-minute': {
-        'task': 'apps.servers.tasks.refresh_all_servers',
-        'schedule': 60.0,  # Every 60 seconds
+    # Poll servers whose adaptive interval has elapsed (intervals are per server,
+    # configured through SystemSetting; see apps.servers.scheduler)
+    'poll-due-servers-every-15-seconds': {
+        'task': 'apps.servers.tasks.poll_due_servers',
+        'schedule': 15.0,  # Every 15 seconds
+        # Drop ticks that could not start before the next one is due, so a busy
+        # worker never builds up a backlog of stale refreshes
+        'options': {'expires': 14},
     },
-    # Sync staff roster every hour
-    'sync-staff-roster-hourly': {
+    # Roll raw server status logs into minute/hour/day buckets and prune old rows
+    'rollup-server-status-every-5-minutes': {
+        'task': 'apps.servers.tasks.rollup_server_status',
+        'schedule': 300.0,  # Every 5 minutes (300 seconds)
+    },
+    # Fold closed staff server sessions into daily/weekly/monthly aggregates
+    'aggregate-server-sessions-every-15-minutes': {
+        'task': 'apps.staff.tasks.aggregate_server_sessions',
+        'schedule': 900.0,  # Every 15 minutes (900 seconds)
+    },
+    # Write buffered in-app staff activity heartbeats to the database
+    'flush-staff-activity-every-minute': {
+        'task': 'apps.staff.tasks.flush_staff_activity',
+        'schedule': 60.0,  # Every minute
+    },
+    # Clear the in-app activity flag of staff without recent heartbeats
+    'mark-inactive-staff-every-5-minutes': {
+        'task': 'apps.staff.tasks.mark_inactive_staff',
+        'schedule': 300.0,  # Every 5 minutes (300 seconds)
+    },
+    # Sync staff roster every 5 minutes (unchanged sheets are skipped cheaply)
+    'sync-staff-roster-every-5-minutes': {
         'task': 'apps.staff.tasks.sync_staff_roster',
-        'schedule': crontab(minute=0),  # Every hour at minute 0
+        'schedule': crontab(minute='*/5'),
     },
     # Sync Steam names for staff members twice daily (6 AM and 6 PM)
     'sync-staff-steam-names-twice-daily': {
         'task': 'apps.staff.tasks.sync_staff_steam_names',
         'schedule': crontab(hour='6,18', minute=0),  # 6:00 AM and 6:00 PM
     },
+    # Refresh Steam names of active but unmatched, unnamed or stale staff every 5 minutes
+    'sync-recent-staff-steam-names-every-5-minutes': {
+        'task': 'apps.staff.tasks.sync_recent_staff_steam_names',
+        'schedule': crontab(minute='*/5'),
+    },
     # Daily leaderboard reset check
     'daily-leaderboard-check': {
         'task': 'apps.counters.tasks.check_daily_reset',
@@ -6,13 +6,14 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 from apps.staff.models import StaffRoster
+from apps.staff.querysets import annotate_roster_status
 from apps.staff.serializers import StaffRosterSerializer
 
 print("Testing API Response for Staff Roster")
 print("=" * 80)
 
 # Get first 10 active staff
-rosters = StaffRoster.objects.filter(is_active=True).select_related('staff')[:10]
+rosters = annotate_roster_status(StaffRoster.objects.filter(is_active=True)).select_related('staff')[:10]
 
 for roster in rosters:
     serializer = StaffRosterSerializer(roster)
@@ -14,6 +14,7 @@ django.setup()
 
 from apps.servers.services import find_matching_staff, normalize_name
 from apps.staff.models import StaffRoster
+from apps.staff.querysets import annotate_roster_status
 from apps.staff.serializers import StaffRosterSerializer
 
 
@@ -24,7 +25,7 @@ def test_complete_flow():
     print("=" * 70)
     
     # Get Cloudyman from roster
-    cloudyman = StaffRoster.objects.filter(name__icontains='cloudyman').first()
+    cloudyman = annotate_roster_status(StaffRoster.objects.filter(name__icontains='cloudyman')).first()
     
     if not cloudyman:
         print("✗ Cloudyman not found in staff roster")
@@ -0,0 +1,195 @@
+"""
+Offline tests for the in-house A2S_PLAYER decoder (apps.servers.player_query).
+
+Every case builds the server's response bytes by hand, so no game server or
+network access is needed. Run with pytest or directly as a script.
+"""
+import bz2
+import random
+import struct
+import sys
+import zlib
+
+from apps.servers.player_query import (HEADER_SIMPLE, PlayerList,
+                                       decode_players, reassemble_split)
+
+
+def build_payload(players, expected=None):
+    """A2S_PLAYER response body for (name, score, duration) tuples."""
+    expected = len(players) if expected is None else expected
+    body = bytearray(b'\x44' + bytes([expected]))
+    for index, (name, score, duration) in enumerate(players):
+        body += bytes([index]) + name.encode('utf-8') + b'\x00'
+        body += struct.pack('<lf', score, duration)
+    return bytes(body)
+
+
+def split_fragments(data, size):
+    """Fragment payloads of at most ``size`` bytes, keyed by fragment number."""
+    chunks = [data[i:i + size] for i in range(0, len(data), size)]
+    return {number: chunk for number, chunk in enumerate(chunks)}, len(chunks)
+
+
+def compressed_body(response):
+    """Split-packet data for a bz2-compressed response: size, CRC32, bz2 stream."""
+    compressed = bz2.compress(response, compresslevel=1)
+    return struct.pack('<Ll', len(response), zlib.crc32(response)) + compressed
+
+
+def many_players(count=255, name_length=1000):
+    """Players with long, incompressible names, so bz2 needs several blocks."""
+    rng = random.Random(count)
+    alphabet = 'abcdefghijklmnopqrstuvwxyz0123456789'
+    return [
+        (''.join(rng.choice(alphabet) for _ in range(name_length)), i, float(i))
+        for i in range(count)
+    ]
+
+
+def test_single_packet():
+    """A whole response in one packet decodes every player."""
+    players = decode_players(build_payload([('Alice', 10, 120.5), ('Bob', -2, 3.0)]))
+
+    assert isinstance(players, PlayerList)
+    assert [p.name for p in players] == ['Alice', 'Bob']
+    assert players[0].score == 10 and players[1].score == -2
+    assert players[0].duration == 120.5
+    assert players.expected == 2
+    assert not players.partial
+
+
+def test_empty_server():
+    players = decode_players(build_payload([]))
+    assert len(players) == 0
+    assert not players.partial
+
+
+def test_split_uncompressed_with_bit_15():
+    """GMod sets bit 15 of the message id on plain split responses."""
+    entries = [(f'Player{i}', i, float(i)) for i in range(40)]
+    response = HEADER_SIMPLE + build_payload(entries)
+    fragments, total = split_fragments(response, 200)
+
+    payload, complete = reassemble_split(fragments, total, 0x00008001)
+    players = decode_players(payload)
+
+    assert complete
+    assert [p.name for p in players] == [name for name, _, _ in entries]
+    assert not players.partial
+
+
+def test_split_compressed():
+    """Compression is bit 31; the bz2 stream spans all fragments."""
+    entries = [(f'Player{i}', i, float(i)) for i in range(64)]
+    fragments, total = split_fragments(compressed_body(HEADER_SIMPLE + build_payload(entries)), 100)
+
+    payload, complete = reassemble_split(fragments, total, 0x80000001)
+    players = decode_players(payload)
+
+    assert total > 1
+    assert complete
+    assert len(players) == 64
+    assert not players.partial
+
+
+def test_compressed_flag_on_plain_data():
+    """A response flagged as compressed without a bz2 header is read as plain data."""
+    entries = [('Alice', 1, 1.0)]
+    data = struct.pack('<Ll', 0, 0) + HEADER_SIMPLE + build_payload(entries)
+
+    payload, complete = reassemble_split({0: data}, 1, 0x80000001)
+
+    assert complete
+    assert [p.name for p in decode_players(payload)] == ['Alice']
+
+
+def test_missing_fragment():
+    """Only the contiguous run from fragment 0 is used, flagged incomplete."""
+    entries = [(f'Player{i}', i, float(i)) for i in range(40)]
+    fragments, total = split_fragments(HEADER_SIMPLE + build_payload(entries), 200)
+    del fragments[total - 1]
+
+    payload, complete = reassemble_split(fragments, total, 1)
+    players = decode_players(payload)
+
+    assert not complete
+    assert 0 < len(players) < 40
+    assert players.partial
+    assert [p.name for p in players] == [name for name, _, _ in entries[:len(players)]]
+
+
+def test_truncated_entry():
+    """A response cut inside an entry yields the players before it."""
+    payload = build_payload([('Alice', 1, 1.0), ('Bob', 2, 2.0), ('Carol', 3, 3.0)])
+
+    # Cut inside Carol's score/duration
+    players = decode_players(payload[:-3])
+    assert [p.name for p in players] == ['Alice', 'Bob']
+    assert players.expected == 3
+    assert players.partial
+
+    # Cut inside Carol's name (no terminator)
+    players = decode_players(payload[:payload.index(b'Carol') + 2])
+    assert [p.name for p in players] == ['Alice', 'Bob']
+    assert players.partial
+
+
+def test_header_only():
+    players = decode_players(b'\x44')
+    assert len(players) == 0
+    assert players.partial
+
+
+def test_invalid_response_type():
+    from a2s import BrokenMessageError
+
+    try:
+        decode_players(b'\x49junk')
+    except BrokenMessageError:
+        return
+    raise AssertionError("Expected BrokenMessageError for a non-player response")
+
+
+def test_bad_bz2_tail():
+    """A corrupt end of the bz2 stream keeps the players from intact blocks."""
+    entries = many_players()
+    data = compressed_body(HEADER_SIMPLE + build_payload(entries))
+    # Overwrite the last quarter of the stream with garbage
+    cut = len(data) * 3 // 4
+    data = data[:cut] + bytes(255 - b for b in data[cut:])
+    fragments, total = split_fragments(data, 1200)
+
+    payload, complete = reassemble_split(fragments, total, 0x80000002)
+    players = decode_players(payload)
+
+    assert not complete
+    assert 0 < len(players) < len(entries)
+    assert players.partial
+    assert [p.name for p in players] == [name for name, _, _ in entries[:len(players)]]
+
+
+def test_truncated_bz2_stream():
+    """A bz2 stream that simply ends early is treated like a bad tail."""
+    entries = many_players()
+    data = compressed_body(HEADER_SIMPLE + build_payload(entries))
+
+    payload, complete = reassemble_split({0: data[:len(data) * 3 // 4]}, 1, 0x80000003)
+    players = decode_players(payload)
+
+    assert not complete
+    assert 0 < len(players) < len(entries)
+    assert players.partial
+
+
+if __name__ == '__main__':
+    tests = [(name, func) for name, func in sorted(globals().items()) if name.startswith('test_')]
+    failed = 0
+    for name, func in tests:
+        try:
+            func()
+            print(f"✓ {name}")
+        except Exception as e:
+            failed += 1
+            print(f"✗ {name}: {type(e).__name__}: {e}")
+    print(f"\n{len(tests) - failed}/{len(tests)} passed")
+    sys.exit(1 if failed else 0)
@@ -12,6 +12,7 @@ django.setup()
 from apps.servers.models import GameServer, ServerPlayer
 from apps.servers.services import ServerQueryService
 from apps.staff.models import StaffRoster
+from apps.staff.querysets import annotate_roster_status
 
 
 def test_online_status():
@@ -31,7 +32,7 @@ def test_online_status():
     print("✓ Server query complete\n")
     
     # Get Cloudyman from roster
-    cloudyman = StaffRoster.objects.filter(name__icontains='cloudyman').first()
+    cloudyman = annotate_roster_status(StaffRoster.objects.filter(name__icontains='cloudyman')).first()
     
     if not cloudyman:
         print("✗ Cloudyman not found in staff roster")
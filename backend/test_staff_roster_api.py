@@ -11,6 +11,7 @@ django.setup()
 
 from apps.servers.models import ServerPlayer
 from apps.staff.models import StaffRoster
+from apps.staff.querysets import annotate_roster_status
 from apps.staff.serializers import StaffRosterSerializer
 
 
@@ -39,7 +40,7 @@ def test_staff_roster_api():
         # Find matching staff roster entry
         roster = None
         if player.steam_id:
-            roster = StaffRoster.objects.filter(steam_id=player.steam_id).first()
+            roster = annotate_roster_status(StaffRoster.objects.filter(steam_id=player.steam_id)).first()
         
         if not roster:
             print(f"  ✗ No roster entry found for {player.name}")
@@ -38,10 +38,11 @@ interface StaffDistribution {
   server_id: number;
   server_name: string;
   staff: Array<{
-    username: string;
-    display_name: string;
-    role: string;
+    steam_id: string;
+    name: string;
+    rank: string;
     role_color: string;
+    duration: string;
   }>;
 }
 
@@ -83,7 +84,7 @@ export default function ServersPage() {
   useEffect(() => {
     const interval = setInterval(() => {
       serverAPI.distribution().then((res) => {
-        setDistribution(res.data);
+        setDistribution(res.data.servers || []);
       }).catch(() => {
         // Silently fail, non-critical
       });
@@ -132,7 +133,7 @@ export default function ServersPage() {
         serverAPI.distribution(),
       ]);
       setServers(serversRes.data);
-      setDistribution(distRes.data);
+      setDistribution(distRes.data.servers || []);
     } catch (error) {
       toast.error('Failed to load server data');
     } finally {
@@ -248,13 +249,14 @@ export default function ServersPage() {
                   <p className="text-gray-500 text-sm">No staff online</p>
                 ) : (
                   <div className="space-y-2">
-                    {dist.staff.map((member, idx) => (
+                    {dist.staff.map((member) => (
                       <div
-                        key={idx}
+                        key={member.steam_id}
                         className="flex items-center justify-between py-2 px-3 bg-dark-bg rounded-lg"
                       >
                         <span className="text-white">
-                          {member.display_name || member.username}
+                          {member.name}
+                          <span className="ml-2 text-xs text-gray-500">{member.duration}</span>
                         </span>
                         <span
                           className="text-sm font-medium px-2 py-1 rounded"
@@ -263,7 +265,7 @@ export default function ServersPage() {
                             color: member.role_color,
                           }}
                         >
-                          {member.role}
+                          {member.rank}
                         </span>
                       </div>
                     ))}
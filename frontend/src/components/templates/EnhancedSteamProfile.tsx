@@ -105,9 +105,23 @@ interface Props {
       last_seen: string;
     }>;
     message?: string;
+    last_seen?: PresenceStint | null;
+    history?: PresenceStint[];
   };
 }
 
+interface PresenceStint {
+  server: {
+    id: number;
+    name: string;
+  };
+  player_name: string;
+  is_staff: boolean;
+  first_seen: string;
+  last_seen: string;
+  is_current: boolean;
+}
+
 export default function EnhancedSteamProfile({ profile, serverPresence }: Props) {
   const hasVACBan = profile.bans.vac_bans > 0;
   const hasGameBan = profile.bans.game_bans > 0;
@@ -199,6 +213,25 @@ export default function EnhancedSteamProfile({ profile, serverPresence }: Props)
         </div>
       )}
 
+      {/* Last Seen (from presence history) */}
+      {serverPresence && !serverPresence.found && serverPresence.last_seen && (
+        <div className="bg-dark-card rounded-lg border border-dark-border p-4">
+          <h3 className="text-sm font-semibold text-gray-400 mb-2 flex items-center gap-2">
+            <ClockIcon className="w-4 h-4" />
+            Last Seen
+          </h3>
+          <p className="text-white">
+            {serverPresence.last_seen.server.name}{' '}
+            <span className="text-gray-400">
+              {formatDistanceToNow(new Date(serverPresence.last_seen.last_seen), { addSuffix: true })}
+            </span>
+          </p>
+          <p className="text-sm text-gray-400">
+            Playing as: {serverPresence.last_seen.player_name}
+          </p>
+        </div>
+      )}
+
       {/* Header with Avatar and Basic Info */}
       <div className="bg-dark-card rounded-lg border border-dark-border p-6">
         <div className="flex items-start gap-6">
@@ -46,6 +46,7 @@ interface LeaderboardUpdate {
 interface ServerUpdate {
   type: string;
   data: any;
+  seq?: number;
   server_id?: number;
   status?: any;
 }
@@ -77,6 +78,66 @@ interface RosterSyncEvent {
   status: string;
 }
 
+interface ServerStatusState {
+  seq: number | null;
+  servers: any[];
+}
+
+function formatPlayerDuration(seconds: number): string {
+  const hours = Math.floor(seconds / 3600);
+  const minutes = Math.floor((seconds % 3600) / 60);
+  return hours > 0 ? `${hours}h ${minutes}m` : `${minutes}m`;
+}
+
+// Deltas do not carry durations; advance each player's duration from the
+// joined_at sent when they joined (or when their duration jumped).
+function withLiveDurations(servers: any[]): any[] {
+  const now = Date.now();
+  return servers.map((server) => ({
+    ...server,
+    players: (server.players || []).map((p: any) => {
+      if (!p.joined_at) return p;
+      const seconds = Math.max(0, Math.floor((now - Date.parse(p.joined_at)) / 1000));
+      return { ...p, duration_seconds: seconds, duration: formatPlayerDuration(seconds) };
+    }),
+  }));
+}
+
+// Apply a status_delta message from the server_status group to the last
+// full server list. Returns null when the delta cannot be applied.
+function applyServerStatusDelta(servers: any[], changes: any[]): any[] | null {
+  const next = servers.map((s) => ({ ...s }));
+  const byId = new Map(next.map((s) => [s.id, s]));
+
+  for (const change of changes) {
+    const server = byId.get(change.id);
+    if (!server) return null;
+
+    if (change.fields) {
+      Object.assign(server, change.fields);
+    }
+
+    if (change.players) {
+      server.players = change.players;
+    } else if (change.players_joined || change.players_left || change.players_updated) {
+      const left = new Set<string>(change.players_left || []);
+      const updated = new Map<string, any>(
+        (change.players_updated || []).map((p: any) => [p.name, p])
+      );
+      server.players = (server.players || [])
+        .filter((p: any) => !left.has(p.name))
+        .map((p: any) => (updated.has(p.name) ? { ...p, ...updated.get(p.name) } : p))
+        .concat(change.players_joined || []);
+    }
+
+    if (change.staff_list) {
+      server.staff_list = change.staff_list;
+    }
+  }
+
+  return next;
+}
+
 // Reconnecting WebSocket wrapper
 class ReconnectingWebSocket {
   private url: string;
@@ -217,6 +278,9 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
   const staffDiscordCallbacksRef = useRef<((data: StaffDiscordStatus) => void)[]>([]);
   const rosterSyncCallbacksRef = useRef<((data: RosterSyncEvent) => void)[]>([]);
 
+  // Last full server list and its sequence number, used to apply deltas
+  const serverStatusRef = useRef<ServerStatusState>({ seq: null, servers: [] });
+
   // Keep track of reconnecting websockets
   const socketsRef = useRef<{
     counter: ReconnectingWebSocket | null;
@@ -300,13 +364,42 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
     };
     serverWs.onmessage = (event) => {
       try {
-        const data = JSON.parse(event.data);
+        let data = JSON.parse(event.data);
+        const state = serverStatusRef.current;
+
+        if (['initial_data', 'resync', 'status_update'].includes(data.type) && data.data) {
+          serverStatusRef.current = { seq: data.seq ?? null, servers: data.data };
+          if (data.type === 'resync') {
+            data = { ...data, type: 'status_update' };
+          }
+        } else if (data.type === 'status_delta') {
+          if (state.seq !== null && data.seq <= state.seq) {
+            return; // Already applied (duplicate broadcast)
+          }
+          const servers = state.seq === data.base_seq
+            ? applyServerStatusDelta(state.servers, data.changes)
+            : null;
+          if (!servers) {
+            // Missed a sequence number; ask for the full snapshot
+            serverWs.send(JSON.stringify({ action: 'resync' }));
+            return;
+          }
+          serverStatusRef.current = { seq: data.seq, servers };
+          // Subscribers always receive the full list
+          data = { type: 'status_update', seq: data.seq, data: servers };
+        }
+
+        if (['initial_data', 'status_update'].includes(data.type) && data.data) {
+          data = { ...data, data: withLiveDurations(data.data) };
+        }
+
         serverCallbacksRef.current.forEach((cb) => cb(data));
       } catch (e) {
         console.error('Error parsing server message:', e);
       }
     };
     serverWs.onclose = () => {
+      serverStatusRef.current = { seq: null, servers: [] };
       connectedCount = Math.max(0, connectedCount - 1);
       updateConnectionState();
     };
@@ -336,6 +429,12 @@ export function WebSocketProvider({ children }: { children: React.ReactNode }) {
           case 'staff_discord_status':
             staffDiscordCallbacksRef.current.forEach((cb) => cb(data));
             break;
+          case 'staff_discord_status_batch':
+            data.updates.forEach((update: Omit<StaffDiscordStatus, 'type'>) => {
+              const status = { type: 'staff_discord_status', ...update };
+              staffDiscordCallbacksRef.current.forEach((cb) => cb(status));
+            });
+            break;
           case 'staff_roster_sync':
             rosterSyncCallbacksRef.current.forEach((cb) => cb(data));
             break;
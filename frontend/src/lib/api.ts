@@ -88,6 +88,8 @@ export const staffAPI = {
   stats: (id: number, params?: string) => api.get(`/staff/roster/${id}/stats/${params || ''}`),
   dailyBreakdown: (id: string | number, weekOffset?: number) => 
     api.get(`/staff/roster/${id}/daily-breakdown/`, { params: { week_offset: weekOffset || 0 } }),
+  dailyTime: (id: string | number, start?: string, end?: string) =>
+    api.get(`/staff/roster/${id}/daily-time/`, { params: { start, end } }),
   serverTimeLeaderboard: (period?: string, offset?: number) =>
     api.get('/staff/server-time-leaderboard/', { params: { period: period || 'weekly', offset: offset || 0 } }),
   recentPromotions: (offset?: number) =>